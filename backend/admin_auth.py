@@ -0,0 +1,40 @@
+"""
+Admin Authentication
+Bearer token check for operational endpoints (runtime stats, traces, profiling, slow-request capture)
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+# Admin endpoints are disabled while this is empty
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+security = HTTPBearer(auto_error=False)
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time comparison against ADMIN_TOKEN"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Token from a raw Authorization header value"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else None
+
+async def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them"
+        )
+    if not credentials or not is_admin_token(credentials.credentials):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin token required"
+        )
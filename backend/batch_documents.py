@@ -0,0 +1,71 @@
+"""
+Batch Document Retrieval
+Fetches many (source, id, page) documents at once: cached ones immediately, the rest under a per-source cap
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from document_store import document_tool_call
+from tool_cache import CACHE_ENABLED, cache_key, tool_cache
+from tool_executor import execute_tool
+
+SOURCE_CONCURRENCY = int(os.getenv("BATCH_SOURCE_CONCURRENCY", 4))
+MAX_BATCH_SIZE = int(os.getenv("BATCH_MAX_DOCUMENTS", 100))
+
+DocumentRef = Tuple[str, str, int]
+
+def deduplicate(refs: List[DocumentRef]) -> List[DocumentRef]:
+    """Drop repeated references, keeping first-seen order"""
+    return list(dict.fromkeys(refs))
+
+class BatchFetcher:
+    """Resolves document references with one semaphore per source"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, source: str) -> asyncio.Semaphore:
+        if source not in self._semaphores:
+            self._semaphores[source] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[source]
+
+    async def fetch(self, index: int, ref: DocumentRef) -> Dict[str, Any]:
+        source, doc_id, page = ref
+        entry: Dict[str, Any] = {"index": index, "source": source, "id": doc_id, "page": page}
+        try:
+            tool_name, parameters = document_tool_call(source, doc_id, page)
+        except ValueError as e:
+            return {**entry, "status": "error", "error": str(e)}
+
+        if CACHE_ENABLED:
+            key = cache_key(tool_name, parameters)
+            state, value = tool_cache.get(key)
+            if state == "fresh":
+                tool_cache.record(tool_name, True)
+                tool_cache.claim_prefetched(key)
+                return {**entry, "status": "ok", "cached": True, "document": value}
+
+        try:
+            async with self._semaphore(source):
+                document = await execute_tool(tool_name, parameters)
+            return {**entry, "status": "ok", "cached": False, "document": document}
+        except Exception as e:
+            return {**entry, "status": "error", "error": str(e)}
+
+async def fetch_documents(refs: List[DocumentRef], concurrency: int = SOURCE_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Fetch every reference concurrently; results come back in request order"""
+    fetcher = BatchFetcher(concurrency)
+    return await asyncio.gather(*[fetcher.fetch(index, ref) for index, ref in enumerate(refs)])
+
+async def stream_documents(refs: List[DocumentRef], concurrency: int = SOURCE_CONCURRENCY) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each document as soon as it is available"""
+    fetcher = BatchFetcher(concurrency)
+    tasks = [asyncio.ensure_future(fetcher.fetch(index, ref)) for index, ref in enumerate(refs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,178 @@
+"""
+Circuit Breakers
+Per-upstream breakers that fail fast while a government server is down or too slow
+"""
+import logging
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from error_handlers import GovernmentServerError
+from tool_registry import tool_category
+from upstream_errors import is_upstream_failure
+
+logger = logging.getLogger(__name__)
+
+BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURES", 5))
+SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL", 20))
+OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", 30))
+HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_BREAKER_PROBES", 1))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Consecutive-failure breaker; calls slower than the latency threshold count as failures"""
+
+    def __init__(self, name: str, failure_threshold: int, slow_call_seconds: float, open_seconds: float, probes: int):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        # Consecutive failed health probes, kept apart so real calls and probes cannot add up
+        self.probe_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; half-open admits a limited number of probes"""
+        if self.state == OPEN and self.retry_after() <= 0:
+            self.state = HALF_OPEN
+            logger.info(f"Circuit '{self.name}' half-open, probing upstream")
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.probes_in_flight < self.probes:
+            self.probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, success: bool, probe: bool, error: Optional[str] = None):
+        if probe:
+            self.probes_in_flight -= 1
+        if success:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed, upstream recovered")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_failures = 0
+            return
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def release(self, probe: bool):
+        """Give back a probe slot for a call that ended without an upstream outcome"""
+        if probe:
+            self.probes_in_flight -= 1
+
+    def observe_probe(self, ok: bool, error: Optional[str] = None):
+        """Fold in a background health probe: recovery shortens the open period, repeated outages open the circuit"""
+        if ok:
+            self.probe_failures = 0
+            if self.state == OPEN:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open after a successful health probe")
+            return
+        if self.state != CLOSED:
+            return
+        self.probe_failures += 1
+        self.last_error = f"health probe: {error}"
+        if self.probe_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit '{self.name}' opened after {max(self.consecutive_failures, self.probe_failures)} failures: {self.last_error}"
+            )
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probe_failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "probe_failures": self.probe_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after_seconds": round(self.retry_after(), 1) if self.state == OPEN else 0,
+            "last_error": self.last_error,
+        }
+
+class CircuitBreakers:
+    """One breaker per upstream category"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, category: str) -> CircuitBreaker:
+        if category not in self._breakers:
+            self._breakers[category] = CircuitBreaker(
+                category, FAILURE_THRESHOLD, SLOW_CALL_SECONDS, OPEN_SECONDS, HALF_OPEN_PROBES
+            )
+        return self._breakers[category]
+
+    async def call(
+        self,
+        tool_name: str,
+        parameters: Dict[str, Any],
+        call: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    ) -> Any:
+        """Run an upstream call through its category's breaker"""
+        if not BREAKER_ENABLED:
+            return await call(tool_name, parameters)
+
+        breaker = self.get(tool_category(tool_name))
+        if not breaker.allow():
+            raise GovernmentServerError(
+                breaker.name,
+                f"circuit open after repeated failures, retry in {math.ceil(breaker.retry_after())}s"
+            )
+        probe = breaker.state == HALF_OPEN
+        started = time.monotonic()
+        try:
+            result = await call(tool_name, parameters)
+        except Exception as e:
+            if is_upstream_failure(e):
+                breaker.record(False, probe, str(e))
+            else:
+                # Bad parameters, tool bugs and local limits (rate limiter, pool capacity) say nothing about the upstream
+                breaker.release(probe)
+            raise
+        except BaseException:
+            breaker.release(probe)
+            raise
+        elapsed = time.monotonic() - started
+        if elapsed > breaker.slow_call_seconds:
+            breaker.record(False, probe, f"slow call: {elapsed:.1f}s")
+        else:
+            breaker.record(True, probe)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state per upstream category"""
+        return {
+            "enabled": BREAKER_ENABLED,
+            "failure_threshold": FAILURE_THRESHOLD,
+            "slow_call_seconds": SLOW_CALL_SECONDS,
+            "open_seconds": OPEN_SECONDS,
+            "breakers": {name: breaker.stats() for name, breaker in sorted(self._breakers.items())},
+        }
+
+circuit_breakers = CircuitBreakers()
@@ -0,0 +1,109 @@
+"""
+Document Assembly
+Fetches every page of a paginated decision concurrently and stitches them into one Markdown document
+"""
+import asyncio
+import os
+from typing import Any, Dict, List
+
+from document_store import DOCUMENT_TOOLS, document_address, stored_call
+from error_handlers import ValidationError
+from request_coalescing import single_flight
+from tool_cache import DOCUMENT_TTL, cache_key, cached_call
+from tool_executor import execute_tool
+
+PAGE_CONCURRENCY = int(os.getenv("DOCUMENT_PAGE_CONCURRENCY", 4))
+MAX_PAGES = int(os.getenv("DOCUMENT_MAX_PAGES", 50))
+
+# Page number the assembled document is kept under in the document store
+ALL_PAGES = 0
+
+# Suffix that gives assembled documents their own cache keys and hit/miss counters
+ALL_PAGES_SUFFIX = ":all_pages"
+
+# Keys the paginated document tools use for the page text and the page count
+_CONTENT_KEYS = ("markdown_chunk", "markdown_content", "markdown", "content")
+_TOTAL_PAGES_KEYS = ("total_pages", "totalPages", "page_count")
+_PAGE_KEYS = ("current_page", "page_number", "is_paginated")
+
+PAGE_SEPARATOR = "\n\n---\n\n"
+
+def _as_dict(result: Any) -> Dict[str, Any]:
+    if hasattr(result, "model_dump"):
+        result = result.model_dump()
+    if not isinstance(result, dict):
+        raise ValueError(f"Unexpected document page type: {type(result).__name__}")
+    return result
+
+def _content_key(page: Dict[str, Any]) -> str:
+    for key in _CONTENT_KEYS:
+        if isinstance(page.get(key), str):
+            return key
+    raise ValueError("Document page has no Markdown content")
+
+def _total_pages(page: Dict[str, Any]) -> int:
+    for key in _TOTAL_PAGES_KEYS:
+        value = page.get(key)
+        if isinstance(value, int) and value > 0:
+            if value > MAX_PAGES:
+                # Refused rather than cut short, so a partial document is never stored or cached as the whole one
+                raise ValidationError(
+                    "all_pages",
+                    f"document has {value} pages, more than DOCUMENT_MAX_PAGES={MAX_PAGES}; fetch its pages individually"
+                )
+            return value
+    return 1
+
+def _check_page(page: Dict[str, Any], page_number: int, content_key: str):
+    # One bad page must fail the whole document, not be stored and cached as a silently truncated one
+    if page.get("error"):
+        raise RuntimeError(f"Page {page_number}: {page['error']}")
+    content = page.get(content_key)
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError(f"Page {page_number} has no Markdown content")
+
+def stitch_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One document with the first page's metadata and every page's Markdown joined in order"""
+    first = pages[0]
+    content_key = _content_key(first)
+    for page_number, page in enumerate(pages, start=1):
+        _check_page(page, page_number, content_key)
+    document = {key: value for key, value in first.items() if key not in _PAGE_KEYS}
+    document[content_key] = PAGE_SEPARATOR.join(page[content_key] for page in pages)
+    document["total_pages"] = len(pages)
+    document["all_pages"] = True
+    return document
+
+async def _assemble(tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    page_param = DOCUMENT_TOOLS[tool_name].page_param
+    first = _as_dict(await execute_tool(tool_name, {**parameters, page_param: 1}))
+    if first.get("error"):
+        raise RuntimeError(str(first["error"]))
+    total = _total_pages(first)
+
+    semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+    async def fetch_page(page_number: int) -> Dict[str, Any]:
+        async with semaphore:
+            return _as_dict(await execute_tool(tool_name, {**parameters, page_param: page_number}))
+
+    rest = await asyncio.gather(*[fetch_page(page_number) for page_number in range(2, total + 1)])
+    return stitch_pages([first, *rest])
+
+async def _load(whole_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    tool_name = whole_name[:-len(ALL_PAGES_SUFFIX)]
+    page_param = DOCUMENT_TOOLS[tool_name].page_param
+    address = document_address(tool_name, {**parameters, page_param: ALL_PAGES})
+    return await stored_call(tool_name, parameters, _assemble, address=address)
+
+async def get_all_pages(tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Whole document for a paginated document tool, cached and stored as one unit"""
+    spec = DOCUMENT_TOOLS.get(tool_name)
+    if spec is None or spec.page_param is None:
+        raise ValueError(f"Tool '{tool_name}' is not a paginated document tool")
+    parameters = {key: value for key, value in parameters.items() if key != spec.page_param}
+    whole_name = f"{tool_name}{ALL_PAGES_SUFFIX}"
+    key = cache_key(whole_name, parameters)
+    return await single_flight.do(
+        key, lambda: cached_call(whole_name, parameters, _load, ttl=DOCUMENT_TTL, key=key)
+    )
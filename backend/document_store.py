@@ -0,0 +1,294 @@
+"""
+Document Store
+Persistent, content-addressed store for published court decisions and legislation articles
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_STORE_ENABLED = os.getenv("DOCUMENT_STORE_ENABLED", "true").lower() == "true"
+DOCUMENT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.getenv("DOCUMENT_STORE_PATH", "document_store.sqlite3")
+)
+COMPRESSION_LEVEL = int(os.getenv("DOCUMENT_STORE_COMPRESSION_LEVEL", 6))
+# Documents stored longer ago than this are dropped (0 keeps them forever)
+DOCUMENT_STORE_MAX_AGE_DAYS = float(os.getenv("DOCUMENT_STORE_MAX_AGE_DAYS", 90))
+# Compressed bytes kept; the oldest documents go first beyond it (0 disables the cap)
+DOCUMENT_STORE_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", 2 * 1024 ** 3))
+DOCUMENT_STORE_PRUNE_INTERVAL = float(os.getenv("DOCUMENT_STORE_PRUNE_INTERVAL", 3600))
+
+# Documents deleted per transaction while enforcing the size cap
+PRUNE_BATCH = 200
+
+class DocumentSource(NamedTuple):
+    source: str
+    id_params: Tuple[str, ...]
+    page_param: Optional[str]
+
+# Document tool -> how its parameters map onto (source, id, page)
+DOCUMENT_TOOLS: Dict[str, DocumentSource] = {
+    "get_bedesten_document_markdown": DocumentSource("bedesten", ("documentId",), None),
+    "get_emsal_document_markdown": DocumentSource("emsal", ("id",), None),
+    "get_anayasa_document_unified": DocumentSource("anayasa", ("document_url",), "page_number"),
+    "get_uyusmazlik_document_markdown_from_url": DocumentSource("uyusmazlik", ("document_url",), None),
+    "get_kik_document_markdown": DocumentSource("kik", ("karar_id",), "page_number"),
+    "get_rekabet_kurumu_document": DocumentSource("rekabet", ("karar_id",), "page_number"),
+    "get_sayistay_document_unified": DocumentSource("sayistay", ("decision_type", "decision_id"), None),
+    "get_kvkk_document_markdown": DocumentSource("kvkk", ("decision_url",), "page_number"),
+    "get_bddk_document_markdown": DocumentSource("bddk", ("document_id",), "page_number"),
+    "get_mevzuat_article_content": DocumentSource("mevzuat", ("mevzuat_id", "madde_id"), None),
+}
+
+def document_address(tool_name: str, parameters: Dict[str, Any]) -> Optional[Tuple[str, str, int]]:
+    """(source, id, page) for a document tool call, or None for other tools"""
+    spec = DOCUMENT_TOOLS.get(tool_name)
+    if spec is None:
+        return None
+    doc_id = "/".join(str(parameters.get(name, "")) for name in spec.id_params)
+    page = int(parameters.get(spec.page_param, 1)) if spec.page_param else 1
+    return spec.source, doc_id, page
+
+def document_tool_call(source: str, doc_id: str, page: int = 1) -> Tuple[str, Dict[str, Any]]:
+    """Tool name and parameters that fetch (source, id, page); inverse of document_address"""
+    for tool_name, spec in DOCUMENT_TOOLS.items():
+        if spec.source != source:
+            continue
+        values = doc_id.split("/", len(spec.id_params) - 1) if len(spec.id_params) > 1 else [doc_id]
+        if len(values) != len(spec.id_params):
+            raise ValueError(f"Document id for '{source}' must look like {'/'.join(spec.id_params)}")
+        parameters: Dict[str, Any] = dict(zip(spec.id_params, values))
+        if spec.page_param:
+            parameters[spec.page_param] = page
+        return tool_name, parameters
+    raise ValueError(f"Unknown document source: {source}")
+
+class DocumentStore:
+    """SQLite index of (source, id, page) -> content hash, with zlib-compressed blobs"""
+
+    def __init__(self, path: str, max_age_days: float, max_bytes: int, prune_interval: float):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.corrupt = 0
+        self.pruned_documents = 0
+        self.pruned_blobs = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            # WAL lets several uvicorn workers read while one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "hash TEXT PRIMARY KEY, data BLOB NOT NULL, raw_size INTEGER NOT NULL, stored_size INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "source TEXT NOT NULL, doc_id TEXT NOT NULL, page INTEGER NOT NULL, "
+                "hash TEXT NOT NULL, stored_at REAL NOT NULL, PRIMARY KEY (source, doc_id, page))"
+            )
+            # Age and size pruning walk documents oldest first; orphan cleanup looks blobs up by hash
+            connection.execute("CREATE INDEX IF NOT EXISTS documents_stored_at ON documents (stored_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS documents_hash ON documents (hash)")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def get(self, source: str, doc_id: str, page: int) -> Optional[Any]:
+        """Stored document, or None if absent or failing its hash check"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT b.hash, b.data FROM documents d JOIN blobs b ON b.hash = d.hash "
+                "WHERE d.source = ? AND d.doc_id = ? AND d.page = ?",
+                (source, doc_id, page),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            content_hash, data = row
+            raw = zlib.decompress(data)
+            if hashlib.sha256(raw).hexdigest() != content_hash:
+                logger.warning(f"Document store hash mismatch for {source}/{doc_id}/{page}, discarding")
+                self._connection.execute(
+                    "DELETE FROM documents WHERE source = ? AND doc_id = ? AND page = ?", (source, doc_id, page)
+                )
+                self._connection.commit()
+                self.corrupt += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(raw.decode("utf-8"))
+
+    def put(self, source: str, doc_id: str, page: int, document: Any) -> str:
+        """Store a document and return its content hash"""
+        raw = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        content_hash = hashlib.sha256(raw).hexdigest()
+        data = zlib.compress(raw, COMPRESSION_LEVEL)
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR IGNORE INTO blobs (hash, data, raw_size, stored_size) VALUES (?, ?, ?, ?)",
+                (content_hash, data, len(raw), len(data)),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (source, doc_id, page, hash, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (source, doc_id, page, content_hash, time.time()),
+            )
+            connection.commit()
+            self.writes += 1
+        return content_hash
+
+    # MAINTENANCE
+    def _delete_orphans(self, connection: sqlite3.Connection) -> int:
+        # Blobs left behind when their last document row was replaced or pruned
+        return connection.execute(
+            "DELETE FROM blobs WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.hash = blobs.hash)"
+        ).rowcount
+
+    def prune(self) -> Dict[str, int]:
+        """Drop expired documents, then the oldest ones beyond the size cap, then orphaned blobs"""
+        documents = blobs = 0
+        with self._lock:
+            connection = self._connect()
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                documents += connection.execute("DELETE FROM documents WHERE stored_at < ?", (cutoff,)).rowcount
+            blobs += self._delete_orphans(connection)
+            connection.commit()
+
+        while self.max_bytes > 0:
+            # One batch per lock hold so reads and writes on this worker keep going
+            with self._lock:
+                connection = self._connect()
+                stored_bytes = connection.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+                if stored_bytes <= self.max_bytes:
+                    break
+                deleted = connection.execute(
+                    "DELETE FROM documents WHERE rowid IN "
+                    "(SELECT rowid FROM documents ORDER BY stored_at LIMIT ?)",
+                    (PRUNE_BATCH,),
+                ).rowcount
+                blobs += self._delete_orphans(connection)
+                connection.commit()
+            if not deleted:
+                break
+            documents += deleted
+
+        self.pruned_documents += documents
+        self.pruned_blobs += blobs
+        if documents or blobs:
+            logger.info(f"Document store pruned {documents} documents and {blobs} blobs")
+        return {"documents": documents, "blobs": blobs}
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.prune)
+            except Exception as e:
+                logger.warning(f"Document store pruning failed: {e}")
+            await asyncio.sleep(self.prune_interval)
+
+    def start(self):
+        if DOCUMENT_STORE_ENABLED and self.prune_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Document counts, sizes and hit/miss counters"""
+        with self._lock:
+            connection = self._connect()
+            documents = connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            blobs, raw_bytes, stored_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "enabled": DOCUMENT_STORE_ENABLED,
+            "path": self.path,
+            "documents": documents,
+            "unique_blobs": blobs,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "corrupt": self.corrupt,
+            "max_bytes": self.max_bytes or None,
+            "max_age_days": self.max_age_days or None,
+            "pruned_documents": self.pruned_documents,
+            "pruned_blobs": self.pruned_blobs,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+document_store = DocumentStore(
+    DOCUMENT_STORE_PATH, DOCUMENT_STORE_MAX_AGE_DAYS, DOCUMENT_STORE_MAX_BYTES, DOCUMENT_STORE_PRUNE_INTERVAL
+)
+
+def _is_storable(document: Any) -> bool:
+    # Error payloads from the tools must not be persisted as the document
+    return bool(document) and not (isinstance(document, dict) and document.get("error"))
+
+async def stored_call(
+    tool_name: str,
+    parameters: Dict[str, Any],
+    call: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    address: Optional[Tuple[str, str, int]] = None,
+) -> Any:
+    """Serve document tools from the store first, persisting fresh fetches"""
+    if not DOCUMENT_STORE_ENABLED:
+        address = None
+    elif address is None:
+        address = document_address(tool_name, parameters)
+    if address is None:
+        return await call(tool_name, parameters)
+
+    with tracer.span("document_store.lookup") as span:
+        try:
+            document = await asyncio.to_thread(document_store.get, *address)
+        except Exception as e:
+            logger.warning(f"Document store read failed for {address}: {e}")
+            document = None
+        span.set(hit=document is not None)
+    if document is not None:
+        return document
+
+    document = await call(tool_name, parameters)
+    if _is_storable(document):
+        try:
+            await asyncio.to_thread(document_store.put, *address, document)
+        except Exception as e:
+            logger.warning(f"Document store write failed for {address}: {e}")
+    return document
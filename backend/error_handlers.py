@@ -4,10 +4,19 @@ Error handling middleware and exception handlers for Turkish Legal AI API
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import asyncio
+import functools
 import logging
+import time
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from metrics import metrics
+from slow_requests import slow_requests
+from tracing import tracer
 
 # Configure logging
 logging.basicConfig(
@@ -78,6 +87,8 @@ def create_error_response(
     
     if request_id:
         error_response["error"]["request_id"] = request_id
+
+    metrics.inc("api_errors_total", {"type": error_type, "status": status_code})
     
     # Add helpful information based on error type
     if status_code == 503:
@@ -200,8 +211,75 @@ class RequestLoggingMiddleware:
         method = scope.get("method", "")
         path = scope.get("path", "")
         logger.info(f"[{request_id}] {method} {path}")
-        
-        await self.app(scope, receive, send)
+
+        status_code = 500
+        response_bytes = 0
+
+        async def send_with_status(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        metrics.add("http_requests_in_flight", 1)
+        record = slow_requests.start(request_id, method, path)
+        # The request ID doubles as the trace ID, see /api/system/traces
+        with tracer.trace(f"{method} {path}", request_id, method=method, path=path) as root:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                metrics.add("http_requests_in_flight", -1)
+                elapsed = time.perf_counter() - started
+                route = route_template(scope)
+                root.set(route=route, status=status_code)
+                metrics.inc("http_requests_total", {"method": method, "route": route, "status": status_code})
+                metrics.observe("http_request_duration_seconds", elapsed, {"method": method, "route": route})
+                slow_requests.finish(record, route, status_code, elapsed, response_bytes, tracer.breakdown)
+
+def route_template(scope) -> str:
+    """Matched route path (e.g. /api/yargi/kik/document/{decision_id}), keeping metric labels bounded"""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    return "unmatched"
+
+# perf_counter() when the current request's endpoint returned
+_endpoint_finished: ContextVar[Optional[float]] = ContextVar("endpoint_finished", default=None)
+
+def _traced_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def traced(*args, **kwargs):
+        try:
+            with tracer.span("endpoint", function=endpoint.__name__):
+                return await endpoint(*args, **kwargs)
+        finally:
+            _endpoint_finished.set(time.perf_counter())
+    return traced
+
+class TracedRoute(APIRoute):
+    """API route that traces the endpoint and the response serialization after it as separate spans"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            _endpoint_finished.set(None)
+            response = await handler(request)
+            finished = _endpoint_finished.get()
+            if finished is not None:
+                tracer.record("response.serialize", time.perf_counter() - finished, bytes=len(getattr(response, "body", b"")))
+            return response
+        return traced_handler
 
 def setup_error_handlers(app):
     """Setup all error handlers for the FastAPI app"""
@@ -0,0 +1,197 @@
+"""
+Federated Search
+Concurrent fan-out of one query to every court search tool, with normalized and merged results
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from health_prober import health_prober
+from tool_cache import turkish_casefold
+from tool_executor import execute_tool
+from tool_registry import tool_category
+
+SOURCE_TIMEOUT = float(os.getenv("FEDERATED_SOURCE_TIMEOUT", 8))
+
+# Reciprocal-rank constant; dampens the advantage of the very first hits of each source
+RANK_CONSTANT = 10
+
+# Keys the search tools use for the list of decisions
+_LIST_KEYS = ("decisions", "results", "data", "items", "documents", "kararlar")
+
+# Normalized field -> candidate keys in the tool results, in order of preference
+_FIELD_KEYS = {
+    "id": ("documentId", "document_id", "decision_id", "karar_id", "id", "kararId", "mevzuat_id"),
+    "title": ("title", "baslik", "kararAdi", "karar_adi", "mevzuat_adi", "konu", "subject"),
+    "court": ("birimAdi", "court", "daire", "chamber", "mahkeme", "itemType"),
+    "decision_date": ("kararTarihi", "karar_tarihi", "decision_date", "kararTarihiStr", "date", "tarih"),
+    "decision_number": ("kararNo", "karar_no", "decision_number", "karar_sayisi", "kararSayisi"),
+    "case_number": ("esasNo", "esas_no", "case_number", "esas_sayisi", "basvuru_no"),
+    "url": ("document_url", "decision_url", "url", "link"),
+    "snippet": ("summary", "ozet", "snippet", "description", "icerik"),
+}
+
+_DATE_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y")
+
+def _parse_date(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    text = value.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:19] if "T" in fmt else text[:10], fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+def _extract_items(raw: Any) -> List[Dict[str, Any]]:
+    if isinstance(raw, list):
+        return [item for item in raw if isinstance(item, dict)]
+    if not isinstance(raw, dict):
+        return []
+    for key in _LIST_KEYS:
+        if isinstance(raw.get(key), list):
+            return _extract_items(raw[key])
+    # Fall back to the first list of objects in the payload
+    for value in raw.values():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            return _extract_items(value)
+    return []
+
+def normalize_results(source: str, raw: Any) -> List[Dict[str, Any]]:
+    """Map a search tool result onto the common decision schema"""
+    normalized = []
+    for rank, item in enumerate(_extract_items(raw), start=1):
+        entry: Dict[str, Any] = {"source": source, "source_rank": rank}
+        for field, keys in _FIELD_KEYS.items():
+            entry[field] = next((item[key] for key in keys if item.get(key) not in (None, "")), None)
+        if entry["id"] is not None:
+            entry["id"] = str(entry["id"])
+        entry["decision_date"] = _parse_date(entry["decision_date"]) or entry["decision_date"]
+        entry["raw"] = item
+        normalized.append(entry)
+    return normalized
+
+def source_timeout(tool_name: str) -> float:
+    """Per-source timeout, stretched for servers the health prober sees as slow"""
+    return health_prober.adaptive_timeout(tool_category(tool_name), SOURCE_TIMEOUT)
+
+async def search_source(source: str, tool_name: str, parameters: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+    """Run one source's search tool with a timeout (adaptive if None); never raises"""
+    started = time.perf_counter()
+    timeout = timeout or source_timeout(tool_name)
+    outcome: Dict[str, Any] = {"source": source, "tool": tool_name}
+    try:
+        raw = await asyncio.wait_for(execute_tool(tool_name, parameters), timeout)
+        outcome["status"] = "ok"
+        outcome["results"] = normalize_results(source, raw)
+    except asyncio.TimeoutError:
+        outcome["status"] = "timeout"
+        outcome["results"] = []
+    except Exception as e:
+        outcome["status"] = "error"
+        outcome["error"] = str(e)
+        outcome["results"] = []
+    outcome["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return outcome
+
+def _relevance(query_terms: List[str], entry: Dict[str, Any]) -> float:
+    score = 1.0 / (RANK_CONSTANT + entry["source_rank"])
+    if query_terms:
+        text = turkish_casefold(" ".join(str(entry.get(field) or "") for field in ("title", "snippet")))
+        matched = sum(1 for term in query_terms if term in text)
+        score += matched / len(query_terms) * (1.0 / RANK_CONSTANT)
+    return round(score, 6)
+
+def merge_results(query: str, outcomes: List[Dict[str, Any]], sort: str = "relevance") -> List[Dict[str, Any]]:
+    """Combine per-source results into one ranking (relevance, then date; or date first)"""
+    query_terms = turkish_casefold(query).split()
+    merged = []
+    for outcome in outcomes:
+        for entry in outcome["results"]:
+            merged.append({**entry, "score": _relevance(query_terms, entry)})
+
+    def date_key(entry: Dict[str, Any]) -> str:
+        return entry["decision_date"] if _parse_date(entry.get("decision_date") or "") else ""
+
+    if sort == "date":
+        merged.sort(key=lambda entry: (date_key(entry), entry["score"]), reverse=True)
+    else:
+        merged.sort(key=lambda entry: (entry["score"], date_key(entry)), reverse=True)
+    return merged
+
+def source_summary(outcome: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-source status block for responses"""
+    summary = {
+        "status": outcome["status"],
+        "tool": outcome["tool"],
+        "count": len(outcome["results"]),
+        "elapsed_ms": outcome["elapsed_ms"],
+    }
+    if outcome.get("error"):
+        summary["error"] = outcome["error"]
+    return summary
+
+def merged_response(
+    query: str, outcomes: List[Dict[str, Any]], sort: str, limit: Optional[int], started: float
+) -> Dict[str, Any]:
+    """Merged ranking plus per-source status for a finished fan-out"""
+    merged = merge_results(query, outcomes, sort)
+    return {
+        "query": query,
+        "sort": sort,
+        "partial": any(outcome["status"] != "ok" for outcome in outcomes),
+        "sources": {outcome["source"]: source_summary(outcome) for outcome in outcomes},
+        "total_results": len(merged),
+        "results": merged[:limit] if limit else merged,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+async def federated_search(
+    query: str,
+    calls: Dict[str, Tuple[str, Dict[str, Any]]],
+    timeout: Optional[float] = None,
+    sort: str = "relevance",
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fan out to every source concurrently and merge whatever returns in time"""
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*[
+        search_source(source, tool_name, parameters, timeout)
+        for source, (tool_name, parameters) in calls.items()
+    ])
+    return merged_response(query, outcomes, sort, limit, started)
+
+async def stream_federated_search(
+    query: str,
+    calls: Dict[str, Tuple[str, Dict[str, Any]]],
+    timeout: Optional[float] = None,
+    sort: str = "relevance",
+    limit: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("source", ...) as each source finishes, then one ("merged", ...) event"""
+    started = time.perf_counter()
+    tasks = [
+        asyncio.ensure_future(search_source(source, tool_name, parameters, timeout))
+        for source, (tool_name, parameters) in calls.items()
+    ]
+    outcomes = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            outcome = await next_done
+            outcomes.append(outcome)
+            yield "source", {
+                "source": outcome["source"],
+                **source_summary(outcome),
+                "results": outcome["results"],
+                "completed_sources": len(outcomes),
+                "total_sources": len(tasks),
+            }
+    finally:
+        # Client went away: stop waiting on the remaining sources
+        for task in tasks:
+            task.cancel()
+
+    yield "merged", merged_response(query, outcomes, sort, limit, started)
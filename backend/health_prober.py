@@ -0,0 +1,154 @@
+"""
+Government Server Health Prober
+Probes every upstream server on a schedule and keeps latency and availability history in memory
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, NamedTuple, Optional
+
+import httpx
+
+from circuit_breaker import circuit_breakers
+from tool_registry import MOCK_UPSTREAM_URL
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_ENABLED = os.getenv("HEALTH_PROBE_ENABLED", "true").lower() == "true"
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 60))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 10))
+HEALTH_PROBE_HISTORY = int(os.getenv("HEALTH_PROBE_HISTORY", 60))
+TIMEOUT_MULTIPLIER = float(os.getenv("HEALTH_TIMEOUT_MULTIPLIER", 8))
+TIMEOUT_MAX = float(os.getenv("HEALTH_TIMEOUT_MAX", 30))
+
+# Upstream category (as in /api/yargi/tools) -> government server probed for it
+PROBE_TARGETS: Dict[str, str] = {
+    "bedesten_unified": "https://bedesten.adalet.gov.tr",
+    "emsal": "https://emsal.uyap.gov.tr",
+    "anayasa": "https://kararlarbilgibankasi.anayasa.gov.tr",
+    "uyusmazlik": "https://kararlar.uyusmazlik.gov.tr",
+    "kik": "https://ekap.kik.gov.tr",
+    "rekabet": "https://www.rekabet.gov.tr",
+    "sayistay": "https://www.sayistay.gov.tr",
+    "kvkk": "https://www.kvkk.gov.tr",
+    "bddk": "https://www.bddk.org.tr",
+    "mevzuat": "https://www.mevzuat.gov.tr",
+}
+if MOCK_UPSTREAM_URL:
+    PROBE_TARGETS = {name: f"{MOCK_UPSTREAM_URL}/probe/{name}" for name in PROBE_TARGETS}
+
+class ProbeResult(NamedTuple):
+    checked_at: float
+    ok: bool
+    latency: float
+    error: Optional[str]
+
+class HealthProber:
+    """Background task probing each server; snapshots are served without touching the network"""
+
+    def __init__(self, targets: Dict[str, str], interval: float, timeout: float, history: int):
+        self.targets = targets
+        self.interval = interval
+        self.timeout = timeout
+        self.history: Dict[str, Deque[ProbeResult]] = {name: deque(maxlen=history) for name in targets}
+        self.rounds = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, client: httpx.AsyncClient, name: str, url: str) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            ok = response.status_code < 500
+            error = None if ok else f"HTTP {response.status_code}"
+        except Exception as e:
+            ok, error = False, f"{e.__class__.__name__}: {e}".rstrip(": ")
+        return ProbeResult(time.time(), ok, time.perf_counter() - started, error)
+
+    async def probe_all(self):
+        """Probe every server once, concurrently"""
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+            results = await asyncio.gather(*[
+                self._probe(client, name, url) for name, url in self.targets.items()
+            ])
+        for name, result in zip(self.targets, results):
+            self.history[name].append(result)
+            circuit_breakers.get(name).observe_probe(result.ok, result.error)
+        self.rounds += 1
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.warning(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if HEALTH_PROBE_ENABLED and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def latency_p95(self, name: str) -> Optional[float]:
+        """p95 of successful probe latencies in seconds, if any"""
+        latencies = sorted(result.latency for result in self.history.get(name, ()) if result.ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def adaptive_timeout(self, name: str, default: float) -> float:
+        """Timeout stretched for servers that are slow today, never below default"""
+        p95 = self.latency_p95(name)
+        if p95 is None:
+            return default
+        return max(default, min(TIMEOUT_MAX, p95 * TIMEOUT_MULTIPLIER))
+
+    def _server_status(self, name: str) -> Dict[str, Any]:
+        history = self.history[name]
+        last = history[-1]
+        p95 = self.latency_p95(name)
+        return {
+            "status": "healthy" if last.ok else "unhealthy",
+            "url": self.targets[name],
+            "latency_ms": round(last.latency * 1000, 1),
+            "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "availability": round(sum(1 for result in history if result.ok) / len(history), 4),
+            "samples": len(history),
+            "last_checked": datetime.fromtimestamp(last.checked_at).isoformat(),
+            "error": last.error,
+            "circuit": circuit_breakers.get(name).state,
+        }
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Latest probe results in the /api/yargi/health shape, or None before the first round"""
+        if self.rounds == 0:
+            return None
+        servers = {name: self._server_status(name) for name in self.targets if self.history[name]}
+        healthy = sum(1 for server in servers.values() if server["status"] == "healthy")
+        if healthy == len(servers):
+            overall = "healthy"
+        elif healthy:
+            overall = "degraded"
+        else:
+            overall = "unhealthy"
+        return {
+            "overall_status": overall,
+            "healthy_servers": healthy,
+            "total_servers": len(servers),
+            "servers": servers,
+            "check_timestamp": datetime.fromtimestamp(
+                max(history[-1].checked_at for history in self.history.values() if history)
+            ).isoformat(),
+        }
+
+health_prober = HealthProber(PROBE_TARGETS, HEALTH_PROBE_INTERVAL, HEALTH_PROBE_TIMEOUT, HEALTH_PROBE_HISTORY)
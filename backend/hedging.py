@@ -0,0 +1,180 @@
+"""
+Hedged Requests
+Per-source latency histograms and a budgeted second attempt for calls that outlive the source's p95
+"""
+import asyncio
+import bisect
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from rate_limiter import rate_limiter
+from tool_registry import tool_category
+
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", 0.95))
+# Extra upstream load allowed for hedges, as a share of calls
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", 0.05))
+HEDGE_MAX_TOKENS = float(os.getenv("HEDGE_MAX_TOKENS", 10))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.05))
+LATENCY_WINDOW = float(os.getenv("LATENCY_HISTOGRAM_WINDOW", 300))
+
+# Geometric bucket upper bounds from 10ms to ~2 minutes, 25% apart
+BUCKET_BOUNDS: List[float] = [0.01 * 1.25 ** i for i in range(43)]
+
+class LatencyHistogram:
+    """Bucketed latencies over a sliding window made of the current and the previous period"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._current = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._previous = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._period_start = time.monotonic()
+        self.total = 0
+
+    def _rotate(self):
+        now = time.monotonic()
+        if now - self._period_start >= self.window:
+            stale = now - self._period_start >= 2 * self.window
+            self._previous = [0] * len(self._current) if stale else self._current
+            self._current = [0] * len(self._previous)
+            self._period_start = now
+
+    def observe(self, seconds: float):
+        self._rotate()
+        self._current[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.total += 1
+
+    def count(self) -> int:
+        self._rotate()
+        return sum(self._current) + sum(self._previous)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th latency, or None without samples"""
+        self._rotate()
+        counts = [a + b for a, b in zip(self._current, self._previous)]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1]
+        return BUCKET_BOUNDS[-1]
+
+def is_idempotent(tool_name: str) -> bool:
+    """Search and document tools only read, so a duplicate attempt is harmless"""
+    return tool_name.startswith(("search_", "get_"))
+
+class Hedger:
+    """Starts a second attempt when the first is slower than the source's p95, within a token budget"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.tokens = HEDGE_MAX_TOKENS
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def histogram(self, category: str) -> LatencyHistogram:
+        if category not in self.histograms:
+            self.histograms[category] = LatencyHistogram(LATENCY_WINDOW)
+        return self.histograms[category]
+
+    def hedge_delay(self, category: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history"""
+        histogram = self.histogram(category)
+        if histogram.count() < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, histogram.quantile(HEDGE_QUANTILE))
+
+    async def _timed(self, histogram: LatencyHistogram, call: Awaitable[Any], count_cancelled: bool = True) -> Any:
+        """Observe the attempt whatever its outcome; a cancelled one counts up to its cancellation"""
+        started = time.monotonic()
+        cancelled = False
+        try:
+            return await call
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Leaving out slow primaries cancelled by a winning hedge would drag the quantile, and so the
+            # hedge delay, ever lower
+            if count_cancelled or not cancelled:
+                histogram.observe(time.monotonic() - started)
+
+    async def call(
+        self,
+        tool_name: str,
+        parameters: Dict[str, Any],
+        call: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    ) -> Any:
+        """Run a call, hedging it once if it outlives the source's latency quantile"""
+        category = tool_category(tool_name)
+        histogram = self.histogram(category)
+        self.calls += 1
+        self.tokens = min(HEDGE_MAX_TOKENS, self.tokens + HEDGE_BUDGET)
+        delay = self.hedge_delay(category) if HEDGE_ENABLED and is_idempotent(tool_name) else None
+        if delay is None:
+            return await self._timed(histogram, call(tool_name, parameters))
+
+        loop = asyncio.get_running_loop()
+        primary = loop.create_task(self._timed(histogram, call(tool_name, parameters)))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if self.tokens < 1 or not await rate_limiter.try_acquire_async(category):
+                # Hedges never queue for the upstream rate limit
+                self.budget_exhausted += 1
+                return await primary
+
+            self.tokens -= 1
+            self.hedges += 1
+            # A hedge that loses was started late, so its time up to cancellation says nothing about the source
+            hedge = loop.create_task(self._timed(histogram, call(tool_name, parameters), count_cancelled=False))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both attempts failed: report the original one
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counters and per-source latency quantiles"""
+        return {
+            "enabled": HEDGE_ENABLED,
+            "budget": HEDGE_BUDGET,
+            "tokens": round(self.tokens, 2),
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "latency": {
+                category: {
+                    "samples": histogram.count(),
+                    "p50_ms": _ms(histogram.quantile(0.5)),
+                    "p95_ms": _ms(histogram.quantile(0.95)),
+                    "p99_ms": _ms(histogram.quantile(0.99)),
+                    "hedge_after_ms": _ms(self.hedge_delay(category)),
+                }
+                for category, histogram in sorted(self.histograms.items())
+            },
+        }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+hedger = Hedger()
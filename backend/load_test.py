@@ -0,0 +1,439 @@
+"""
+Load Test
+Drives every REST route at fixed concurrency levels and saves latency, throughput and worker resource numbers as JSON
+
+Start the mock upstream and the API first (see "Offline Benchmarking" in README_COMPLETE.md), then:
+    python load_test.py --concurrency 1,8,32 --requests 200
+    python load_test.py --compare results/before.json results/after.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import re
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+
+API_URL = os.getenv("LOAD_TEST_API_URL", "http://localhost:8001")
+# turklawai_api_server.py; its routes are skipped unless a URL is given
+AUTH_URL = os.getenv("LOAD_TEST_AUTH_URL", "")
+RESULTS_DIR = os.getenv("LOAD_TEST_RESULTS_DIR", "load_test_results")
+# Processes whose RSS/CPU are sampled: API workers and their tool workers
+PROCESS_PATTERN = os.getenv("LOAD_TEST_PROCESS_PATTERN", r"uvicorn|main\.py|tool_worker\.py|turklawai_api_server\.py")
+SAMPLE_INTERVAL = 0.5
+
+class Scenario(NamedTuple):
+    name: str
+    target: str  # "api" or "auth"
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Dict[str, Any]] = None
+    auth: bool = False
+
+# One scenario per route. "{n}" varies per request in --cold mode; "{uid}" always varies.
+SCENARIOS: List[Scenario] = [
+    # System
+    Scenario("health", "api", "GET", "/health"),
+    Scenario("info", "api", "GET", "/api/info"),
+    Scenario("test", "api", "GET", "/api/test"),
+    Scenario("overview", "api", "GET", "/api/overview"),
+    # Yargi
+    Scenario("yargi_health", "api", "GET", "/api/yargi/health"),
+    Scenario("bedesten_search", "api", "POST", "/api/yargi/bedesten/search", body={"phrase": "tazminat {n}"}),
+    Scenario("bedesten_document", "api", "GET", "/api/yargi/bedesten/document/doc{n}"),
+    Scenario("emsal_search", "api", "POST", "/api/yargi/emsal/search", body={"keyword": "kira {n}"}),
+    Scenario("emsal_document", "api", "GET", "/api/yargi/emsal/document/emsal{n}"),
+    Scenario("anayasa_search", "api", "POST", "/api/yargi/anayasa/search",
+             body={"decision_type": "bireysel_basvuru", "keywords": ["ifade özgürlüğü {n}"]}),
+    Scenario("anayasa_document", "api", "GET", "/api/yargi/anayasa/document",
+             params={"document_url": "https://kararlarbilgibankasi.anayasa.gov.tr/BB/2019/{n}"}),
+    Scenario("uyusmazlik_search", "api", "POST", "/api/yargi/uyusmazlik/search", body={"icerik": "görev {n}"}),
+    Scenario("uyusmazlik_document", "api", "GET", "/api/yargi/uyusmazlik/document",
+             params={"document_url": "https://kararlar.uyusmazlik.gov.tr/Karar/Getir/{n}"}),
+    Scenario("kik_search", "api", "POST", "/api/yargi/kik/search", body={"karar_metni": "ihale {n}"}),
+    Scenario("kik_document", "api", "GET", "/api/yargi/kik/document/kik{n}"),
+    Scenario("rekabet_search", "api", "POST", "/api/yargi/rekabet/search", body={"PdfText": "birleşme {n}"}),
+    Scenario("rekabet_document", "api", "GET", "/api/yargi/rekabet/document/rekabet{n}"),
+    Scenario("sayistay_search", "api", "POST", "/api/yargi/sayistay/search",
+             body={"decision_type": "daire", "web_karar_metni": "kamu zararı {n}"}),
+    Scenario("sayistay_document", "api", "GET", "/api/yargi/sayistay/document/sayistay{n}", params={"decision_type": "daire"}),
+    Scenario("kvkk_search", "api", "POST", "/api/yargi/kvkk/search", body={"keywords": "veri ihlali {n}"}),
+    Scenario("kvkk_document", "api", "GET", "/api/yargi/kvkk/document", params={"decision_url": "https://www.kvkk.gov.tr/Icerik/{n}"}),
+    Scenario("bddk_search", "api", "POST", "/api/yargi/bddk/search", body={"keywords": "faiz {n}"}),
+    Scenario("bddk_document", "api", "GET", "/api/yargi/bddk/document/bddk{n}"),
+    Scenario("federated_search", "api", "POST", "/api/yargi/federated/search", body={"query": "tazminat {n}"}),
+    Scenario("federated_stream", "api", "POST", "/api/yargi/federated/search/stream",
+             params={"format": "ndjson"}, body={"query": "tazminat {n}"}),
+    Scenario("documents_batch", "api", "POST", "/api/yargi/documents/batch", body={"documents": [
+        {"source": "bedesten", "id": "batch{n}a"}, {"source": "emsal", "id": "batch{n}b"},
+        {"source": "kik", "id": "batch{n}c"}, {"source": "bddk", "id": "batch{n}d"},
+    ]}),
+    Scenario("yargi_tools", "api", "GET", "/api/yargi/tools"),
+    Scenario("yargi_stats", "api", "GET", "/api/yargi/stats"),
+    # Mevzuat
+    Scenario("mevzuat_search", "api", "POST", "/api/mevzuat/search", body={"mevzuat_adi": "borçlar {n}"}),
+    Scenario("mevzuat_by_name", "api", "GET", "/api/mevzuat/search/by-name", params={"name": "ceza {n}"}),
+    Scenario("mevzuat_by_number", "api", "GET", "/api/mevzuat/search/by-number", params={"number": "5237{n}"}),
+    Scenario("mevzuat_full_text", "api", "GET", "/api/mevzuat/search/full-text", params={"query": "zamanaşımı {n}"}),
+    Scenario("mevzuat_structure", "api", "GET", "/api/mevzuat/legislation/m{n}/structure"),
+    Scenario("mevzuat_article", "api", "GET", "/api/mevzuat/legislation/m{n}/article/a{n}"),
+    Scenario("mevzuat_types", "api", "GET", "/api/mevzuat/types"),
+    Scenario("mevzuat_popular", "api", "GET", "/api/mevzuat/popular"),
+    Scenario("mevzuat_tools", "api", "GET", "/api/mevzuat/tools"),
+    Scenario("mevzuat_stats", "api", "GET", "/api/mevzuat/stats"),
+    # TurkLawAI auth server
+    Scenario("auth_root", "auth", "GET", "/"),
+    Scenario("auth_health", "auth", "GET", "/health"),
+    Scenario("auth_register", "auth", "POST", "/auth/register",
+             body={"email": "loadtest+{uid}@example.com", "password": "LoadTest-{uid}", "full_name": "Load Test"}),
+    Scenario("auth_login", "auth", "POST", "/auth/login", body={"email": "loadtest@example.com", "password": "LoadTest-0"}),
+    Scenario("auth_user", "auth", "GET", "/auth/user", auth=True),
+    Scenario("auth_logout", "auth", "POST", "/auth/logout"),
+    Scenario("auth_google_login", "auth", "GET", "/auth/google/login"),
+    Scenario("auth_callback", "auth", "GET", "/auth/callback", params={"code": "loadtest", "state": "{n}"}),
+]
+
+def _render(value: Any, values: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {key: _render(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_render(item, values) for item in value]
+    if isinstance(value, str):
+        for key, replacement in values.items():
+            value = value.replace(f"{{{key}}}", replacement)
+    return value
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+def summarize(latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency quantiles (ms) and error rate of one run"""
+    ordered = sorted(latencies)
+    total = len(ordered)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "elapsed_seconds": round(elapsed, 3),
+        "latency_ms": {
+            "mean": _ms(sum(ordered) / total) if total else None,
+            "p50": _ms(percentile(ordered, 0.50)),
+            "p95": _ms(percentile(ordered, 0.95)),
+            "p99": _ms(percentile(ordered, 0.99)),
+            "max": _ms(ordered[-1]) if ordered else None,
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+# PROCESS SAMPLING (Linux /proc)
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def find_processes(pattern: str) -> Dict[int, str]:
+    """PIDs whose command line matches the pattern, excluding this process"""
+    regex = re.compile(pattern)
+    found = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+        except OSError:
+            continue
+        if cmdline and regex.search(cmdline) and "load_test.py" not in cmdline:
+            found[int(entry)] = cmdline[:120]
+    return found
+
+def _read_usage(pid: int) -> Optional[tuple]:
+    """(cpu seconds, rss bytes) of a process, or None once it has exited"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # Fields after the command name start at state (field 3): utime is 14, stime 15, rss 24
+    cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+    return cpu, int(fields[21]) * _PAGE_SIZE
+
+class ProcessSampler:
+    """Samples RSS and CPU time of the matched processes while a run is in progress"""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.processes: Dict[int, str] = {}
+        self.first: Dict[int, tuple] = {}
+        self.last: Dict[int, tuple] = {}
+        self.rss: Dict[int, List[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started = 0.0
+
+    def _sample(self):
+        # Pool workers can be restarted mid-run, so look for new processes on every sample
+        for pid, cmdline in find_processes(self.pattern).items():
+            self.processes.setdefault(pid, cmdline)
+        now = time.monotonic()
+        for pid in self.processes:
+            usage = _read_usage(pid)
+            if usage is None:
+                continue
+            self.first.setdefault(pid, (now, usage[0]))
+            self.last[pid] = (now, usage[0])
+            self.rss.setdefault(pid, []).append(usage[1])
+
+    async def _run(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    def start(self):
+        self._started = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> Dict[str, Any]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+        workers = {}
+        for pid, cmdline in sorted(self.processes.items()):
+            if pid not in self.rss:
+                continue
+            (t0, cpu0), (t1, cpu1) = self.first[pid], self.last[pid]
+            samples = self.rss[pid]
+            workers[str(pid)] = {
+                "cmdline": cmdline,
+                "rss_mb_peak": round(max(samples) / 2 ** 20, 1),
+                "rss_mb_mean": round(sum(samples) / len(samples) / 2 ** 20, 1),
+                "cpu_seconds": round(cpu1 - cpu0, 3),
+                "cpu_percent": round(100 * (cpu1 - cpu0) / (t1 - t0), 1) if t1 > t0 else None,
+            }
+        return workers
+
+# LOAD GENERATION
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    base_url: str,
+    concurrency: int,
+    requests: int,
+    duration: Optional[float],
+    cold: bool,
+    token: Optional[str],
+) -> Dict[str, Any]:
+    """Closed-loop run of one route: `concurrency` clients issue requests back to back"""
+    counter = itertools.count()
+    uids = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    headers = {"Authorization": f"Bearer {token}"} if scenario.auth and token else {}
+    run_id = f"{os.getpid()}-{int(time.time() * 1000)}"
+
+    async def worker():
+        nonlocal errors
+        while True:
+            n = next(counter)
+            if (deadline and time.perf_counter() >= deadline) or (not deadline and n >= requests):
+                return
+            # Cold ids also differ between runs, so one level cannot warm the caches for the next
+            values = {"n": f"{run_id}-{n}" if cold else "0", "uid": f"{run_id}-{next(uids)}"}
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(
+                    scenario.method,
+                    base_url + _render(scenario.path, values),
+                    params=_render(scenario.params, values),
+                    json=_render(scenario.body, values),
+                    headers=headers,
+                )
+                status = str(response.status_code)
+                failed = response.status_code >= 400
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                failed = True
+            latencies.append(time.perf_counter() - request_started)
+            statuses[status] = statuses.get(status, 0) + 1
+            errors += failed
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+async def login_token(client: httpx.AsyncClient, auth_url: str) -> Optional[str]:
+    """Register (if needed) and log in the load-test account used by authenticated routes"""
+    account = {"email": "loadtest@example.com", "password": "LoadTest-0"}
+    try:
+        await client.post(f"{auth_url}/auth/register", json={**account, "full_name": "Load Test"})
+        response = await client.post(f"{auth_url}/auth/login", json=account)
+        return response.json().get("token") if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+def _route_shape(path: str) -> str:
+    # Any segment holding a placeholder matches any path parameter
+    return "/".join("{}" if "{" in segment else segment for segment in path.split("/"))
+
+async def uncovered_routes(client: httpx.AsyncClient, base_url: str, target: str) -> List[str]:
+    """Routes in the target's OpenAPI schema that no scenario exercises"""
+    try:
+        schema = (await client.get(f"{base_url}/openapi.json")).json()
+    except (httpx.HTTPError, ValueError):
+        return []
+    covered = {(s.method, _route_shape(s.path)) for s in SCENARIOS if s.target == target}
+    missing = []
+    for path, methods in schema.get("paths", {}).items():
+        for method in methods:
+            if (method.upper(), _route_shape(path)) not in covered:
+                missing.append(f"{method.upper()} {path}")
+    return sorted(missing)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    targets = {"api": args.api_url.rstrip("/")}
+    if args.auth_url:
+        targets["auth"] = args.auth_url.rstrip("/")
+    route_filter = re.compile(args.routes) if args.routes else None
+    scenarios = [
+        s for s in SCENARIOS
+        if s.target in targets and (route_filter is None or route_filter.search(s.name))
+    ]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+
+    report: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "targets": targets,
+            "concurrency": levels,
+            "requests_per_route": None if args.duration else args.requests,
+            "duration_per_route": args.duration,
+            "cold": args.cold,
+            "warmup": args.warmup,
+            "process_pattern": args.process_pattern,
+        },
+        "runs": [],
+    }
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        token = await login_token(client, targets["auth"]) if "auth" in targets else None
+        report["uncovered_routes"] = {
+            target: await uncovered_routes(client, url, target) for target, url in targets.items()
+        }
+        for level in levels:
+            routes = {}
+            sampler = ProcessSampler(args.process_pattern)
+            sampler.start()
+            level_started = time.perf_counter()
+            for scenario in scenarios:
+                if args.warmup:
+                    await run_scenario(client, scenario, targets[scenario.target], 1, args.warmup, None, False, token)
+                routes[scenario.name] = run_result = await run_scenario(
+                    client, scenario, targets[scenario.target], level,
+                    args.requests, args.duration, args.cold, token,
+                )
+                print(
+                    f"c={level:<4} {scenario.name:<22} {run_result['throughput_rps']:>8.1f} rps  "
+                    f"p50 {run_result['latency_ms']['p50']}ms  p95 {run_result['latency_ms']['p95']}ms  "
+                    f"p99 {run_result['latency_ms']['p99']}ms  errors {run_result['error_rate']:.1%}"
+                )
+            elapsed = time.perf_counter() - level_started
+            total_requests = sum(r["requests"] for r in routes.values())
+            total_errors = sum(r["errors"] for r in routes.values())
+            report["runs"].append({
+                "concurrency": level,
+                "routes": routes,
+                "totals": {
+                    "requests": total_requests,
+                    "errors": total_errors,
+                    "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+                    "elapsed_seconds": round(elapsed, 3),
+                },
+                "workers": await sampler.stop(),
+            })
+    report["finished_at"] = datetime.now().isoformat()
+    return report
+
+# COMPARISON
+def compare(before_path: str, after_path: str):
+    """Print per-route throughput and p95/p99 changes between two result files"""
+    with open(before_path, encoding="utf-8") as f:
+        before = {run["concurrency"]: run for run in json.load(f)["runs"]}
+    with open(after_path, encoding="utf-8") as f:
+        after = {run["concurrency"]: run for run in json.load(f)["runs"]}
+
+    def change(old, new):
+        if old in (None, 0) or new is None:
+            return "    n/a"
+        return f"{(new - old) / old:+7.1%}"
+
+    for level in sorted(before.keys() & after.keys()):
+        print(f"concurrency {level}: {'route':<22} {'rps':>8} {'p95':>8} {'p99':>8} {'errors':>8}")
+        for name in sorted(before[level]["routes"].keys() & after[level]["routes"].keys()):
+            old, new = before[level]["routes"][name], after[level]["routes"][name]
+            print(
+                f"{'':15}{name:<22} {change(old['throughput_rps'], new['throughput_rps']):>8} "
+                f"{change(old['latency_ms']['p95'], new['latency_ms']['p95']):>8} "
+                f"{change(old['latency_ms']['p99'], new['latency_ms']['p99']):>8} "
+                f"{new['error_rate'] - old['error_rate']:>+8.1%}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test every REST route against the mock upstream")
+    parser.add_argument("--api-url", default=API_URL, help="Base URL of main.py")
+    parser.add_argument("--auth-url", default=AUTH_URL, help="Base URL of turklawai_api_server.py (skipped if empty)")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per route and level")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per route and level (overrides --requests)")
+    parser.add_argument("--warmup", type=int, default=0, help="Sequential requests per route before measuring")
+    parser.add_argument("--cold", action="store_true", help="Vary ids and queries per request so caches miss")
+    parser.add_argument("--routes", default="", help="Regex over scenario names to run")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--process-pattern", default=PROCESS_PATTERN, help="Regex over command lines of sampled processes")
+    parser.add_argument("--output", default="", help="Result file (default: load_test_results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = asyncio.run(run(args))
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for target, missing in report["uncovered_routes"].items():
+        if missing:
+            print(f"Routes of '{target}' without a scenario: {', '.join(missing)}")
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
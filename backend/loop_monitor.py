@@ -0,0 +1,145 @@
+"""
+Event Loop Lag Monitor
+Measures how late the asyncio event loop wakes up from a fixed-interval sleep, and captures the stack when it is blocked
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.25))
+LOOP_LAG_WINDOW = int(os.getenv("LOOP_LAG_WINDOW", 240))
+# Seconds the loop may go without running before its stack is captured (0 disables the watchdog)
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 0.5))
+LOOP_BLOCK_HISTORY = int(os.getenv("LOOP_BLOCK_HISTORY", 50))
+
+class LoopLagMonitor:
+    """Samples event loop lag in a background task; a watchdog thread catches the loop while it is blocked"""
+
+    def __init__(self, interval: float, window: int, block_threshold: float, block_history: int):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.blocks: Deque[Dict[str, Any]] = deque(maxlen=block_history)
+        self.blocked_total = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        # monotonic() of the loop's last tick, written by the loop and read by the watchdog
+        self._heartbeat = 0.0
+        self._pending_block: Optional[Dict[str, Any]] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self._heartbeat = time.monotonic()
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("event_loop_lag_seconds", lag)
+            block = self._pending_block
+            if block is not None:
+                # The late wake-up measures the whole stall the watchdog caught
+                block["blocked_ms"] = round(lag * 1000, 2)
+                self._pending_block = None
+
+    def _watch(self):
+        captured_for = None
+        poll = max(0.01, self.block_threshold / 4)
+        while not self._stopping.wait(poll):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat < self.interval + self.block_threshold:
+                continue
+            if captured_for == heartbeat:
+                continue
+            captured_for = heartbeat
+            self._capture(time.monotonic() - heartbeat - self.interval)
+
+    def _capture(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = traceback.format_stack(frame)
+        task = None
+        try:
+            current = asyncio.current_task(self._loop)
+            if current is not None:
+                task = f"{current.get_name()} {current.get_coro()!r}"
+        except RuntimeError:
+            pass
+        block = {
+            "timestamp": datetime.now().isoformat(),
+            "blocked_ms": round(blocked_for * 1000, 2),
+            "task": task,
+            "stack": [line.rstrip() for line in stack],
+        }
+        self.blocks.append(block)
+        self._pending_block = block
+        self.blocked_total += 1
+        logger.warning(
+            f"Event loop blocked for more than {blocked_for * 1000:.0f}ms in {task or 'a callback'}:\n"
+            + "".join(stack[-8:])
+        )
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._heartbeat = time.monotonic()
+            self._task = self._loop.create_task(self._run())
+        if self.block_threshold > 0 and (self._watchdog is None or not self._watchdog.is_alive()):
+            self._stopping.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def recent_blocks(self, limit: int) -> List[Dict[str, Any]]:
+        """Captured stalls, newest first"""
+        return list(reversed(self.blocks))[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag over the sampling window in milliseconds"""
+        ordered = sorted(self.samples)
+        blocking = {"block_threshold_ms": self.block_threshold * 1000, "blocks": self.blocked_total}
+        if not ordered:
+            return {"samples": 0, "interval_ms": self.interval * 1000, **blocking}
+        return {
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "current_ms": round(self.samples[-1] * 1000, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+            "window_max_ms": round(ordered[-1] * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            **blocking,
+        }
+
+loop_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL, LOOP_LAG_WINDOW, LOOP_BLOCK_THRESHOLD, LOOP_BLOCK_HISTORY)
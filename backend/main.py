@@ -1,4 +1,6 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
@@ -9,9 +11,53 @@ from datetime import datetime
 # Import MCP endpoint routers
 from yargi_endpoints import router as yargi_router
 from mevzuat_endpoints import router as mevzuat_router
+from system_endpoints import router as system_router, metrics_router
 
 # Import error handlers
 from error_handlers import setup_error_handlers
+from admin_auth import ADMIN_TOKEN
+from profiler import RequestProfilingMiddleware
+
+# Import MCP tool registry
+from tool_registry import registry, EXECUTION_MODE
+from tool_pool import worker_pool
+from tool_executor import tool_executor
+from loop_monitor import loop_monitor
+from document_store import document_store
+from prefetch import prefetcher
+from health_prober import health_prober
+from rate_limiter import rate_limiter
+from metrics import metrics
+from tracing import tracer
+from slow_requests import slow_requests
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Import every MCP tool once (in-process or in the warm worker pool), then stop workers and monitors on shutdown"""
+    # Tool imports and worker forks block, so they run off the event loop
+    if EXECUTION_MODE == "inprocess":
+        await asyncio.to_thread(registry.load)
+    elif EXECUTION_MODE == "pool":
+        await asyncio.to_thread(worker_pool.start)
+    loop_monitor.start()
+    health_prober.start()
+    metrics.start()
+    document_store.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        await health_prober.stop()
+        await prefetcher.stop()
+        tool_executor.shutdown()
+        await document_store.stop()
+        document_store.close()
+        rate_limiter.close()
+        await metrics.stop()
+        tracer.close()
+        slow_requests.close()
+        if EXECUTION_MODE == "pool":
+            await asyncio.to_thread(worker_pool.stop)
 
 # Enhanced FastAPI app with MCP tools integration
 app = FastAPI(
@@ -51,11 +97,18 @@ app = FastAPI(
         "name": "MIT License",
         "url": "https://opensource.org/licenses/MIT",
     },
+    lifespan=lifespan,
 )
 
 # Include MCP endpoint routers
 app.include_router(yargi_router)
 app.include_router(mevzuat_router)
+app.include_router(system_router)
+app.include_router(metrics_router)
+
+# Per-request cProfile opt-in; added before the logging middleware so it runs inside it and sees the request ID
+if ADMIN_TOKEN:
+    app.add_middleware(RequestProfilingMiddleware)
 
 # Setup error handlers and middleware
 setup_error_handlers(app)
@@ -95,6 +148,7 @@ async def health():
             "mevzuat_mcp_tools": 3,
             "total_tools": 41
         },
+        "tool_execution": registry.status(),
         "features": [
             "Turkish court decisions search",
             "Constitutional Court decisions",
@@ -0,0 +1,362 @@
+"""
+Prometheus Metrics
+Counters, gauges and histograms kept per worker and merged across uvicorn workers through a SQLite file
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Shared by every worker, relative to this directory; empty keeps /metrics to the worker that answers the scrape
+METRICS_PATH = os.getenv("METRICS_PATH", "metrics.sqlite3")
+if METRICS_PATH:
+    METRICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), METRICS_PATH)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+# Seconds without a flush after which a worker whose process still exists is retired anyway (pid reuse)
+STALE_WORKER_MAX_AGE = 3600
+
+# Latency bucket upper bounds in seconds
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help); histograms are listed by their base name
+METRIC_TYPES: Dict[str, Tuple[str, str]] = {
+    "http_requests_total": ("counter", "HTTP requests by method, route template and status code"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by method and route template"),
+    "http_requests_in_flight": ("gauge", "HTTP requests being handled"),
+    "api_errors_total": ("counter", "Error responses by error type (APIError subclass or HTTPError, ValidationError, InternalServerError)"),
+    "mcp_tool_calls_total": ("counter", "MCP tool calls through the cache and resilience pipeline by tool and outcome"),
+    "mcp_tool_call_duration_seconds": ("histogram", "MCP tool call latency including cache hits by tool"),
+    "mcp_tool_executions_total": ("counter", "MCP tool executions that reached the execution engine by tool and outcome"),
+    "mcp_tool_execution_duration_seconds": ("histogram", "MCP tool execution latency on the execution engine by tool"),
+    "mcp_tool_executions_in_flight": ("gauge", "MCP tool executions running on the execution engine"),
+    "mcp_tool_executions_waiting": ("gauge", "MCP tool calls queued for an execution slot"),
+    "mcp_tool_pool_idle_workers": ("gauge", "Idle tool worker processes"),
+    "mcp_tool_pool_waiting": ("gauge", "Calls waiting for an idle tool worker process"),
+    "tool_cache_hits_total": ("counter", "Result cache hits by tool"),
+    "tool_cache_misses_total": ("counter", "Result cache misses by tool"),
+    "tool_cache_hit_ratio": ("gauge", "Result cache hits / (hits + misses) across all workers"),
+    "tool_cache_entries": ("gauge", "Entries in the result cache"),
+    "tool_cache_bytes": ("gauge", "Bytes held by the result cache"),
+    "document_store_hits_total": ("counter", "Document store hits"),
+    "document_store_misses_total": ("counter", "Document store misses"),
+    "document_store_hit_ratio": ("gauge", "Document store hits / (hits + misses) across all workers"),
+    "request_coalescing_coalesced_total": ("counter", "Tool calls that joined an identical in-flight call"),
+    "upstream_circuit_open": ("gauge", "Workers whose circuit breaker for the upstream is open"),
+    "event_loop_lag_seconds": ("histogram", "How late the event loop woke up from a fixed-interval sleep"),
+    "event_loop_blocks_total": ("counter", "Times the event loop was blocked beyond LOOP_BLOCK_THRESHOLD (stack captured)"),
+}
+
+# Ratios computed after merging workers: ratio -> (hits counter, misses counter)
+RATIOS: Dict[str, Tuple[str, str]] = {
+    "tool_cache_hit_ratio": ("tool_cache_hits_total", "tool_cache_misses_total"),
+    "document_store_hit_ratio": ("document_store_hits_total", "document_store_misses_total"),
+}
+
+def _labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _pid_alive(worker: str) -> bool:
+    """Whether the process behind a worker key still exists on this host"""
+    try:
+        os.kill(int(worker.split("-", 1)[0]), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _process_group() -> str:
+    """Identifies this server run: the process group leader and, where /proc exists, its start time"""
+    try:
+        leader = os.getpgid(0)
+    except (AttributeError, OSError):
+        leader = os.getppid()
+    try:
+        with open(f"/proc/{leader}/stat") as stat:
+            started = stat.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        started = ""
+    return f"{leader}-{started}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class MetricsRegistry:
+    """Keeps this worker's metrics in memory and periodically writes them to the shared file"""
+
+    def __init__(self, path: str, flush_interval: float):
+        self.path = path
+        self.flush_interval = flush_interval
+        # Restarted workers may reuse a pid, so each process gets its own key
+        self.worker = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Dict[str, Any], float]]]] = []
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        # Counter values in the last write, and those already folded into 'retired' if this worker was retired
+        self._written: Dict[Tuple[str, str], float] = {}
+        self._baseline: Dict[Tuple[str, str], float] = {}
+
+    # RECORDING
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1):
+        if METRICS_ENABLED:
+            key = (name, _labels(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        """Move a gauge up or down"""
+        if METRICS_ENABLED:
+            key = (name, _labels(labels))
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict[str, Any]] = None):
+        """Record one histogram observation"""
+        if not METRICS_ENABLED:
+            return
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            # Per-bucket counts, then +Inf, sum and count
+            histogram = self._histograms[key] = [0.0] * (len(BUCKETS) + 3)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[index] += 1
+                break
+        else:
+            histogram[len(BUCKETS)] += 1
+        histogram[-2] += seconds
+        histogram[-1] += 1
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, Dict[str, Any], float]]]):
+        """Add a callable yielding (name, kind, labels, value) read from component stats at flush time"""
+        self._collectors.append(collector)
+
+    # SNAPSHOT AND STORAGE
+    def samples(self) -> List[Tuple[str, str, str, float]]:
+        """(name, labels, kind, value) rows of this worker, histograms expanded into Prometheus series"""
+        rows = []
+        for (name, labels), value in list(self._counters.items()):
+            rows.append((name, _format_labels(labels), "counter", value))
+        for (name, labels), value in list(self._gauges.items()):
+            rows.append((name, _format_labels(labels), "gauge", value))
+        for (name, labels), histogram in list(self._histograms.items()):
+            cumulative = 0.0
+            for bound, count in zip(BUCKETS + (float("inf"),), histogram):
+                cumulative += count
+                le = _format_value(bound)
+                rows.append((f"{name}_bucket", _format_labels(labels + (("le", le),)), "counter", cumulative))
+            rows.append((f"{name}_sum", _format_labels(labels), "counter", histogram[-2]))
+            rows.append((f"{name}_count", _format_labels(labels), "counter", histogram[-1]))
+        for collector in self._collectors:
+            try:
+                for name, kind, labels, value in collector():
+                    rows.append((name, _format_labels(_labels(labels)), kind, float(value)))
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return rows
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS samples (worker TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL, "
+                "kind TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (worker, name, labels))"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, updated REAL NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._start_group(connection)
+            self._connection = connection
+        return self._connection
+
+    def _start_group(self, connection: sqlite3.Connection):
+        """Drop samples left by a previous server run so counters start from zero like a fresh process"""
+        group = _process_group()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'group'").fetchone()
+            if row is None or row[0] != group:
+                connection.execute("DELETE FROM samples")
+                connection.execute("DELETE FROM workers")
+                connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('group', ?)", (group,))
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+        return self._connection
+
+    def write(self, rows: List[Tuple[str, str, str, float]]):
+        """Replace this worker's rows and heartbeat in the shared file"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                registered = connection.execute("SELECT 1 FROM workers WHERE worker = ?", (self.worker,)).fetchone()
+                if registered is None and self._written:
+                    # Retired while it could not flush: what it last wrote already counts under 'retired'
+                    logger.warning(f"Metrics worker {self.worker} was retired; writing counters since then")
+                    self._baseline = dict(self._written)
+                baseline = self._baseline
+                connection.execute("DELETE FROM samples WHERE worker = ?", (self.worker,))
+                connection.executemany(
+                    "INSERT INTO samples (worker, name, labels, kind, value) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (self.worker, name, labels, kind, value - baseline.get((name, labels), 0) if kind == "counter" else value)
+                        for name, labels, kind, value in rows
+                    ],
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO workers (worker, updated) VALUES (?, ?)", (self.worker, time.time())
+                )
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            self._written = {(name, labels): value for name, labels, kind, value in rows if kind == "counter"}
+
+    def merged(self) -> List[Tuple[str, str, str, float]]:
+        """Rows summed over every worker; stopped workers keep their counters but lose their gauges"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                stale = [
+                    worker
+                    for worker, updated in connection.execute(
+                        "SELECT worker, updated FROM workers WHERE updated < ?", (now - 3 * self.flush_interval,)
+                    )
+                    # A worker that only missed flushes (stalled loop, locked file) still has its process
+                    if not _pid_alive(worker) or updated < now - STALE_WORKER_MAX_AGE
+                ]
+                for worker in stale:
+                    # Fold counters of stopped workers into one row so totals never go backwards
+                    connection.execute(
+                        "INSERT INTO samples (worker, name, labels, kind, value) "
+                        "SELECT 'retired', name, labels, kind, value FROM samples WHERE worker = ? AND kind = 'counter' "
+                        "ON CONFLICT (worker, name, labels) DO UPDATE SET value = value + excluded.value",
+                        (worker,),
+                    )
+                    connection.execute("DELETE FROM samples WHERE worker = ?", (worker,))
+                    connection.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+                rows = connection.execute(
+                    "SELECT name, labels, kind, SUM(value) FROM samples GROUP BY name, labels, kind ORDER BY name, labels"
+                ).fetchall()
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+        return rows
+
+    # BACKGROUND FLUSH
+    async def flush(self):
+        if METRICS_ENABLED and self.path:
+            rows = self.samples()
+            await asyncio.to_thread(self.write, rows)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Could not flush metrics: {e}")
+
+    def start(self):
+        if METRICS_ENABLED and self.path and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                # Final flush so this worker's counters survive it
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Could not flush metrics: {e}")
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # EXPOSITION
+    async def render(self) -> str:
+        """Prometheus text exposition of every worker's metrics"""
+        if self.path:
+            await self.flush()
+            rows = await asyncio.to_thread(self.merged)
+        else:
+            rows = self.samples()
+        return render_text(rows)
+
+def _series_order(item: Tuple[str, float]) -> Tuple[str, float]:
+    # Buckets carry le last; order them numerically within each label set
+    labels = item[0]
+    head, separator, le = labels.rpartition(',le="')
+    if not separator:
+        head, separator, le = labels.rpartition('{le="')
+    if not separator:
+        return labels, 0.0
+    return head, float(le.rstrip('"}').replace("+Inf", "inf"))
+
+def render_text(rows: Iterable[Tuple[str, str, str, float]]) -> str:
+    """Format (name, labels, kind, value) rows with HELP/TYPE headers, adding merged ratios"""
+    series: Dict[str, List[Tuple[str, float]]] = {}
+    totals: Dict[str, float] = {}
+    for name, labels, kind, value in rows:
+        series.setdefault(name, []).append((labels, value))
+        totals[name] = totals.get(name, 0) + value
+    for ratio, (hits, misses) in RATIOS.items():
+        lookups = totals.get(hits, 0) + totals.get(misses, 0)
+        if lookups:
+            series[ratio] = [("", totals.get(hits, 0) / lookups)]
+
+    lines = []
+    described = set()
+    for name in sorted(series):
+        base = name
+        for suffix in ("_bucket", "_sum", "_count"):
+            if name.endswith(suffix) and name[: -len(suffix)] in METRIC_TYPES:
+                base = name[: -len(suffix)]
+        if base not in described and base in METRIC_TYPES:
+            kind, help_text = METRIC_TYPES[base]
+            lines.append(f"# HELP {base} {help_text}")
+            lines.append(f"# TYPE {base} {kind}")
+            described.add(base)
+        for labels, value in sorted(series[name], key=_series_order):
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry(METRICS_PATH, METRICS_FLUSH_INTERVAL)
@@ -6,12 +6,13 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
-import subprocess
-import json
-import tempfile
-import os
 
-router = APIRouter(prefix="/api/mevzuat", tags=["Mevzuat MCP Tools"])
+from tool_cache import model_defaults, register_tool_defaults
+from error_handlers import APIError, TracedRoute
+from tool_executor import execute_tool
+from prefetch import prefetcher
+
+router = APIRouter(prefix="/api/mevzuat", tags=["Mevzuat MCP Tools"], route_class=TracedRoute)
 
 # Pydantic models for request/response validation
 class SearchMevzuatRequest(BaseModel):
@@ -52,50 +53,20 @@ class ArticleContentResponse(BaseModel):
     content: str
     markdown_content: str
 
+# Parameter defaults used to build canonical cache keys
+register_tool_defaults("search_mevzuat", model_defaults(SearchMevzuatRequest))
+
 # Helper function to call MCP tools
 async def call_mcp_tool(tool_name: str, parameters: dict) -> dict:
-    """Call Mevzuat MCP tool via command line interface"""
+    """Call Mevzuat MCP tool through the shared tool executor"""
     try:
-        # Create temporary file with parameters
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(parameters, f)
-            temp_file = f.name
-        
-        # Call the MCP tool
-        cmd = ["python", "-c", f"""
-import sys
-import json
-sys.path.append('.')
-
-# Import the specific MCP function based on tool name
-tool_map = {{
-    'search_mevzuat': 'from mcp__mevzuat_mcp__search_mevzuat import mcp__mevzuat_mcp__search_mevzuat as tool_func',
-    'get_mevzuat_article_tree': 'from mcp__mevzuat_mcp__get_mevzuat_article_tree import mcp__mevzuat_mcp__get_mevzuat_article_tree as tool_func',
-    'get_mevzuat_article_content': 'from mcp__mevzuat_mcp__get_mevzuat_article_content import mcp__mevzuat_mcp__get_mevzuat_article_content as tool_func'
-}}
-
-# Load parameters
-with open('{temp_file}', 'r', encoding='utf-8') as f:
-    params = json.load(f)
-
-# Execute the function
-exec(tool_map.get('{tool_name}', 'raise ValueError("Unknown tool")'))
-result = tool_func(**params)
-print(json.dumps(result, ensure_ascii=False, indent=2))
-"""]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-        
-        # Clean up temp file
-        os.unlink(temp_file)
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"MCP tool error: {result.stderr}")
-        
-        return json.loads(result.stdout)
-    
+        result = await execute_tool(tool_name, parameters)
+    except APIError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calling MCP tool: {str(e)}")
+    prefetcher.after_search(tool_name, parameters, result)
+    return result
 
 # LEGISLATION SEARCH ENDPOINTS
 @router.post("/search", response_model=MevzuatSearchResponse, summary="Search Turkish Legislation")
@@ -0,0 +1,38 @@
+"""
+Mock MCP Tools
+Tool functions that call the local mock upstream (mock_upstream.py) instead of the government servers
+"""
+import os
+from typing import Any, Callable
+
+import httpx
+
+from tracing import tracer
+from upstream_errors import UpstreamError
+
+MOCK_UPSTREAM_URL = os.getenv("MOCK_UPSTREAM_URL", "http://localhost:8900")
+MOCK_TIMEOUT = float(os.getenv("MOCK_UPSTREAM_TIMEOUT", 60))
+
+_client = httpx.Client(base_url=MOCK_UPSTREAM_URL, timeout=MOCK_TIMEOUT)
+
+def call_mock_tool(tool_name: str, **parameters) -> Any:
+    """Blocking HTTP call to the mock upstream, shaped like the real tool function"""
+    with tracer.span("upstream.http", url=f"{MOCK_UPSTREAM_URL}/tools/{tool_name}") as span:
+        response = _client.post(f"/tools/{tool_name}", json=parameters)
+        span.set(status=response.status_code, bytes=len(response.content))
+    if response.status_code >= 400:
+        error = UpstreamError if response.status_code >= 500 else RuntimeError
+        raise error(f"Upstream returned HTTP {response.status_code}: {response.text[:200]}")
+    with tracer.span("json.decode", bytes=len(response.content)):
+        return response.json()
+
+def __getattr__(name: str) -> Callable[..., Any]:
+    # Any tool name resolves to a mock function, so the registry can import it like a real tool
+    if name.startswith("__"):
+        raise AttributeError(name)
+
+    def tool(**parameters) -> Any:
+        return call_mock_tool(name, **parameters)
+
+    tool.__name__ = name
+    return tool
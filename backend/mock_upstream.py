@@ -0,0 +1,205 @@
+"""
+Mock Government Upstream
+Local stand-in for the government servers: serves fixtures with configurable latency, error rate and payload size
+
+Run with `python mock_upstream.py`, then start the API with MOCK_UPSTREAM_URL=http://localhost:8900
+(and MEVZUAT_BASE_URL=http://localhost:8900 for the direct mevzuat.gov.tr client).
+"""
+import asyncio
+import hashlib
+import html
+import json
+import math
+import os
+import random
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+from document_store import document_address
+from tool_registry import TOOL_MAP, tool_category
+
+MOCK_HOST = os.getenv("MOCK_UPSTREAM_HOST", "0.0.0.0")
+MOCK_PORT = int(os.getenv("MOCK_UPSTREAM_PORT", 8900))
+MOCK_SEED = os.getenv("MOCK_SEED")
+MOCK_CONFIG = os.getenv("MOCK_CONFIG", "")
+FIXTURES_PATH = os.getenv("MOCK_FIXTURES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_fixtures.json"))
+
+# Behaviour of every source unless overridden per source
+DEFAULT_PROFILE: Dict[str, float] = {
+    "latency_median": float(os.getenv("MOCK_LATENCY_MEDIAN", 0.15)),
+    # Lognormal shape; 0 gives a fixed latency, ~1 gives a heavy tail
+    "latency_sigma": float(os.getenv("MOCK_LATENCY_SIGMA", 0.5)),
+    "latency_max": float(os.getenv("MOCK_LATENCY_MAX", 30)),
+    "error_rate": float(os.getenv("MOCK_ERROR_RATE", 0)),
+    "payload_bytes": int(os.getenv("MOCK_PAYLOAD_BYTES", 20000)),
+    "results_per_page": int(os.getenv("MOCK_RESULTS_PER_PAGE", 10)),
+    "document_pages": int(os.getenv("MOCK_DOCUMENT_PAGES", 3)),
+}
+
+PARAGRAPH = (
+    "Dava dosyası incelendi. Davacı vekili dilekçesinde, müvekkilinin {query} nedeniyle uğradığı zararın "
+    "tazminini talep etmiştir. Davalı vekili davanın reddini savunmuştur. Toplanan deliller, bilirkişi raporu "
+    "ve tüm dosya kapsamına göre mahkemece verilen kararın usul ve yasaya uygun olduğu anlaşılmıştır.\n\n"
+)
+
+_PAGE_PARAMS = ("page", "pageNumber", "page_number", "page_to_fetch")
+
+class MockUpstream:
+    """Fixture expansion plus latency, failure and payload profiles per source"""
+
+    def __init__(self, fixtures: Dict[str, Any], profiles: Dict[str, Dict[str, float]], seed: Optional[str]):
+        self.fixtures = fixtures
+        self.default = dict(DEFAULT_PROFILE, **profiles.get("default", {}))
+        self.sources: Dict[str, Dict[str, float]] = dict(profiles.get("sources", {}))
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def profile(self, source: str) -> Dict[str, float]:
+        return {**self.default, **self.sources.get(source, {})}
+
+    def latency(self, profile: Dict[str, float]) -> float:
+        median, sigma = profile["latency_median"], profile["latency_sigma"]
+        if median <= 0:
+            return 0.0
+        value = median if sigma <= 0 else self.random.lognormvariate(math.log(median), sigma)
+        return min(value, profile["latency_max"])
+
+    async def simulate(self, source: str) -> Optional[JSONResponse]:
+        """Sleep for the source's latency; return an error response when a failure is drawn"""
+        profile = self.profile(source)
+        self.requests[source] = self.requests.get(source, 0) + 1
+        await asyncio.sleep(self.latency(profile))
+        if self.random.random() < profile["error_rate"]:
+            self.errors[source] = self.errors.get(source, 0) + 1
+            return JSONResponse(status_code=503, content={"error": f"Mock upstream '{source}' unavailable"})
+        return None
+
+    def respond(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
+        """Fixture for a tool call, filled in deterministically from its parameters"""
+        fixture = self.fixtures[tool_name]
+        profile = self.profile(tool_category(tool_name))
+        query = _query(parameters)
+        values = {"query": query, "now": datetime.now().isoformat()}
+
+        if fixture["kind"] == "search":
+            page = _page(parameters)
+            items = []
+            for index in range(int(profile["results_per_page"])):
+                item_id = _stable_id(tool_name, query, page, index)
+                items.append(_fill(fixture["item"], {**values, "id": item_id, "n": str(index % 9 + 1)}))
+            return {**_fill(fixture["envelope"], {**values, "page": page}), fixture["list_key"]: items}
+
+        address = document_address(tool_name, parameters)
+        doc_id = address[1] if address else next((str(value) for value in parameters.values()), "")
+        values["id"] = doc_id
+        body = _fill(fixture["body"], values)
+        if fixture["kind"] == "document":
+            paragraph = PARAGRAPH.replace("{query}", doc_id[-24:] or "dava")
+            repeats = max(1, int(profile["payload_bytes"]) // len(paragraph.encode("utf-8")))
+            body[fixture["content_key"]] = f"# Karar {doc_id}\n\n" + paragraph * repeats
+            if fixture.get("paginated"):
+                page = address[2] if address else 1
+                body[fixture.get("page_key", "current_page")] = page
+                body["total_pages"] = int(profile["document_pages"])
+                body["is_paginated"] = profile["document_pages"] > 1
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": dict(self.requests), "errors": dict(self.errors)}
+
+def _query(parameters: Dict[str, Any]) -> str:
+    for value in parameters.values():
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+        if isinstance(value, list) and value and isinstance(value[0], str):
+            return value[0]
+    return "dava"
+
+def _page(parameters: Dict[str, Any]) -> int:
+    for key in _PAGE_PARAMS:
+        if key in parameters:
+            return int(parameters[key])
+    if "start" in parameters:
+        return int(parameters["start"]) // max(1, int(parameters.get("length", 10))) + 1
+    return 1
+
+def _stable_id(tool_name: str, query: str, page: int, index: int) -> str:
+    return hashlib.sha1(f"{tool_name}|{query}|{page}|{index}".encode("utf-8")).hexdigest()[:12]
+
+def _fill(template: Any, values: Dict[str, Any]) -> Any:
+    if isinstance(template, dict):
+        return {key: _fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_fill(value, values) for value in template]
+    if isinstance(template, str):
+        whole = template[1:-1] if template.startswith("{") and template.endswith("}") else None
+        if whole in values:
+            # A bare placeholder keeps the value's type (e.g. page numbers stay ints)
+            return values[whole]
+        for key, value in values.items():
+            template = template.replace(f"{{{key}}}", str(value))
+    return template
+
+def _load_profiles() -> Dict[str, Any]:
+    if not MOCK_CONFIG:
+        return {}
+    with open(MOCK_CONFIG, encoding="utf-8") as f:
+        return json.load(f)
+
+with open(FIXTURES_PATH, encoding="utf-8") as _f:
+    _fixtures = json.load(_f)
+
+mock = MockUpstream(_fixtures, _load_profiles(), MOCK_SEED)
+
+app = FastAPI(title="Mock Government Upstream", docs_url="/_mock/docs")
+
+@app.post("/tools/{tool_name}")
+async def call_tool(tool_name: str, request: Request):
+    """Answer an MCP tool call from its fixture"""
+    if tool_name not in TOOL_MAP or tool_name not in mock.fixtures:
+        return JSONResponse(status_code=404, content={"error": f"No fixture for tool '{tool_name}'"})
+    parameters = await request.json()
+    failure = await mock.simulate(tool_category(tool_name))
+    return failure or mock.respond(tool_name, parameters)
+
+@app.get("/probe/{source}")
+async def probe(source: str):
+    """Health probe target standing in for a government server's front page"""
+    failure = await mock.simulate(source)
+    return failure or {"source": source, "status": "ok"}
+
+@app.get("/MevzuatMetin/MevzuatMetinDetay.aspx", response_class=HTMLResponse)
+async def mevzuat_page(Mevzuat: str = ""):
+    """mevzuat.gov.tr search page used by DirectMevzuatClient"""
+    failure = await mock.simulate("mevzuat")
+    if failure:
+        return failure
+    title = html.escape(Mevzuat or "mevzuat")
+    body = PARAGRAPH.replace("{query}", title) * 4
+    return f"<html><head><title>{title}</title></head><body><div id='mevzuat'>{body}</div></body></html>"
+
+@app.get("/_mock/config")
+async def get_config():
+    """Current default and per-source profiles"""
+    return {"default": mock.default, "sources": mock.sources}
+
+@app.put("/_mock/config")
+async def update_config(config: Dict[str, Any]):
+    """Change profiles at runtime, e.g. {"sources": {"bddk": {"error_rate": 0.5}}}"""
+    mock.default.update(config.get("default", {}))
+    for source, profile in config.get("sources", {}).items():
+        mock.sources.setdefault(source, {}).update(profile)
+    return {"default": mock.default, "sources": mock.sources}
+
+@app.get("/_mock/stats")
+async def get_stats():
+    """Requests and injected errors per source"""
+    return mock.stats()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=MOCK_HOST, port=MOCK_PORT, log_level="warning")
@@ -0,0 +1,186 @@
+"""
+Predictive Prefetch
+Warms the cache after a search with the next result page and the top-N documents
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from federated_search import normalize_results
+from rate_limiter import rate_limiter
+from tool_cache import CACHE_ENABLED, cache_key, tool_cache
+from tool_executor import execute_tool, rate_token_held, tool_executor
+from tool_registry import tool_category
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", 3))
+PREFETCH_NEXT_PAGE = os.getenv("PREFETCH_NEXT_PAGE", "true").lower() == "true"
+PREFETCH_SOURCE_CONCURRENCY = int(os.getenv("PREFETCH_SOURCE_CONCURRENCY", 1))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", 64))
+# Prefetches only start while fewer than this share of executor slots are busy
+PREFETCH_MAX_LOAD = float(os.getenv("PREFETCH_MAX_LOAD", 0.5))
+
+class PrefetchRule(NamedTuple):
+    source: str
+    page_param: Optional[str]
+    document_tool: str
+    document_param: str
+    # Normalized result field ("id" or "url") holding the document parameter
+    document_field: str
+    # Search parameters the document tool needs as well
+    inherited_params: Tuple[str, ...] = ()
+
+# Search tool -> how to derive its next page and its documents
+PREFETCH_RULES: Dict[str, PrefetchRule] = {
+    "search_bedesten_unified": PrefetchRule("bedesten", "pageNumber", "get_bedesten_document_markdown", "documentId", "id"),
+    "search_emsal_detailed_decisions": PrefetchRule("emsal", "page_number", "get_emsal_document_markdown", "id", "id"),
+    "search_anayasa_unified": PrefetchRule("anayasa", "page_to_fetch", "get_anayasa_document_unified", "document_url", "url"),
+    "search_uyusmazlik_decisions": PrefetchRule("uyusmazlik", None, "get_uyusmazlik_document_markdown_from_url", "document_url", "url"),
+    "search_kik_decisions": PrefetchRule("kik", "page", "get_kik_document_markdown", "karar_id", "id"),
+    "search_rekabet_kurumu_decisions": PrefetchRule("rekabet", "page", "get_rekabet_kurumu_document", "karar_id", "id"),
+    "search_sayistay_unified": PrefetchRule(
+        "sayistay", "start", "get_sayistay_document_unified", "decision_id", "id", ("decision_type",)
+    ),
+    "search_kvkk_decisions": PrefetchRule("kvkk", "page", "get_kvkk_document_markdown", "decision_url", "url"),
+    "search_bddk_decisions": PrefetchRule("bddk", "page", "get_bddk_document_markdown", "document_id", "id"),
+    "search_mevzuat": PrefetchRule("mevzuat", "page_number", "get_mevzuat_article_tree", "mevzuat_id", "id"),
+}
+
+def _next_page(rule: PrefetchRule, parameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if rule.page_param is None:
+        return None
+    if rule.page_param == "start":
+        # Sayıştay pages by record offset
+        start = int(parameters.get("start", 0)) + int(parameters.get("length", 10))
+        return {**parameters, "start": start}
+    return {**parameters, rule.page_param: int(parameters.get(rule.page_param, 1)) + 1}
+
+def prefetch_calls(tool_name: str, parameters: Dict[str, Any], result: Any, top_n: int = PREFETCH_TOP_N) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(source, tool, parameters) worth warming after a search; documents first, then the next page"""
+    rule = PREFETCH_RULES.get(tool_name)
+    if rule is None:
+        return []
+    if hasattr(result, "model_dump"):
+        result = result.model_dump()
+    calls = []
+    for entry in normalize_results(rule.source, result)[:top_n]:
+        value = entry.get(rule.document_field)
+        if value in (None, ""):
+            continue
+        document_params = {name: parameters[name] for name in rule.inherited_params if name in parameters}
+        document_params[rule.document_param] = str(value)
+        calls.append((rule.source, rule.document_tool, document_params))
+    next_page = _next_page(rule, parameters) if PREFETCH_NEXT_PAGE else None
+    if next_page is not None and calls:
+        # An empty result page has no next page worth fetching
+        calls.append((rule.source, tool_name, next_page))
+    return calls
+
+class Prefetcher:
+    """Runs low-priority background warm-ups with a concurrency cap per upstream source"""
+
+    def __init__(self, enabled: bool, source_concurrency: int, max_pending: int):
+        self.enabled = enabled and CACHE_ENABLED
+        self.source_concurrency = source_concurrency
+        self.max_pending = max_pending
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending_keys: Set[str] = set()
+        self.issued = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped_cached = 0
+        self.dropped = 0
+        self.rate_limited = 0
+
+    def _semaphore(self, source: str) -> asyncio.Semaphore:
+        if source not in self._semaphores:
+            self._semaphores[source] = asyncio.Semaphore(self.source_concurrency)
+        return self._semaphores[source]
+
+    def _busy(self) -> bool:
+        return (
+            tool_executor.waiting > 0
+            or tool_executor.in_flight >= tool_executor.max_concurrency * PREFETCH_MAX_LOAD
+        )
+
+    def after_search(self, tool_name: str, parameters: Dict[str, Any], result: Any):
+        """Schedule warm-ups for a search that just returned; never raises"""
+        if not self.enabled or tool_name not in PREFETCH_RULES:
+            return
+        try:
+            calls = prefetch_calls(tool_name, parameters, result)
+        except Exception as e:
+            logger.debug(f"No prefetch for '{tool_name}': {e}")
+            return
+        loop = asyncio.get_running_loop()
+        for source, call_tool, call_params in calls:
+            key = cache_key(call_tool, call_params)
+            if key in self._pending_keys:
+                continue
+            if len(self._tasks) >= self.max_pending:
+                self.dropped += 1
+                continue
+            self._pending_keys.add(key)
+            task = loop.create_task(self._warm(source, call_tool, call_params, key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self, source: str, tool_name: str, parameters: Dict[str, Any], key: str):
+        try:
+            async with self._semaphore(source):
+                if tool_cache.get(key)[0] == "fresh":
+                    self.skipped_cached += 1
+                    return
+                if self._busy():
+                    # User traffic comes first; this prediction is simply dropped
+                    self.dropped += 1
+                    return
+                if not await rate_limiter.try_acquire_async(tool_category(tool_name)):
+                    # Like hedges, prefetches never queue for the upstream rate limit
+                    self.rate_limited += 1
+                    return
+                self.issued += 1
+                token = rate_token_held.set(True)
+                try:
+                    await execute_tool(tool_name, parameters)
+                finally:
+                    rate_token_held.reset(token)
+                tool_cache.mark_prefetched(key)
+                self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.debug(f"Prefetch of '{tool_name}' failed: {e}")
+        finally:
+            self._pending_keys.discard(key)
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Prefetch counters and the share of prefetches later read by a request"""
+        hits = tool_cache.prefetch_hits
+        return {
+            "enabled": self.enabled,
+            "top_n": PREFETCH_TOP_N,
+            "next_page": PREFETCH_NEXT_PAGE,
+            "pending": len(self._tasks),
+            "issued": self.issued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped_cached": self.skipped_cached,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "hits": hits,
+            "hit_ratio": round(hits / self.completed, 4) if self.completed else None,
+        }
+
+prefetcher = Prefetcher(PREFETCH_ENABLED, PREFETCH_SOURCE_CONCURRENCY, PREFETCH_MAX_PENDING)
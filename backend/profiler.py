@@ -0,0 +1,170 @@
+"""
+Live Profiling
+On-demand sampling profiler for the whole worker and opt-in cProfile runs for single requests
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from admin_auth import bearer_token, is_admin_token
+
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.005))
+# Request profiles kept per worker for /api/system/profiles
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", 20))
+
+PROFILE_HEADER = b"x-profile"
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a sampling run is already in progress on this worker"""
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+class SamplingProfiler:
+    """Samples the stacks of every thread at a fixed interval; nothing runs between profiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float) -> Dict[str, Any]:
+        """Blocking sampling run (call from a thread); stacks are root-first and ';'-joined"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running on this worker")
+        try:
+            own = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            samples = 0
+            started = time.monotonic()
+            deadline = started + seconds
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    if ident not in names:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+            return {
+                "seconds": round(time.monotonic() - started, 3),
+                "interval_ms": interval * 1000,
+                "samples": samples,
+                "stacks": stacks,
+            }
+        finally:
+            self._lock.release()
+
+def collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed-stack format, readable by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+def top_functions(stacks: Counter, limit: int = 25) -> list:
+    """Functions on top of the stack (self time) by sample count"""
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [
+        {"function": name, "samples": count, "share": round(count / total, 4)}
+        for name, count in leaves.most_common(limit)
+    ]
+
+sampling_profiler = SamplingProfiler()
+
+class RequestProfiles:
+    """cProfile results of opted-in requests"""
+
+    def __init__(self, size: int):
+        self.profiles: Deque[Dict[str, Any]] = deque(maxlen=size)
+        # cProfile hooks the thread globally, so only one request is profiled at a time
+        self.lock = threading.Lock()
+
+    def add(self, request_id: str, method: str, path: str, duration: float, profile: cProfile.Profile):
+        self.profiles.append({
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "duration_ms": round(duration * 1000, 2),
+            "timestamp": datetime.now().isoformat(),
+            "stats": pstats.Stats(profile),
+        })
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        for profile in reversed(self.profiles):
+            if profile["request_id"] == request_id:
+                return profile
+        return None
+
+    def list(self) -> list:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(self.profiles)]
+
+def stats_text(stats: pstats.Stats, sort: str, limit: int) -> str:
+    """pstats report as text"""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+request_profiles = RequestProfiles(PROFILE_BUFFER_SIZE)
+
+class RequestProfilingMiddleware:
+    """Profiles a request with cProfile when it sends X-Profile: 1 with the admin bearer token
+
+    Only added when ADMIN_TOKEN is set. The profile covers everything the event
+    loop thread runs while the request is in flight, other requests included;
+    tool calls on executor threads or worker processes appear as waits.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+        if not is_admin_token(bearer_token(headers.get(b"authorization", b"").decode("latin-1"))):
+            await self.app(scope, receive, send)
+            return
+
+        if not request_profiles.lock.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, b"busy"))
+            return
+        request_id = scope.get("state", {}).get("request_id", "")
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, self._with_header(send, request_id.encode()))
+            finally:
+                profile.disable()
+            request_profiles.add(request_id, scope.get("method", ""), scope.get("path", ""), time.perf_counter() - started, profile)
+        finally:
+            request_profiles.lock.release()
+
+    @staticmethod
+    def _with_header(send, value: bytes):
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", value)]}
+            await send(message)
+        return send_with_header
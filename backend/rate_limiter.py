@@ -0,0 +1,151 @@
+"""
+Upstream Rate Limiter
+Token buckets per government server, shared by every worker process through a SQLite file
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Relative paths resolve against this directory so root-level clients share the backend's buckets
+RATE_LIMIT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.getenv("RATE_LIMIT_PATH", "rate_limits.sqlite3")
+)
+DEFAULT_RATE = float(os.getenv("RATE_LIMIT_DEFAULT_RATE", 5))
+DEFAULT_BURST = float(os.getenv("RATE_LIMIT_DEFAULT_BURST", 10))
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", 10))
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "mevzuat=2:5,bedesten_unified=5:10" into {name: (rate per second, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, values = item.partition("=")
+        rate, _, burst = values.partition(":")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+# Upstream -> (requests per second, burst); the rest use the defaults
+RATE_LIMITS: Dict[str, Tuple[float, float]] = parse_limits(os.getenv("RATE_LIMITS", "mevzuat=2:5,bedesten_unified=5:10"))
+
+class RateLimitExceeded(RuntimeError):
+    """The wait for an upstream slot would exceed the caller's deadline"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit for '{name}' exceeded, retry in {retry_after:.1f}s")
+
+class RateLimiter:
+    """Reserves tokens atomically in SQLite, so the limit holds across uvicorn workers"""
+
+    def __init__(self, path: str, limits: Dict[str, Tuple[float, float]]):
+        self.path = path
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.granted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def limit(self, name: str) -> Tuple[float, float]:
+        return self.limits.get(name, (DEFAULT_RATE, DEFAULT_BURST))
+
+    def reserve(self, name: str, max_wait: float) -> float:
+        """Take a token, returning how long to wait before using it
+
+        Tokens may go negative: each reservation queues behind the earlier ones.
+        Raises RateLimitExceeded instead of reserving when the wait would exceed max_wait.
+        """
+        rate, burst = self.limit(name)
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = connection.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+                wait = max(0.0, (1 - tokens) / rate)
+                if wait > max_wait:
+                    connection.execute("ROLLBACK")
+                    self.rejected += 1
+                    raise RateLimitExceeded(name, wait)
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (name, tokens - 1, now)
+                )
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+        self.granted += 1
+        if wait > 0:
+            self.delayed += 1
+            self.waited_seconds += wait
+        return wait
+
+    def acquire(self, name: str, max_wait: float = MAX_WAIT):
+        """Blocking acquire for synchronous clients"""
+        if not RATE_LIMIT_ENABLED:
+            return
+        wait = self.reserve(name, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, name: str, max_wait: float = MAX_WAIT):
+        """Queue until the upstream has a free slot, or raise RateLimitExceeded"""
+        if not RATE_LIMIT_ENABLED:
+            return
+        wait = await asyncio.to_thread(self.reserve, name, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def try_acquire_async(self, name: str) -> bool:
+        """Take a token only if one is free right now"""
+        if not RATE_LIMIT_ENABLED:
+            return True
+        try:
+            await asyncio.to_thread(self.reserve, name, 0)
+            return True
+        except RateLimitExceeded:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured limits and this worker's counters"""
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "path": self.path,
+            "default": {"rate": DEFAULT_RATE, "burst": DEFAULT_BURST},
+            "limits": {name: {"rate": rate, "burst": burst} for name, (rate, burst) in sorted(self.limits.items())},
+            "max_wait_seconds": MAX_WAIT,
+            "granted": self.granted,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited_seconds, 2),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+rate_limiter = RateLimiter(RATE_LIMIT_PATH, RATE_LIMITS)
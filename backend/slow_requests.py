@@ -0,0 +1,162 @@
+"""
+Slow Request Recorder
+Keeps requests over a latency threshold with their route, tool calls, parameters, phase timings and response size
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+SLOW_REQUEST_ENABLED = os.getenv("SLOW_REQUEST_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", 2.0))
+SLOW_REQUEST_BUFFER_SIZE = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", 200))
+# Rotating JSON lines file slow requests are also written to (empty: in-memory only)
+SLOW_REQUEST_FILE = os.getenv("SLOW_REQUEST_FILE", "")
+SLOW_REQUEST_FILE_MAX_BYTES = int(os.getenv("SLOW_REQUEST_FILE_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_REQUEST_FILE_BACKUPS = int(os.getenv("SLOW_REQUEST_FILE_BACKUPS", 5))
+
+# Longer string parameters are cut to this many characters in the log
+MAX_PARAMETER_LENGTH = 500
+
+class RequestRecord:
+    """What the recorder knows about one in-flight request"""
+
+    __slots__ = ("request_id", "method", "path", "tool_calls", "closed")
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.closed = False
+
+_record: ContextVar[Optional[RequestRecord]] = ContextVar("slow_request_record", default=None)
+
+def _truncate(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > MAX_PARAMETER_LENGTH:
+        return value[:MAX_PARAMETER_LENGTH] + "…"
+    return value
+
+class SlowRequestRecorder:
+    """Ring buffer of slow requests, optionally mirrored to a rotating file off the event loop"""
+
+    def __init__(self, enabled: bool, threshold: float, size: int, path: str):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.recorded = 0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._file_logger: Optional[logging.Logger] = None
+        if enabled and path:
+            self._open_file(path)
+
+    def _open_file(self, path: str):
+        # The queue listener's thread does the file writes and rotation
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=SLOW_REQUEST_FILE_MAX_BYTES, backupCount=SLOW_REQUEST_FILE_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._file_logger = logging.getLogger(f"{__name__}.file")
+        self._file_logger.propagate = False
+        self._file_logger.setLevel(logging.INFO)
+        self._file_logger.addHandler(logging.handlers.QueueHandler(records))
+        self._listener.start()
+
+    def start(self, request_id: str, method: str, path: str) -> Optional[RequestRecord]:
+        """Begin collecting tool calls for the current request"""
+        if not self.enabled:
+            return None
+        record = RequestRecord(request_id, method, path)
+        _record.set(record)
+        return record
+
+    def note_tool_call(self, tool_name: str, parameters: Dict[str, Any], duration: float, outcome: str):
+        """Attach a finished MCP tool call to the current request"""
+        record = _record.get()
+        if record is None or record.closed:
+            return
+        record.tool_calls.append({
+            "tool": tool_name,
+            "parameters": {key: _truncate(value) for key, value in parameters.items()},
+            "duration_ms": round(duration * 1000, 2),
+            "outcome": outcome,
+        })
+
+    def finish(
+        self,
+        record: Optional[RequestRecord],
+        route: str,
+        status: int,
+        duration: float,
+        response_bytes: int,
+        phases: Callable[[], Dict[str, float]],
+    ):
+        """Keep the request if it was slower than the threshold"""
+        if record is None:
+            return
+        record.closed = True
+        if duration < self.threshold:
+            return
+        entry = {
+            "request_id": record.request_id,
+            "timestamp": datetime.now().isoformat(),
+            "method": record.method,
+            "path": record.path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "response_bytes": response_bytes,
+            "tools": sorted({call["tool"] for call in record.tool_calls}),
+            "tool_calls": list(record.tool_calls),
+            "phases_ms": phases(),
+        }
+        self.entries.append(entry)
+        self.recorded += 1
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+
+    def recent(
+        self,
+        limit: int,
+        route: Optional[str] = None,
+        tool: Optional[str] = None,
+        min_duration: float = 0,
+    ) -> List[Dict[str, Any]]:
+        """Newest first, optionally filtered by route template, tool name and duration"""
+        matches = []
+        for entry in reversed(self.entries):
+            if route and entry["route"] != route:
+                continue
+            if tool and tool not in entry["tools"]:
+                continue
+            if entry["duration_ms"] < min_duration * 1000:
+                continue
+            matches.append(entry)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "recorded": self.recorded,
+            "buffered": len(self.entries),
+            "file": SLOW_REQUEST_FILE or None,
+        }
+
+slow_requests = SlowRequestRecorder(
+    SLOW_REQUEST_ENABLED, SLOW_REQUEST_THRESHOLD, SLOW_REQUEST_BUFFER_SIZE, SLOW_REQUEST_FILE
+)
@@ -0,0 +1,161 @@
+"""
+System Monitoring REST API Endpoints
+Exposes runtime state of the tool execution layer
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from admin_auth import require_admin
+from circuit_breaker import OPEN, circuit_breakers
+from document_store import document_store
+from hedging import hedger
+from loop_monitor import loop_monitor
+from metrics import metrics
+from prefetch import prefetcher
+from profiler import (
+    PROFILER_INTERVAL, PROFILER_MAX_SECONDS, ProfilerBusy, collapsed, request_profiles,
+    sampling_profiler, stats_text, top_functions,
+)
+from rate_limiter import rate_limiter
+from request_coalescing import single_flight
+from slow_requests import slow_requests
+from tool_cache import tool_cache
+from tool_executor import tool_executor
+from tool_pool import worker_pool
+from tool_registry import EXECUTION_MODE, registry
+from tracing import tracer
+
+router = APIRouter(prefix="/api/system", tags=["System Monitoring"])
+# Served at the root so Prometheus can scrape the default path
+metrics_router = APIRouter(tags=["System Monitoring"])
+
+@router.get("/runtime", summary="Get Runtime Statistics", dependencies=[Depends(require_admin)])
+async def get_runtime_stats():
+    """Event loop lag, tool concurrency, caches, coalescing, prefetch, circuit breakers, hedging, rate limits and tool registry state for this worker"""
+    return {
+        "event_loop_lag": loop_monitor.stats(),
+        "tool_executor": tool_executor.stats(),
+        "tool_cache": tool_cache.stats(),
+        "request_coalescing": single_flight.stats(),
+        "prefetch": prefetcher.stats(),
+        "circuit_breakers": circuit_breakers.stats(),
+        "hedging": hedger.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "document_store": await asyncio.to_thread(document_store.stats),
+        "tool_registry": registry.status(),
+        "tracing": tracer.stats(),
+        "slow_requests": slow_requests.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/traces", summary="Get Slowest Recent Traces", dependencies=[Depends(require_admin)])
+async def get_slowest_traces(
+    limit: int = Query(default=10, ge=1, le=100, description="Number of traces"),
+    min_duration_ms: float = Query(default=0, ge=0, description="Only traces at least this slow"),
+    spans: bool = Query(default=False, description="Include every span, not just the per-phase breakdown"),
+):
+    """Slowest requests among this worker's recent traces, with time spent per phase"""
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    traces = []
+    for trace in tracer.memory.slowest(limit, min_duration_ms / 1000):
+        data = trace.to_dict()
+        if not spans:
+            data.pop("spans")
+        traces.append(data)
+    return {"buffered": len(tracer.memory.traces), "traces": traces}
+
+@router.get("/traces/{trace_id}", summary="Get Trace", dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str):
+    """Every span of one request; the trace ID is the X-Request-ID response header"""
+    trace = tracer.memory.get(trace_id) if tracer.memory else None
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace '{trace_id}' not found on this worker")
+    return trace.to_dict()
+
+@router.get("/profile", summary="Profile This Worker", dependencies=[Depends(require_admin)])
+async def profile_worker(
+    seconds: float = Query(default=10, gt=0, le=PROFILER_MAX_SECONDS, description="Sampling duration"),
+    interval_ms: float = Query(default=PROFILER_INTERVAL * 1000, ge=1, le=1000, description="Sampling interval"),
+    format: str = Query(default="collapsed", pattern="^(collapsed|json)$", description="collapsed (flamegraph.pl / speedscope) or json"),
+):
+    """Sample every thread's stack on the worker that answers, for N seconds (admin only)"""
+    try:
+        result = await asyncio.to_thread(sampling_profiler.sample, seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse(collapsed(result["stacks"]))
+    return {
+        "seconds": result["seconds"],
+        "interval_ms": result["interval_ms"],
+        "samples": result["samples"],
+        "top_functions": top_functions(result["stacks"]),
+        "collapsed": collapsed(result["stacks"]).splitlines(),
+    }
+
+@router.get("/profiles", summary="List Request Profiles", dependencies=[Depends(require_admin)])
+async def list_request_profiles():
+    """Requests profiled with the X-Profile: 1 header on this worker (admin only)"""
+    return {"profiles": request_profiles.list()}
+
+@router.get("/profiles/{request_id}", summary="Get Request Profile", dependencies=[Depends(require_admin)])
+async def get_request_profile(
+    request_id: str,
+    sort: str = Query(default="cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    limit: int = Query(default=40, ge=1, le=500),
+):
+    """cProfile report of one request; the ID is its X-Profile-ID response header (admin only)"""
+    profile = request_profiles.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile for request '{request_id}' on this worker")
+    return PlainTextResponse(stats_text(profile["stats"], sort, limit))
+
+@router.get("/loop-blocks", summary="Get Event Loop Stalls", dependencies=[Depends(require_admin)])
+async def get_loop_blocks(limit: int = Query(default=20, ge=1, le=200, description="Number of stalls")):
+    """Stacks captured while this worker's event loop was blocked beyond LOOP_BLOCK_THRESHOLD, newest first (admin only)"""
+    return {**loop_monitor.stats(), "recent": loop_monitor.recent_blocks(limit)}
+
+@router.get("/slow-requests", summary="Get Slow Requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(
+    limit: int = Query(default=50, ge=1, le=1000, description="Number of requests"),
+    route: Optional[str] = Query(default=None, description="Route template, e.g. /api/yargi/bedesten/search"),
+    tool: Optional[str] = Query(default=None, description="MCP tool name, e.g. search_sayistay_unified"),
+    min_duration_ms: float = Query(default=0, ge=0, description="Only requests at least this slow"),
+):
+    """Requests on this worker slower than SLOW_REQUEST_THRESHOLD, newest first, with tool parameters and phase timings (admin only)"""
+    return {
+        **slow_requests.stats(),
+        "requests": slow_requests.recent(limit, route, tool, min_duration_ms / 1000),
+    }
+
+@metrics_router.get("/metrics", summary="Prometheus Metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, tool, error, cache and concurrency metrics merged across every uvicorn worker"""
+    return PlainTextResponse(await metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _component_metrics():
+    """Gauges and counters read from the components' own stats"""
+    yield "mcp_tool_executions_in_flight", "gauge", {}, tool_executor.in_flight
+    yield "mcp_tool_executions_waiting", "gauge", {}, tool_executor.waiting
+    if EXECUTION_MODE == "pool":
+        pool = worker_pool.stats()
+        yield "mcp_tool_pool_idle_workers", "gauge", {}, pool["idle_workers"]
+        yield "mcp_tool_pool_waiting", "gauge", {}, pool["waiting"]
+    cache = tool_cache.stats()
+    for tool_name, counts in cache["per_tool"].items():
+        yield "tool_cache_hits_total", "counter", {"tool": tool_name}, counts["hits"]
+        yield "tool_cache_misses_total", "counter", {"tool": tool_name}, counts["misses"]
+    yield "tool_cache_entries", "gauge", {}, cache["entries"]
+    yield "tool_cache_bytes", "gauge", {}, cache["bytes"]
+    yield "document_store_hits_total", "counter", {}, document_store.hits
+    yield "document_store_misses_total", "counter", {}, document_store.misses
+    yield "request_coalescing_coalesced_total", "counter", {}, single_flight.coalesced
+    for name, breaker in circuit_breakers.stats()["breakers"].items():
+        yield "upstream_circuit_open", "gauge", {"upstream": name}, breaker["state"] == OPEN
+    yield "event_loop_blocks_total", "counter", {}, loop_monitor.blocked_total
+
+metrics.register_collector(_component_metrics)
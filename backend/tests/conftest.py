@@ -0,0 +1,10 @@
+"""
+Test configuration
+Puts backend/ on the import path; the modules import each other as top-level names
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,239 @@
+"""
+Circuit breaker state machine and the per-upstream call wrapper
+"""
+import asyncio
+import os
+
+import pytest
+
+import circuit_breaker
+import document_store
+import tool_cache
+import tool_executor
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from document_store import DocumentStore
+from error_handlers import GovernmentServerError
+from tool_pool import WorkerCrashedError, WorkerTimeoutError
+from tool_registry import tool_category
+from upstream_errors import UpstreamError, is_upstream_failure
+
+TOOL = "search_bedesten_unified"
+
+def _breaker(**overrides) -> CircuitBreaker:
+    settings = {"failure_threshold": 3, "slow_call_seconds": 10, "open_seconds": 30, "probes": 1, **overrides}
+    return CircuitBreaker("bedesten_unified", **settings)
+
+@pytest.fixture
+def breakers(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "BREAKER_ENABLED", True)
+    monkeypatch.setattr(circuit_breaker, "FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(circuit_breaker, "OPEN_SECONDS", 30)
+    monkeypatch.setattr(circuit_breaker, "HALF_OPEN_PROBES", 1)
+    return CircuitBreakers()
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker()
+    breaker.record(False, False, "e")
+    breaker.record(False, False, "e")
+    breaker.record(True, False)
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+    for _ in range(3):
+        breaker.record(False, False, "e")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+def test_half_open_admits_limited_probes():
+    breaker = _breaker(open_seconds=0, probes=1)
+    for _ in range(3):
+        breaker.record(False, False, "e")
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, True)
+    assert breaker.state == CLOSED
+    assert breaker.probes_in_flight == 0
+
+def test_failed_probe_reopens():
+    breaker = _breaker(open_seconds=0)
+    for _ in range(3):
+        breaker.record(False, False, "e")
+    assert breaker.allow()
+    breaker.record(False, True, "still down")
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    assert breaker.probes_in_flight == 0
+
+def test_released_probe_frees_its_slot():
+    breaker = _breaker(open_seconds=0)
+    for _ in range(3):
+        breaker.record(False, False, "e")
+    assert breaker.allow()
+    breaker.release(True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+def test_successful_health_probe_half_opens():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record(False, False, "e")
+    breaker.observe_probe(True)
+    assert breaker.state == HALF_OPEN
+
+def test_call_fails_fast_while_open(breakers):
+    calls = []
+
+    async def failing(tool_name, parameters):
+        calls.append(1)
+        raise ConnectionError("refused")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breakers.call(TOOL, {}, failing)
+        with pytest.raises(GovernmentServerError):
+            await breakers.call(TOOL, {}, failing)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert breakers.get("bedesten_unified").state == OPEN
+
+def test_local_errors_do_not_count(breakers):
+    async def limited(tool_name, parameters):
+        raise GovernmentServerError("bedesten_unified", "outbound rate limit reached")
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(GovernmentServerError):
+                await breakers.call(TOOL, {}, limited)
+
+    asyncio.run(run())
+    assert breakers.get("bedesten_unified").state == CLOSED
+
+def test_slow_calls_count_as_failures(breakers):
+    async def slow(tool_name, parameters):
+        await asyncio.sleep(0.02)
+        return "late"
+
+    async def run():
+        breakers.get("bedesten_unified").slow_call_seconds = 0.01
+        return [await breakers.call(TOOL, {}, slow) for _ in range(2)]
+
+    assert asyncio.run(run()) == ["late", "late"]
+    assert breakers.get("bedesten_unified").state == OPEN
+
+def test_cancelled_probe_is_released(breakers):
+    breaker = breakers.get("bedesten_unified")
+    breaker.open_seconds = 0
+    for _ in range(2):
+        breaker.record(False, False, "e")
+
+    async def hanging(tool_name, parameters):
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.ensure_future(breakers.call(TOOL, {}, hanging))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.state == HALF_OPEN
+    assert breaker.probes_in_flight == 0
+
+@pytest.mark.parametrize("error", [ValueError("bad karar_id"), KeyError("decisions"), TypeError("unexpected keyword")])
+def test_caller_errors_and_tool_bugs_do_not_count(breakers, error):
+    async def broken(tool_name, parameters):
+        raise error
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(type(error)):
+                await breakers.call(TOOL, {}, broken)
+
+    asyncio.run(run())
+    assert breakers.get("bedesten_unified").state == CLOSED
+
+def test_non_upstream_error_releases_a_probe(breakers):
+    breaker = breakers.get("bedesten_unified")
+    breaker.open_seconds = 0
+    for _ in range(2):
+        breaker.record(False, False, "e")
+
+    async def bad_request(tool_name, parameters):
+        raise ValueError("bad parameters")
+
+    with pytest.raises(ValueError):
+        asyncio.run(breakers.call(TOOL, {}, bad_request))
+    assert breaker.state == HALF_OPEN
+    assert breaker.probes_in_flight == 0
+
+@pytest.mark.parametrize("error", [
+    TimeoutError("read timed out"),
+    ConnectionResetError("reset by peer"),
+    UpstreamError("HTTP 503"),
+    WorkerTimeoutError("worker timed out after 60s"),
+])
+def test_upstream_failures_are_classified(error):
+    assert is_upstream_failure(error)
+
+def test_pool_checkout_timeout_is_not_an_upstream_failure():
+    assert not is_upstream_failure(WorkerCrashedError("No tool worker became available within 60s"))
+    assert not is_upstream_failure(RuntimeError("ValueError: Unknown tool"))
+
+def test_http_status_errors_count_only_for_5xx():
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("GET", "https://bedesten.adalet.gov.tr")
+
+    def status_error(code):
+        return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+    assert is_upstream_failure(status_error(502))
+    assert not is_upstream_failure(status_error(400))
+    assert is_upstream_failure(httpx.ConnectTimeout("timed out", request=request))
+
+def test_health_probe_failures_do_not_pile_up_across_successes():
+    breaker = _breaker()
+    for _ in range(10):
+        breaker.observe_probe(False, "timeout")
+        breaker.observe_probe(True)
+    assert breaker.state == CLOSED
+
+def test_consecutive_health_probe_failures_open():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.observe_probe(False, "timeout")
+    assert breaker.state == OPEN
+
+def test_probe_failures_and_call_failures_are_counted_apart():
+    breaker = _breaker()
+    breaker.record(False, False, "e")
+    breaker.record(False, False, "e")
+    breaker.observe_probe(False, "timeout")
+    assert breaker.state == CLOSED
+    assert (breaker.consecutive_failures, breaker.probe_failures) == (2, 1)
+
+def test_stored_document_is_served_while_the_circuit_is_open(breakers, tmp_path, monkeypatch):
+    store = DocumentStore(os.path.join(tmp_path, "documents.sqlite3"), 0, 0, 0)
+    monkeypatch.setattr(document_store, "document_store", store)
+    monkeypatch.setattr(document_store, "DOCUMENT_STORE_ENABLED", True)
+    monkeypatch.setattr(tool_executor, "circuit_breakers", breakers)
+    tool_cache.tool_cache.clear()
+    store.put("bedesten", "42", 1, {"markdown": "stored decision"})
+    breaker = breakers.get(tool_category("get_bedesten_document_markdown"))
+    for _ in range(2):
+        breaker.record(False, False, "down")
+    assert breaker.state == OPEN
+
+    async def run():
+        document = await tool_executor.execute_tool("get_bedesten_document_markdown", {"documentId": "42"})
+        with pytest.raises(GovernmentServerError):
+            await tool_executor.execute_tool("get_bedesten_document_markdown", {"documentId": "43"})
+        return document
+
+    try:
+        assert asyncio.run(run()) == {"markdown": "stored decision"}
+    finally:
+        tool_cache.tool_cache.clear()
+        store.close()
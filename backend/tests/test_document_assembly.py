@@ -0,0 +1,78 @@
+"""
+Assembling paginated documents: page validation and the page cap
+"""
+import asyncio
+import os
+
+import pytest
+
+import document_assembly
+import document_store
+import tool_cache
+from document_assembly import get_all_pages, stitch_pages
+from document_store import DocumentStore
+from error_handlers import ValidationError
+
+TOOL = "get_kik_document_markdown"
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = DocumentStore(os.path.join(tmp_path, "documents.sqlite3"), 0, 0, 0)
+    monkeypatch.setattr(document_store, "document_store", store)
+    monkeypatch.setattr(document_store, "DOCUMENT_STORE_ENABLED", True)
+    tool_cache.tool_cache.clear()
+    yield store
+    tool_cache.tool_cache.clear()
+    store.close()
+
+def _pages(monkeypatch, pages):
+    calls = []
+
+    async def execute_tool(tool_name, parameters):
+        calls.append(parameters["page_number"])
+        return pages[parameters["page_number"] - 1]
+
+    monkeypatch.setattr(document_assembly, "execute_tool", execute_tool)
+    return calls
+
+def test_pages_are_stitched_in_order():
+    document = stitch_pages([
+        {"markdown_chunk": "one", "total_pages": 2, "current_page": 1, "title": "Karar"},
+        {"markdown_chunk": "two", "total_pages": 2, "current_page": 2},
+    ])
+    assert document == {
+        "title": "Karar",
+        "markdown_chunk": "one" + document_assembly.PAGE_SEPARATOR + "two",
+        "total_pages": 2,
+        "all_pages": True,
+    }
+
+@pytest.mark.parametrize("bad_page", [{"error": "upstream failed"}, {"markdown_chunk": ""}, {}])
+def test_a_bad_later_page_fails_the_document(bad_page):
+    with pytest.raises((RuntimeError, ValueError), match="Page 3"):
+        stitch_pages([{"markdown_chunk": "one", "total_pages": 3}, {"markdown_chunk": "two"}, bad_page])
+
+def test_assembled_document_is_stored_and_cached(store, monkeypatch):
+    calls = _pages(monkeypatch, [{"markdown_chunk": "one", "total_pages": 2}, {"markdown_chunk": "two"}])
+    first = asyncio.run(get_all_pages(TOOL, {"karar_id": "9"}))
+    second = asyncio.run(get_all_pages(TOOL, {"karar_id": "9", "page_number": 5}))
+    assert first == second and first["total_pages"] == 2
+    assert calls == [1, 2]
+    assert store.get("kik", "9", document_assembly.ALL_PAGES) == first
+
+def test_failed_page_is_neither_stored_nor_cached(store, monkeypatch):
+    _pages(monkeypatch, [{"markdown_chunk": "one", "total_pages": 2}, {"error": "timeout"}])
+    with pytest.raises(RuntimeError):
+        asyncio.run(get_all_pages(TOOL, {"karar_id": "9"}))
+    assert store.stats()["documents"] == 0
+    assert tool_cache.tool_cache.stats()["entries"] == 0
+
+def test_documents_over_the_page_cap_are_refused(store, monkeypatch):
+    monkeypatch.setattr(document_assembly, "MAX_PAGES", 3)
+    calls = _pages(monkeypatch, [{"markdown_chunk": "one", "total_pages": 4}])
+    with pytest.raises(ValidationError, match="DOCUMENT_MAX_PAGES=3") as excinfo:
+        asyncio.run(get_all_pages(TOOL, {"karar_id": "9"}))
+    assert excinfo.value.status_code == 422
+    assert calls == [1]
+    assert store.stats()["documents"] == 0
+    assert tool_cache.tool_cache.stats()["entries"] == 0
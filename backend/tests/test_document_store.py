@@ -0,0 +1,99 @@
+"""
+Document store: content addressing, integrity checks and pruning
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+import document_store
+from document_store import DocumentStore, document_address, document_tool_call, stored_call
+
+@pytest.fixture
+def store(tmp_path):
+    store = DocumentStore(os.path.join(tmp_path, "documents.sqlite3"), max_age_days=0, max_bytes=0, prune_interval=0)
+    yield store
+    store.close()
+
+def _age(store: DocumentStore, doc_id: str, seconds: float):
+    store._connect().execute("UPDATE documents SET stored_at = ? WHERE doc_id = ?", (time.time() - seconds, doc_id))
+    store._connection.commit()
+
+def test_round_trip(store):
+    document = {"markdown": "Karar metni – İçtihat", "page": 1}
+    store.put("bedesten", "123", 1, document)
+    assert store.get("bedesten", "123", 1) == document
+    assert store.get("bedesten", "123", 2) is None
+    assert (store.hits, store.misses, store.writes) == (1, 1, 1)
+
+def test_identical_documents_share_a_blob(store):
+    store.put("bedesten", "1", 1, {"markdown": "same"})
+    store.put("bedesten", "2", 1, {"markdown": "same"})
+    stats = store.stats()
+    assert stats["documents"] == 2
+    assert stats["unique_blobs"] == 1
+
+def test_corrupt_blob_is_discarded(store):
+    store.put("bedesten", "1", 1, {"markdown": "x"})
+    connection = store._connect()
+    connection.execute("UPDATE blobs SET hash = 'bad'")
+    connection.execute("UPDATE documents SET hash = 'bad'")
+    connection.commit()
+    assert store.get("bedesten", "1", 1) is None
+    assert store.corrupt == 1
+    assert store.stats()["documents"] == 0
+
+def test_prune_removes_blobs_orphaned_by_replacement(store):
+    store.put("bedesten", "1", 1, {"markdown": "first version"})
+    store.put("bedesten", "1", 1, {"markdown": "second version"})
+    assert store.stats()["unique_blobs"] == 2
+    assert store.prune() == {"documents": 0, "blobs": 1}
+    assert store.get("bedesten", "1", 1) == {"markdown": "second version"}
+    assert store.stats()["unique_blobs"] == 1
+
+def test_prune_drops_expired_documents(store):
+    store.max_age_days = 1
+    store.put("bedesten", "old", 1, {"markdown": "old"})
+    store.put("bedesten", "new", 1, {"markdown": "new"})
+    _age(store, "old", 2 * 86400)
+    assert store.prune() == {"documents": 1, "blobs": 1}
+    assert store.get("bedesten", "old", 1) is None
+    assert store.get("bedesten", "new", 1) == {"markdown": "new"}
+
+def test_size_cap_prunes_oldest_first(store, monkeypatch):
+    monkeypatch.setattr(document_store, "PRUNE_BATCH", 1)
+    for index in range(10):
+        # Random-looking text so every blob compresses to roughly the same size
+        store.put("bedesten", str(index), 1, {"markdown": os.urandom(200).hex()})
+        _age(store, str(index), 100 - index)
+    per_document = store.stats()["stored_bytes"] / 10
+    store.max_bytes = int(per_document * 4.5)
+    result = store.prune()
+    stats = store.stats()
+    assert stats["stored_bytes"] <= store.max_bytes
+    assert result["documents"] == 6
+    assert [store.get("bedesten", str(index), 1) is not None for index in range(10)] == [False] * 6 + [True] * 4
+
+def test_address_and_tool_call_are_inverse():
+    address = document_address("get_sayistay_document_unified", {"decision_type": "genel_kurul", "decision_id": "42"})
+    assert address == ("sayistay", "genel_kurul/42", 1)
+    assert document_tool_call(*address) == ("get_sayistay_document_unified", {"decision_type": "genel_kurul", "decision_id": "42"})
+    assert document_address("search_mevzuat", {}) is None
+
+def test_stored_call_persists_documents_but_not_errors(store, monkeypatch):
+    monkeypatch.setattr(document_store, "document_store", store)
+    monkeypatch.setattr(document_store, "DOCUMENT_STORE_ENABLED", True)
+    responses = [{"error": "upstream failed"}, {"markdown": "ok"}]
+    calls = []
+
+    async def call(tool_name, parameters):
+        calls.append(parameters)
+        return responses[len(calls) - 1]
+
+    async def run():
+        parameters = {"documentId": "7"}
+        return [await stored_call("get_bedesten_document_markdown", parameters, call) for _ in range(3)]
+
+    assert asyncio.run(run()) == [{"error": "upstream failed"}, {"markdown": "ok"}, {"markdown": "ok"}]
+    assert len(calls) == 2
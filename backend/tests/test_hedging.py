@@ -0,0 +1,118 @@
+"""
+Latency histograms and hedged requests
+"""
+import asyncio
+import os
+
+import pytest
+
+import hedging
+from hedging import BUCKET_BOUNDS, Hedger, LatencyHistogram
+from rate_limiter import RateLimiter
+from tool_registry import tool_category
+
+TOOL = "search_bedesten_unified"
+
+@pytest.fixture
+def hedger(tmp_path, monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(hedging, "HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(hedging, "HEDGE_MIN_DELAY", 0.01)
+    limiter = RateLimiter(os.path.join(tmp_path, "rate_limits.sqlite3"), {})
+    monkeypatch.setattr(hedging, "rate_limiter", limiter)
+    hedger = Hedger()
+    # Five fast samples put the source's p95 in the 20ms bucket
+    for _ in range(5):
+        hedger.histogram(tool_category(TOOL)).observe(0.015)
+    yield hedger
+    limiter.close()
+
+def _slow_first(delays):
+    calls = []
+
+    async def call(tool_name, parameters):
+        index = len(calls)
+        calls.append(index)
+        await asyncio.sleep(delays[index])
+        return index
+
+    return call, calls
+
+def test_quantile_is_a_bucket_upper_bound():
+    histogram = LatencyHistogram(window=300)
+    assert histogram.quantile(0.95) is None
+    for seconds in (0.01, 0.01, 0.01, 1.0):
+        histogram.observe(seconds)
+    assert histogram.quantile(0.5) == BUCKET_BOUNDS[0]
+    assert 1.0 <= histogram.quantile(0.99) < 1.25
+
+def test_no_hedge_without_enough_history(hedger):
+    hedger.histograms.clear()
+    call, calls = _slow_first([0.05])
+    assert asyncio.run(hedger.call(TOOL, {}, call)) == 0
+    assert hedger.hedges == 0
+
+def test_non_idempotent_tools_are_never_hedged(hedger):
+    hedger.histogram(tool_category("check_government_servers_health"))
+    call, calls = _slow_first([0.1])
+    assert asyncio.run(hedger.call("check_government_servers_health", {}, call)) == 0
+    assert len(calls) == 1
+
+def test_slow_primary_is_hedged_and_the_hedge_wins(hedger):
+    call, calls = _slow_first([0.5, 0.01])
+    assert asyncio.run(hedger.call(TOOL, {}, call)) == 1
+    assert (hedger.hedges, hedger.hedge_wins) == (1, 1)
+
+def test_cancelled_primary_is_still_recorded(hedger):
+    histogram = hedger.histogram(tool_category(TOOL))
+    call, calls = _slow_first([0.5, 0.01])
+
+    async def run():
+        result = await hedger.call(TOOL, {}, call)
+        # Let the cancelled primary run its finally block
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(run()) == 1
+    # Five seeded samples, the winning hedge and the cancelled primary
+    assert histogram.count() == 7
+    assert histogram.quantile(1.0) >= 0.02
+
+def test_losing_hedge_is_not_recorded(hedger):
+    histogram = hedger.histogram(tool_category(TOOL))
+    call, calls = _slow_first([0.05, 0.5])
+
+    async def run():
+        result = await hedger.call(TOOL, {}, call)
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(run()) == 0
+    assert hedger.hedges == 1
+    assert histogram.count() == 6
+
+def test_failed_attempts_are_recorded(hedger):
+    hedger.histograms.clear()
+
+    async def failing(tool_name, parameters):
+        raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedger.call(TOOL, {}, failing))
+    assert hedger.histogram(tool_category(TOOL)).count() == 1
+
+def test_no_hedge_when_the_budget_is_spent(hedger):
+    hedger.tokens = 0
+    call, calls = _slow_first([0.05, 0.01])
+    assert asyncio.run(hedger.call(TOOL, {}, call)) == 0
+    assert len(calls) == 1
+    assert hedger.budget_exhausted == 1
+
+def test_no_hedge_without_a_free_rate_limit_token(hedger, monkeypatch):
+    async def no_token(name):
+        return False
+
+    monkeypatch.setattr(hedging.rate_limiter, "try_acquire_async", no_token)
+    call, calls = _slow_first([0.05, 0.01])
+    assert asyncio.run(hedger.call(TOOL, {}, call)) == 0
+    assert len(calls) == 1
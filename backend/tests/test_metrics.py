@@ -0,0 +1,112 @@
+"""
+Metrics registry: exposition format and merging workers through the shared file
+"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import metrics as metrics_module
+from metrics import MetricsRegistry, render_text
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, "metrics.sqlite3")
+
+def _registry(path: str, worker: str = None) -> MetricsRegistry:
+    registry = MetricsRegistry(path, flush_interval=0.01)
+    if worker is not None:
+        registry.worker = worker
+    return registry
+
+def _total(registry: MetricsRegistry, name: str) -> float:
+    return sum(value for row_name, _, _, value in registry.merged() if row_name == name)
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_histograms_are_cumulative():
+    registry = MetricsRegistry("", 5)
+    registry.observe("http_request_duration_seconds", 0.003, {"route": "/x"})
+    registry.observe("http_request_duration_seconds", 0.2, {"route": "/x"})
+    text = render_text(registry.samples())
+    assert 'http_request_duration_seconds_bucket{route="/x",le="0.005"} 1' in text
+    assert 'http_request_duration_seconds_bucket{route="/x",le="0.25"} 2' in text
+    assert 'http_request_duration_seconds_bucket{route="/x",le="+Inf"} 2' in text
+    assert 'http_request_duration_seconds_count{route="/x"} 2' in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+def test_ratios_are_computed_after_merging():
+    rows = [("tool_cache_hits_total", "", "counter", 3), ("tool_cache_misses_total", "", "counter", 1)]
+    assert "tool_cache_hit_ratio 0.75" in render_text(rows)
+
+def test_workers_are_summed(path):
+    first, second = _registry(path), _registry(path)
+    first.inc("http_requests_total", value=2)
+    second.inc("http_requests_total", value=3)
+    first.write(first.samples())
+    second.write(second.samples())
+    assert _total(first, "http_requests_total") == 5
+
+def test_stalled_worker_that_is_still_running_is_not_retired(path):
+    registry = _registry(path)
+    registry.inc("http_requests_total", value=100)
+    registry.write(registry.samples())
+    time.sleep(0.05)
+    assert _total(registry, "http_requests_total") == 100
+    workers = [row[0] for row in registry._connect().execute("SELECT worker FROM workers")]
+    assert workers == [registry.worker]
+
+def test_dead_worker_is_folded_into_retired(path):
+    live = _registry(path)
+    dead = _registry(path, worker=f"{_dead_pid()}-deadbeef")
+    dead.inc("http_requests_total", value=7)
+    dead.add("http_requests_in_flight", 2)
+    dead.write(dead.samples())
+    time.sleep(0.05)
+    assert _total(live, "http_requests_total") == 7
+    assert _total(live, "http_requests_in_flight") == 0
+    rows = {(worker, name): value for worker, name, value in live._connect().execute("SELECT worker, name, value FROM samples")}
+    assert rows == {("retired", "http_requests_total"): 7}
+
+def test_resumed_worker_writes_only_what_it_counted_since_retirement(path, monkeypatch):
+    registry = _registry(path)
+    registry.inc("http_requests_total", value=100)
+    registry.write(registry.samples())
+    time.sleep(0.05)
+    # Retired while stalled, e.g. by a scrape in another container that cannot see its pid
+    monkeypatch.setattr(metrics_module, "_pid_alive", lambda worker: False)
+    assert _total(registry, "http_requests_total") == 100
+    monkeypatch.undo()
+
+    registry.inc("http_requests_total")
+    registry.write(registry.samples())
+    assert _total(registry, "http_requests_total") == 101
+    registry.inc("http_requests_total")
+    registry.write(registry.samples())
+    assert _total(registry, "http_requests_total") == 102
+
+def test_new_server_run_starts_from_zero(path, monkeypatch):
+    previous = _registry(path)
+    previous.inc("http_requests_total", value=5)
+    previous.write(previous.samples())
+    previous._connection.close()
+
+    # Same run (another worker of this server): counters are merged
+    same = _registry(path)
+    same.inc("http_requests_total")
+    same.write(same.samples())
+    assert _total(same, "http_requests_total") == 6
+
+    monkeypatch.setattr(metrics_module, "_process_group", lambda: "restarted")
+    restarted = _registry(path)
+    restarted.inc("http_requests_total")
+    restarted.write(restarted.samples())
+    assert _total(restarted, "http_requests_total") == 1
+
+def test_default_path_is_next_to_the_module():
+    assert os.path.dirname(metrics_module.METRICS_PATH) == os.path.dirname(os.path.abspath(metrics_module.__file__))
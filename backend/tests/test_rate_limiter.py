@@ -0,0 +1,81 @@
+"""
+SQLite token buckets shared between workers
+"""
+import asyncio
+import os
+import threading
+
+import pytest
+
+import rate_limiter as rate_limiter_module
+from rate_limiter import RateLimiter, RateLimitExceeded, parse_limits
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, "rate_limits.sqlite3")
+
+def test_parse_limits():
+    assert parse_limits("mevzuat=2:5, bedesten_unified=5,") == {"mevzuat": (2.0, 5.0), "bedesten_unified": (5.0, 5.0)}
+
+def test_burst_is_granted_then_calls_queue(path):
+    limiter = RateLimiter(path, {"slow": (2, 3)})
+    assert [limiter.reserve("slow", 10) for _ in range(3)] == [0, 0, 0]
+    # Each further reservation queues half a second behind the previous one
+    waits = [limiter.reserve("slow", 10) for _ in range(2)]
+    assert waits[0] == pytest.approx(0.5, abs=0.05)
+    assert waits[1] == pytest.approx(1.0, abs=0.05)
+    limiter.close()
+
+def test_wait_beyond_deadline_is_rejected_without_taking_a_token(path):
+    limiter = RateLimiter(path, {"slow": (1, 1)})
+    limiter.reserve("slow", 0)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.reserve("slow", 0.5)
+    assert excinfo.value.retry_after == pytest.approx(1.0, abs=0.05)
+    assert limiter.rejected == 1
+    # The rejected call did not push later callers back
+    assert limiter.reserve("slow", 5) == pytest.approx(1.0, abs=0.05)
+    limiter.close()
+
+def test_workers_share_one_bucket(path):
+    first = RateLimiter(path, {"shared": (0.01, 2)})
+    second = RateLimiter(path, {"shared": (0.01, 2)})
+    first.reserve("shared", 0)
+    second.reserve("shared", 0)
+    with pytest.raises(RateLimitExceeded):
+        first.reserve("shared", 0)
+    first.close()
+    second.close()
+
+def test_concurrent_reservations_never_exceed_the_burst(path):
+    limiters = [RateLimiter(path, {"shared": (0.01, 5)}) for _ in range(4)]
+    granted = []
+    lock = threading.Lock()
+
+    def worker(limiter):
+        for _ in range(5):
+            try:
+                limiter.reserve("shared", 0)
+            except RateLimitExceeded:
+                continue
+            with lock:
+                granted.append(1)
+
+    threads = [threading.Thread(target=worker, args=(limiter,)) for limiter in limiters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(granted) == 5
+    for limiter in limiters:
+        limiter.close()
+
+def test_try_acquire_never_queues(path, monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, "RATE_LIMIT_ENABLED", True)
+    limiter = RateLimiter(path, {"slow": (0.01, 1)})
+
+    async def run():
+        return [await limiter.try_acquire_async("slow") for _ in range(2)]
+
+    assert asyncio.run(run()) == [True, False]
+    limiter.close()
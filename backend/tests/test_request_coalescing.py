@@ -0,0 +1,91 @@
+"""
+Single-flight request coalescing, including cancelled and failing callers
+"""
+import asyncio
+
+import pytest
+
+from request_coalescing import SingleFlight
+
+def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "upstream_calls": 1, "coalesced_calls": 4}
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def run():
+        return await asyncio.gather(flight.do("a", lambda: asyncio.sleep(0, "a")), flight.do("b", lambda: asyncio.sleep(0, "b")))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert flight.leaders == 2
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
+    assert finished == [1]
+
+def test_call_finishes_when_every_caller_is_cancelled():
+    flight = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.02)
+        finished.append(1)
+
+    async def run():
+        caller = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        return flight.stats()["in_flight"]
+
+    assert asyncio.run(run()) == 0
+    assert finished == [1]
+
+def test_failure_reaches_every_caller_and_is_not_kept():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(*[flight.do("k", failing) for _ in range(3)], return_exceptions=True)
+        # The next call after a failure starts over
+        retry = await asyncio.gather(flight.do("k", failing), return_exceptions=True)
+        return results, retry
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results + retry)
+    assert len(attempts) == 2
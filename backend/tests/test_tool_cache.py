@@ -0,0 +1,131 @@
+"""
+Tool result cache: LRU byte accounting and stale-while-revalidate
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+import tool_cache
+from tool_cache import ToolResultCache, cache_key, cached_call
+
+def _size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+@pytest.fixture
+def shared_cache():
+    tool_cache.tool_cache.clear()
+    tool_cache._refreshing.clear()
+    yield tool_cache.tool_cache
+    tool_cache.tool_cache.clear()
+    tool_cache._refreshing.clear()
+
+def test_total_bytes_tracks_entries():
+    cache = ToolResultCache(max_bytes=10_000, max_entries=100)
+    cache.set("a", {"text": "x" * 10}, ttl=60)
+    cache.set("b", ["ğüşiöç"], ttl=60)
+    assert cache.total_bytes == _size({"text": "x" * 10}) + _size(["ğüşiöç"])
+
+def test_overwriting_a_key_does_not_double_count():
+    cache = ToolResultCache(max_bytes=10_000, max_entries=100)
+    cache.set("a", "x" * 100, ttl=60)
+    cache.set("a", "y" * 10, ttl=60)
+    assert cache.total_bytes == _size("y" * 10)
+    assert cache.stats()["entries"] == 1
+
+def test_evicts_least_recently_used_over_the_byte_bound():
+    value = "x" * 100
+    cache = ToolResultCache(max_bytes=3 * _size(value), max_entries=100)
+    for key in ("a", "b", "c"):
+        cache.set(key, value, ttl=60)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a")[0] == "fresh"
+    cache.set("d", value, ttl=60)
+    assert cache.get("b") == (None, None)
+    assert cache.get("a")[0] == "fresh"
+    assert cache.evictions == 1
+    assert cache.total_bytes == 3 * _size(value)
+
+def test_entry_bound_evicts_too():
+    cache = ToolResultCache(max_bytes=10_000, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key, ttl=60)
+    assert cache.get("a") == (None, None)
+    assert cache.stats()["entries"] == 2
+
+def test_values_larger_than_the_cache_are_not_stored():
+    cache = ToolResultCache(max_bytes=50, max_entries=100)
+    cache.set("a", "x" * 100, ttl=60)
+    assert cache.get("a") == (None, None)
+    assert cache.total_bytes == 0
+
+def test_fresh_stale_and_expired_lookups():
+    cache = ToolResultCache(max_bytes=10_000, max_entries=100)
+    now = time.time()
+    cache._entries["stale"] = (now - 1, now + 60, 1, "v")
+    cache._entries["expired"] = (now - 2, now - 1, 1, "v")
+    cache.total_bytes = 2
+    assert cache.get("stale") == ("stale", "v")
+    assert cache.get("expired") == (None, None)
+    # Expired entries are dropped on lookup with their bytes
+    assert cache.total_bytes == 1
+
+def test_cache_key_folds_turkish_free_text():
+    assert cache_key("search_mevzuat", {"mevzuat_adi": "  İş   KANUNU "}) == cache_key("search_mevzuat", {"mevzuat_adi": "iş kanunu"})
+    assert cache_key("search_mevzuat", {"mevzuat_adi": "a", "page_number": None}) == cache_key("search_mevzuat", {"mevzuat_adi": "a"})
+
+def test_miss_then_hit(shared_cache):
+    calls = []
+
+    async def call(tool_name, parameters):
+        calls.append(parameters)
+        return {"results": [1]}
+
+    async def run():
+        first = await cached_call("search_mevzuat", {"mevzuat_adi": "a"}, call)
+        second = await cached_call("search_mevzuat", {"mevzuat_adi": "A"}, call)
+        return first, second
+
+    assert asyncio.run(run()) == ({"results": [1]}, {"results": [1]})
+    assert len(calls) == 1
+
+def test_stale_result_is_served_and_refreshed_once(shared_cache):
+    key = cache_key("search_mevzuat", {"mevzuat_adi": "a"})
+    now = time.time()
+    shared_cache._entries[key] = (now - 1, now + 600, 1, "old")
+    calls = []
+
+    async def call(tool_name, parameters):
+        calls.append(parameters)
+        await asyncio.sleep(0.01)
+        return "new"
+
+    async def run():
+        served = [await cached_call("search_mevzuat", {"mevzuat_adi": "a"}, call) for _ in range(3)]
+        await asyncio.gather(*tool_cache._refreshing.values())
+        return served
+
+    assert asyncio.run(run()) == ["old", "old", "old"]
+    assert len(calls) == 1
+    assert shared_cache.get(key) == ("fresh", "new")
+    assert shared_cache.stale_hits == 3
+    assert shared_cache.refreshes == 1
+
+def test_failed_refresh_keeps_serving_stale(shared_cache):
+    key = cache_key("search_mevzuat", {"mevzuat_adi": "a"})
+    now = time.time()
+    shared_cache._entries[key] = (now - 1, now + 600, 1, "old")
+
+    async def call(tool_name, parameters):
+        raise RuntimeError("upstream down")
+
+    async def run():
+        served = await cached_call("search_mevzuat", {"mevzuat_adi": "a"}, call)
+        await asyncio.gather(*tool_cache._refreshing.values())
+        return served
+
+    assert asyncio.run(run()) == "old"
+    assert shared_cache.refresh_failures == 1
+    assert shared_cache.get(key) == ("stale", "old")
+    assert not tool_cache._refreshing
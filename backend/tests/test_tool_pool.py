@@ -0,0 +1,93 @@
+"""
+Tool worker pool: real worker processes, crashes, replacement and recycling
+"""
+import time
+
+import pytest
+
+from tool_pool import ToolWorkerPool, WorkerCrashedError
+
+# No MCP tool is installed in the test environment, so calls answer with an error from the worker
+UNKNOWN_TOOL = "no_such_tool"
+
+@pytest.fixture
+def pool():
+    pool = ToolWorkerPool(size=1, max_calls_per_worker=100, call_timeout=10)
+    pool.start()
+    yield pool
+    pool.stop()
+
+def _round_trip(pool: ToolWorkerPool):
+    with pytest.raises(RuntimeError, match="no_such_tool"):
+        pool.call(UNKNOWN_TOOL, {})
+
+def _wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def _idle_workers(pool: ToolWorkerPool) -> list:
+    with pool._idle.mutex:
+        return list(pool._idle.queue)
+
+def test_worker_answers_over_the_protocol(pool):
+    _round_trip(pool)
+    (worker,) = _idle_workers(pool)
+    assert worker.calls == 1
+    assert pool.stats()["idle_workers"] == 1
+
+def test_worker_that_died_idle_is_replaced(pool):
+    (worker,) = _idle_workers(pool)
+    worker.process.kill()
+    worker.process.wait()
+    _round_trip(pool)
+    assert pool.crashed == 1
+    assert pool.spawned == 2
+    (replacement,) = _idle_workers(pool)
+    assert replacement.pid != worker.pid and replacement.alive()
+
+def test_crash_during_a_call_raises_and_respawns(pool, monkeypatch):
+    checkout = pool._checkout
+    crashed = []
+
+    def checkout_then_kill():
+        worker = checkout()
+        worker.process.kill()
+        worker.process.wait()
+        crashed.append(worker)
+        return worker
+
+    monkeypatch.setattr(pool, "_checkout", checkout_then_kill)
+    with pytest.raises(WorkerCrashedError):
+        pool.call(UNKNOWN_TOOL, {})
+    monkeypatch.undo()
+
+    _wait_for(lambda: pool.spawning == 0 and pool._idle.qsize() == 1)
+    _round_trip(pool)
+    (replacement,) = _idle_workers(pool)
+    assert replacement is not crashed[0]
+    assert pool.crashed == 1
+
+def test_worker_is_recycled_after_max_calls_without_blocking_callers():
+    pool = ToolWorkerPool(size=1, max_calls_per_worker=2, call_timeout=10)
+    pool.start()
+    try:
+        (first,) = _idle_workers(pool)
+        for _ in range(2):
+            _round_trip(pool)
+        # The replacement starts in the background; the old worker keeps serving meanwhile
+        started = time.monotonic()
+        _round_trip(pool)
+        assert time.monotonic() - started < 0.2
+        _wait_for(lambda: pool.spawning == 0 and not first.alive())
+        (current,) = _idle_workers(pool)
+        assert current is not first
+        assert pool.recycled == 1
+    finally:
+        pool.stop()
+
+def test_stop_terminates_idle_workers(pool):
+    workers = _idle_workers(pool)
+    pool.stop()
+    assert all(not worker.alive() for worker in workers)
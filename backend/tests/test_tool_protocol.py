@@ -0,0 +1,59 @@
+"""
+Framed wire protocol between the API and tool worker processes
+"""
+import io
+
+import pytest
+
+import tool_protocol
+from tool_protocol import HEADER, ProtocolError, decode_frame, encode_frame, read_frame, write_frame
+
+def test_round_trip_keeps_turkish_text():
+    message = {"tool": "search_mevzuat", "params": {"mevzuat_adi": "İş Kanunu", "page": 2}, "trace": None}
+    assert decode_frame(encode_frame(message)) == message
+
+def test_stream_carries_several_frames_then_ends_cleanly():
+    stream = io.BytesIO()
+    write_frame(stream, {"ready": True})
+    write_frame(stream, {"ok": True, "result": [1, 2, 3]})
+    stream.seek(0)
+    assert read_frame(stream) == {"ready": True}
+    assert read_frame(stream) == {"ok": True, "result": [1, 2, 3]}
+    assert read_frame(stream) is None
+
+def test_large_payloads_are_read_across_chunks():
+    message = {"markdown": "x" * (tool_protocol.READ_CHUNK_SIZE * 3 + 17)}
+    stream = io.BytesIO(encode_frame(message))
+    assert read_frame(stream) == message
+
+def test_truncated_header_is_an_error():
+    with pytest.raises(ProtocolError):
+        read_frame(io.BytesIO(encode_frame({"a": 1})[:3]))
+
+def test_truncated_payload_is_an_error():
+    frame = encode_frame({"a": "b" * 100})
+    with pytest.raises(ProtocolError):
+        read_frame(io.BytesIO(frame[:-10]))
+    with pytest.raises(ProtocolError):
+        decode_frame(frame[:-10])
+
+def test_oversized_frames_are_rejected_both_ways(monkeypatch):
+    monkeypatch.setattr(tool_protocol, "MAX_FRAME_SIZE", 64)
+    with pytest.raises(ProtocolError):
+        encode_frame({"markdown": "x" * 100})
+    # The length in the header is refused before any payload is read
+    header = HEADER.pack(tool_protocol.CODEC_JSON, 10 ** 9)
+    with pytest.raises(ProtocolError):
+        read_frame(io.BytesIO(header))
+
+def test_unknown_codec_is_an_error():
+    payload = b"{}"
+    with pytest.raises(ProtocolError):
+        decode_frame(HEADER.pack(b"x", len(payload)) + payload)
+
+def test_msgpack_frames_round_trip(monkeypatch):
+    pytest.importorskip("msgpack")
+    monkeypatch.setattr(tool_protocol, "WIRE_FORMAT", "msgpack")
+    frame = encode_frame({"result": b"bytes", "text": "ğüş"})
+    assert frame[:1] == tool_protocol.CODEC_MSGPACK
+    assert decode_frame(frame) == {"result": b"bytes", "text": "ğüş"}
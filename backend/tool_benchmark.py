@@ -0,0 +1,333 @@
+"""
+Tool Call Benchmark
+Breaks one MCP tool call into phases for every tool and execution engine
+
+Phases: temp-file write, interpreter spawn, module import, tool execution, serialization,
+transport (pipes and process exit) and response validation/encoding. Run against the mock
+upstream with zero latency to see the pure overhead of each engine:
+    MOCK_LATENCY_MEDIAN=0 python mock_upstream.py
+    MOCK_UPSTREAM_URL=http://localhost:8900 python tool_benchmark.py --iterations 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from mevzuat_endpoints import ArticleContentResponse, ArticleTreeResponse, MevzuatSearchResponse
+from tool_pool import CALL_TIMEOUT, WORKER_SCRIPT, _Worker
+from tool_protocol import decode_frame, encode_frame
+from tool_registry import TOOL_MAP, registry
+from yargi_endpoints import HealthResponse
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PHASES = ["temp_file", "spawn", "import", "execute", "serialize", "transport", "response"]
+
+# Representative parameters for each tool in TOOL_MAP
+SAMPLE_PARAMETERS: Dict[str, Dict[str, Any]] = {
+    "check_government_servers_health": {},
+    "search_bedesten_unified": {"phrase": "tazminat", "court_types": ["YARGITAYKARARI", "DANISTAYKARAR"], "pageNumber": 1},
+    "get_bedesten_document_markdown": {"documentId": "1234567"},
+    "search_emsal_detailed_decisions": {"keyword": "kira", "page_number": 1},
+    "get_emsal_document_markdown": {"id": "7654321"},
+    "search_anayasa_unified": {"decision_type": "bireysel_basvuru", "keywords": ["ifade özgürlüğü"], "page_to_fetch": 1},
+    "get_anayasa_document_unified": {"document_url": "https://kararlarbilgibankasi.anayasa.gov.tr/BB/2019/1", "page_number": 1},
+    "search_uyusmazlik_decisions": {"icerik": "görev"},
+    "get_uyusmazlik_document_markdown_from_url": {"document_url": "https://kararlar.uyusmazlik.gov.tr/Karar/Getir/1"},
+    "search_kik_decisions": {"karar_metni": "ihale", "page": 1},
+    "get_kik_document_markdown": {"karar_id": "kik1", "page_number": 1},
+    "search_rekabet_kurumu_decisions": {"PdfText": "birleşme", "page": 1},
+    "get_rekabet_kurumu_document": {"karar_id": "rekabet1", "page_number": 1},
+    "search_sayistay_unified": {"decision_type": "daire", "web_karar_metni": "kamu zararı"},
+    "get_sayistay_document_unified": {"decision_id": "sayistay1", "decision_type": "daire"},
+    "search_kvkk_decisions": {"keywords": "veri ihlali", "page": 1},
+    "get_kvkk_document_markdown": {"decision_url": "https://www.kvkk.gov.tr/Icerik/1", "page_number": 1},
+    "search_bddk_decisions": {"keywords": "faiz", "page": 1},
+    "get_bddk_document_markdown": {"document_id": "bddk1", "page_number": 1},
+    "search_mevzuat": {"mevzuat_adi": "borçlar", "page_number": 1, "page_size": 10},
+    "get_mevzuat_article_tree": {"mevzuat_id": "343829"},
+    "get_mevzuat_article_content": {"mevzuat_id": "343829", "madde_id": "2596801"},
+}
+
+# Response models the endpoints build from a tool result, as they build them
+RESPONSE_BUILDERS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Any]] = {
+    "check_government_servers_health": lambda result, params: HealthResponse(**result),
+    "search_mevzuat": lambda result, params: MevzuatSearchResponse(
+        results=result.get("results", []),
+        total_count=result.get("total_count", 0),
+        page_number=result.get("page_number", 1),
+        page_size=result.get("page_size", 10),
+        total_pages=result.get("total_pages", 0),
+        has_next=result.get("has_next", False),
+        has_previous=result.get("has_previous", False),
+    ),
+    "get_mevzuat_article_tree": lambda result, params: ArticleTreeResponse(
+        mevzuat_id=params["mevzuat_id"],
+        title=result.get("title", ""),
+        structure=result.get("structure", []),
+    ),
+    "get_mevzuat_article_content": lambda result, params: ArticleContentResponse(
+        mevzuat_id=params["mevzuat_id"],
+        madde_id=params["madde_id"],
+        title=result.get("title", ""),
+        content=result.get("content", ""),
+        markdown_content=result.get("markdown_content", ""),
+    ),
+}
+
+# The original call_mcp_tool: parameters in a temp file, a fresh interpreter, JSON on stdout
+TEMP_FILE_SCRIPT = """
+import time
+started = time.time()
+import json, sys
+sys.path.append('.')
+from {module} import {function} as tool_func
+imported = time.time()
+with open({temp_file!r}, 'r', encoding='utf-8') as f:
+    params = json.load(f)
+loaded = time.time()
+result = tool_func(**params)
+executed = time.time()
+output = json.dumps(result, ensure_ascii=False, indent=2)
+encoded = time.time()
+print(output)
+sys.stdout.flush()
+sys.stderr.write("\\n" + json.dumps({{"started": started, "imported": imported, "loaded": loaded, "executed": executed, "encoded": encoded}}))
+"""
+
+def _phases(values: Dict[str, float]) -> Dict[str, float]:
+    # Phases an engine does not have count as zero
+    return {phase: values.get(phase, 0.0) for phase in PHASES}
+
+def response_phase(tool_name: str, parameters: Dict[str, Any], result: Any) -> float:
+    """Pydantic validation and JSON encoding of the HTTP response, as FastAPI does it"""
+    started = time.perf_counter()
+    builder = RESPONSE_BUILDERS.get(tool_name)
+    content = builder(result, parameters) if builder else result
+    JSONResponse(jsonable_encoder(content)).body
+    return time.perf_counter() - started
+
+# ENGINES
+def run_temp_file(tool_name: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, float]:
+    """Per-call interpreter reading a temp file and printing JSON (the original implementation)"""
+    module, function = TOOL_MAP[tool_name]
+    t0 = time.time()
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(parameters, f, ensure_ascii=False)
+        temp_file = f.name
+    t1 = time.time()
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", TEMP_FILE_SCRIPT.format(module=module, function=function, temp_file=temp_file)],
+            capture_output=True, text=True, encoding="utf-8", cwd=BACKEND_DIR,
+        )
+        t2 = time.time()
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "tool failed")
+        result = json.loads(completed.stdout)
+        t3 = time.time()
+    finally:
+        os.unlink(temp_file)
+    marks = json.loads(completed.stderr.strip().splitlines()[-1])
+    return _phases({
+        "temp_file": (t1 - t0) + (marks["loaded"] - marks["imported"]),
+        "spawn": marks["started"] - t1,
+        "import": marks["imported"] - marks["started"],
+        "execute": marks["executed"] - marks["loaded"],
+        "serialize": (marks["encoded"] - marks["executed"]) + (t3 - t2),
+        "transport": t2 - marks["encoded"],
+        "response": response_phase(tool_name, parameters, result),
+    })
+
+def run_subprocess(tool_name: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, float]:
+    """Per-call tool_worker.py --once over the framed protocol (MCP_TOOL_EXECUTION_MODE=subprocess)"""
+    request = {"tool": tool_name, "params": parameters}
+    t0 = time.time()
+    frame = encode_frame(request)
+    t1 = time.time()
+    completed = subprocess.run([sys.executable, WORKER_SCRIPT, "--once"], input=frame, capture_output=True, cwd=BACKEND_DIR)
+    t2 = time.time()
+    response = decode_frame(completed.stdout)
+    t3 = time.time()
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error"))
+    timings = response["timings"]
+    # The worker's own encoding of the result, replayed here
+    replay = time.perf_counter()
+    encode_frame(response)
+    serialize = (t1 - t0) + (t3 - t2) + (time.perf_counter() - replay)
+    spawn = timings["process_started"] - t1
+    imports = timings["bootstrap"] + timings["import"]
+    return _phases({
+        "spawn": spawn,
+        "import": imports,
+        "execute": timings["execute"],
+        "serialize": serialize,
+        "transport": max(0.0, (t3 - t0) - spawn - imports - timings["execute"] - serialize),
+        "response": response_phase(tool_name, parameters, response["result"]),
+    })
+
+def run_pool(tool_name: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, float]:
+    """Call on a warm, pre-imported worker process (MCP_TOOL_EXECUTION_MODE=pool)"""
+    worker = context.get("worker")
+    if worker is None or not worker.alive():
+        worker = context["worker"] = _Worker()
+    started = time.perf_counter()
+    response = worker.request(tool_name, parameters, CALL_TIMEOUT)
+    total = time.perf_counter() - started
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error"))
+    timings = response["timings"]
+    # Request and response frames are encoded and decoded once each; replay them for the split
+    replay = time.perf_counter()
+    decode_frame(encode_frame({"tool": tool_name, "params": parameters}))
+    decode_frame(encode_frame(response))
+    serialize = time.perf_counter() - replay
+    return _phases({
+        "import": timings["import"],
+        "execute": timings["execute"],
+        "serialize": serialize,
+        "transport": max(0.0, total - timings["import"] - timings["execute"] - serialize),
+        "response": response_phase(tool_name, parameters, response["result"]),
+    })
+
+def run_inprocess(tool_name: str, parameters: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, float]:
+    """Registry call on an executor thread (MCP_TOOL_EXECUTION_MODE=inprocess)"""
+    threads = context.setdefault("threads", ThreadPoolExecutor(max_workers=1))
+
+    def call():
+        started = time.perf_counter()
+        func = registry.get(tool_name)
+        imported = time.perf_counter()
+        result = func(**parameters)
+        return result, imported - started, time.perf_counter() - imported
+
+    started = time.perf_counter()
+    result, imports, execute = threads.submit(call).result()
+    total = time.perf_counter() - started
+    return _phases({
+        "import": imports,
+        "execute": execute,
+        "transport": max(0.0, total - imports - execute),
+        "response": response_phase(tool_name, parameters, result),
+    })
+
+ENGINES: Dict[str, Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, float]]] = {
+    "temp_file": run_temp_file,
+    "subprocess": run_subprocess,
+    "pool": run_pool,
+    "inprocess": run_inprocess,
+}
+
+def benchmark_tool(engine: str, tool_name: str, iterations: int, context: Dict[str, Any]) -> Dict[str, Any]:
+    """Median and p95 of each phase over repeated calls of one tool"""
+    samples: List[Dict[str, float]] = []
+    errors: List[str] = []
+    for _ in range(iterations):
+        try:
+            samples.append(ENGINES[engine](tool_name, SAMPLE_PARAMETERS.get(tool_name, {}), context))
+        except Exception as e:
+            errors.append(f"{e.__class__.__name__}: {e}"[:200])
+    result: Dict[str, Any] = {"calls": len(samples), "errors": len(errors)}
+    if errors:
+        result["last_error"] = errors[-1]
+    if samples:
+        result["median_ms"] = {phase: _ms(statistics.median(s[phase] for s in samples)) for phase in PHASES}
+        totals = sorted(sum(s.values()) for s in samples)
+        result["total_ms"] = {
+            "median": _ms(statistics.median(totals)),
+            "p95": _ms(totals[min(len(totals) - 1, int(0.95 * len(totals)))]),
+        }
+        # Everything but the tool itself
+        result["overhead_ms"] = _ms(statistics.median(sum(s.values()) - s["execute"] for s in samples))
+    return result
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def print_table(report: Dict[str, Any]):
+    header = f"{'tool':<42} {'engine':<11}" + "".join(f"{phase:>10}" for phase in PHASES) + f"{'total':>10}{'overhead':>10}"
+    print(header)
+    for tool_name, engines in report["tools"].items():
+        for engine, result in engines.items():
+            if "median_ms" not in result:
+                print(f"{tool_name:<42} {engine:<11} failed: {result.get('last_error')}")
+                continue
+            phases = "".join(f"{result['median_ms'][phase]:>10.2f}" for phase in PHASES)
+            print(f"{tool_name:<42} {engine:<11}{phases}{result['total_ms']['median']:>10.2f}{result['overhead_ms']:>10.2f}")
+    print()
+    for engine, summary in report["summary"].items():
+        if summary["median_overhead_ms"] is None:
+            print(f"{engine:<11} median overhead per call: n/a, every call failed ({summary['errors']} errors)")
+            continue
+        errors = f", {summary['errors']} failed calls" if summary["errors"] else ""
+        print(f"{engine:<11} median overhead per call: {summary['median_overhead_ms']:.2f} ms over {summary['tools']} tools{errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-phase cost of an MCP tool call for every tool and engine")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"Comma-separated engines ({', '.join(ENGINES)})")
+    parser.add_argument("--tools", default="", help="Comma-separated tool names (default: every tool in TOOL_MAP)")
+    parser.add_argument("--iterations", type=int, default=10, help="Calls per tool and engine")
+    parser.add_argument("--output", default="", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"Unknown engines: {', '.join(unknown)}")
+    tools = [name.strip() for name in args.tools.split(",") if name.strip()] or list(TOOL_MAP)
+
+    report: Dict[str, Any] = {
+        "started_at": datetime.now().isoformat(),
+        "iterations": args.iterations,
+        "phases": PHASES,
+        "tools": {},
+        "summary": {},
+    }
+    contexts: Dict[str, Dict[str, Any]] = {engine: {} for engine in engines}
+    try:
+        for tool_name in tools:
+            report["tools"][tool_name] = {
+                engine: benchmark_tool(engine, tool_name, args.iterations, contexts[engine]) for engine in engines
+            }
+    finally:
+        for context in contexts.values():
+            if "worker" in context:
+                context["worker"].stop()
+            if "threads" in context:
+                context["threads"].shutdown(wait=False)
+
+    for engine in engines:
+        overheads = [
+            engines_result[engine]["overhead_ms"]
+            for engines_result in report["tools"].values()
+            if "overhead_ms" in engines_result[engine]
+        ]
+        report["summary"][engine] = {
+            "tools": len(overheads),
+            "median_overhead_ms": round(statistics.median(overheads), 3) if overheads else None,
+            "errors": sum(engines_result[engine]["errors"] for engines_result in report["tools"].values()),
+        }
+
+    print_table(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}")
+
+    failed = [engine for engine, summary in report["summary"].items() if summary["median_overhead_ms"] is None]
+    if failed:
+        print(f"Every call failed for: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
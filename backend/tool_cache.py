@@ -0,0 +1,253 @@
+"""
+MCP Tool Result Cache
+In-memory LRU cache for tool results with per-tool TTLs, stale-while-revalidate and canonical cache keys
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from tool_registry import TOOL_MAP
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("MCP_CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_BYTES = int(os.getenv("MCP_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_MAX_ENTRIES = int(os.getenv("MCP_CACHE_MAX_ENTRIES", 10000))
+
+SEARCH_TTL = float(os.getenv("MCP_CACHE_TTL_SEARCH", 600))
+DOCUMENT_TTL = float(os.getenv("MCP_CACHE_TTL_DOCUMENT", 86400))
+HEALTH_TTL = float(os.getenv("MCP_CACHE_TTL_HEALTH", 30))
+SEARCH_GRACE = float(os.getenv("MCP_CACHE_GRACE_SEARCH", 86400))
+
+def _default_ttl(tool_name: str) -> float:
+    if tool_name.startswith("search_"):
+        return SEARCH_TTL
+    if tool_name.startswith("get_"):
+        return DOCUMENT_TTL
+    return HEALTH_TTL
+
+# Seconds a tool result stays fresh
+TOOL_TTLS: Dict[str, float] = {name: _default_ttl(name) for name in TOOL_MAP}
+
+# Seconds past freshness a result is still served while it is refreshed in the background
+TOOL_GRACE: Dict[str, float] = {name: SEARCH_GRACE for name in TOOL_MAP if name.startswith("search_")}
+
+# Free-text parameters that get Turkish case folding and whitespace collapsing
+FREE_TEXT_FIELDS = {
+    "phrase", "keyword", "keywords", "keywords_all", "keywords_any", "mevzuat_adi",
+    "icerik", "hepsi", "herhangi_birisi", "tumce", "wild_card", "not_hepsi",
+    "karar_metni", "basvuru_sahibi", "ihaleyi_yapan_idare", "basvuru_konusu_ihale",
+    "sayfaAdi", "PdfText", "karar_tamami", "web_karar_metni", "temyiz_karar",
+}
+
+# Tool name -> parameter defaults applied before building cache keys
+TOOL_DEFAULTS: Dict[str, Dict[str, Any]] = {}
+
+def register_tool_defaults(tool_name: str, defaults: Dict[str, Any]):
+    """Record the parameter defaults a tool is called with"""
+    TOOL_DEFAULTS.setdefault(tool_name, {}).update(defaults)
+
+def model_defaults(model) -> Dict[str, Any]:
+    """Defaults of every optional field on a pydantic request model"""
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+
+def turkish_casefold(text: str) -> str:
+    """Lowercase with Turkish dotted/dotless i rules and collapsed whitespace"""
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    return " ".join(text.split())
+
+def _fold(value: Any) -> Any:
+    if isinstance(value, str):
+        return turkish_casefold(value)
+    if isinstance(value, list):
+        return [_fold(item) for item in value]
+    return value
+
+def normalize_parameters(tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill defaults, drop unset values and fold free-text fields"""
+    normalized = {**TOOL_DEFAULTS.get(tool_name, {}), **parameters}
+    return {
+        key: _fold(value) if key in FREE_TEXT_FIELDS else value
+        for key, value in sorted(normalized.items())
+        if value is not None
+    }
+
+def cache_key(tool_name: str, parameters: Dict[str, Any]) -> str:
+    """Canonical key for a tool call"""
+    canonical = json.dumps(
+        normalize_parameters(tool_name, parameters),
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return f"{tool_name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+class ToolResultCache:
+    """Byte-bounded LRU store with fresh/stale lookups and hit/miss counters per tool"""
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # key -> (fresh_until, stale_until, size, value)
+        self._entries: "OrderedDict[str, Tuple[float, float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        # Keys warmed by the prefetcher that no request has read yet
+        self._prefetched: set = set()
+        self.prefetch_hits = 0
+
+    def get(self, key: str) -> Tuple[Optional[str], Any]:
+        """Return ("fresh" | "stale" | None, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            fresh_until, stale_until, _, value = entry
+            now = time.time()
+            if stale_until <= now:
+                self._remove(key)
+                return None, None
+            self._entries.move_to_end(key)
+            return ("fresh" if fresh_until > now else "stale"), value
+
+    def set(self, key: str, value: Any, ttl: float, grace: float = 0):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            now = time.time()
+            self._entries[key] = (now + ttl, now + ttl + grace, size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+        self._prefetched.discard(key)
+
+    def mark_prefetched(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._prefetched.add(key)
+
+    def claim_prefetched(self, key: str):
+        """Count a request served by a prefetched entry (once per prefetch)"""
+        with self._lock:
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.prefetch_hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._prefetched.clear()
+            self.total_bytes = 0
+
+    def record(self, tool_name: str, hit: bool):
+        counters = self.hits if hit else self.misses
+        counters[tool_name] = counters.get(tool_name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hits": hits,
+            "misses": misses,
+            "stale_hits": self.stale_hits,
+            "background_refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "prefetch_hits": self.prefetch_hits,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "per_tool": {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+tool_cache = ToolResultCache(CACHE_MAX_BYTES, CACHE_MAX_ENTRIES)
+
+# Keys currently being refreshed in the background, with their tasks
+_refreshing: Dict[str, asyncio.Task] = {}
+
+async def _refresh(
+    tool_name: str,
+    parameters: Dict[str, Any],
+    call: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    key: str,
+):
+    try:
+        value = await call(tool_name, parameters)
+        tool_cache.set(key, value, TOOL_TTLS.get(tool_name, SEARCH_TTL), TOOL_GRACE.get(tool_name, 0))
+        tool_cache.refreshes += 1
+    except Exception as e:
+        # The stale entry keeps being served until its grace window ends
+        tool_cache.refresh_failures += 1
+        logger.warning(f"Background refresh of '{tool_name}' failed: {e}")
+    finally:
+        _refreshing.pop(key, None)
+
+async def cached_call(
+    tool_name: str,
+    parameters: Dict[str, Any],
+    call: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    ttl: Optional[float] = None,
+    key: Optional[str] = None,
+) -> Any:
+    """Serve a tool call from cache, or run it and cache the result
+
+    Stale results inside the tool's grace window are returned immediately
+    and refreshed in the background.
+    """
+    if not CACHE_ENABLED:
+        return await call(tool_name, parameters)
+
+    key = key or cache_key(tool_name, parameters)
+    with tracer.span("cache.lookup") as span:
+        state, value = tool_cache.get(key)
+        span.set(state=state or "miss")
+    tool_cache.record(tool_name, state is not None)
+    if state is not None:
+        tool_cache.claim_prefetched(key)
+    if state == "fresh":
+        return value
+    if state == "stale":
+        tool_cache.stale_hits += 1
+        if key not in _refreshing:
+            _refreshing[key] = asyncio.get_running_loop().create_task(
+                _refresh(tool_name, parameters, call, key)
+            )
+        return value
+
+    value = await call(tool_name, parameters)
+    tool_cache.set(
+        key, value,
+        TOOL_TTLS.get(tool_name, SEARCH_TTL) if ttl is None else ttl,
+        TOOL_GRACE.get(tool_name, 0),
+    )
+    return value
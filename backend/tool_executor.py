@@ -0,0 +1,148 @@
+"""
+MCP Tool Executor
+Runs tool calls off the asyncio event loop with bounded concurrency
+"""
+import asyncio
+import contextvars
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from circuit_breaker import circuit_breakers
+from document_store import stored_call
+from error_handlers import GovernmentServerError
+from hedging import hedger
+from metrics import metrics
+from rate_limiter import RateLimitExceeded, rate_limiter
+from request_coalescing import single_flight
+from slow_requests import slow_requests
+from tool_cache import cache_key, cached_call
+from tool_registry import EXECUTION_MODE, run_tool, run_tool_in_subprocess, tool_category
+from tracing import tracer
+
+MAX_CONCURRENT_TOOL_CALLS = int(os.getenv("MCP_MAX_CONCURRENT_TOOL_CALLS", 16))
+
+class ToolExecutor:
+    """Bounds concurrent tool calls and keeps blocking work on executor threads"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._threads = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="mcp-tool")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _release(self):
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+    def _release_when_done(self, future, loop: asyncio.AbstractEventLoop):
+        # A running thread cannot be interrupted, so its slot stays taken until it returns
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                pass  # Loop already closed at shutdown
+        future.add_done_callback(done)
+
+    async def execute(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
+        """Run a tool without stalling the event loop"""
+        self.waiting += 1
+        try:
+            with tracer.span("executor.queue"):
+                await self._get_semaphore().acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        outcome = "error"
+        future = None
+        try:
+            with tracer.span("tool.execute", tool=tool_name, mode=EXECUTION_MODE):
+                if EXECUTION_MODE == "subprocess":
+                    result = await run_tool_in_subprocess(tool_name, parameters)
+                else:
+                    # The copied context carries the active span onto the executor thread
+                    context = contextvars.copy_context()
+                    future = self._threads.submit(context.run, run_tool, tool_name, parameters)
+                    result = await asyncio.wrap_future(future)
+            self.completed += 1
+            outcome = "ok"
+            return result
+        except asyncio.CancelledError:
+            self.failed += 1
+            outcome = "cancelled"
+            raise
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            if future is not None and not future.done():
+                # Cancelled (e.g. a losing hedge) while its thread is still running
+                self._release_when_done(future, asyncio.get_running_loop())
+            else:
+                self._release()
+            metrics.inc("mcp_tool_executions_total", {"tool": tool_name, "outcome": outcome})
+            metrics.observe("mcp_tool_execution_duration_seconds", time.perf_counter() - started, {"tool": tool_name})
+
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency and completion counters"""
+        return {
+            "execution_mode": EXECUTION_MODE,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False)
+
+tool_executor = ToolExecutor(MAX_CONCURRENT_TOOL_CALLS)
+
+# Set by callers that already took the upstream's rate limit token without queueing (prefetches)
+rate_token_held: contextvars.ContextVar[bool] = contextvars.ContextVar("rate_token_held", default=False)
+
+async def _hedged(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    category = tool_category(tool_name)
+    if not rate_token_held.get():
+        try:
+            with tracer.span("rate_limit.wait", upstream=category):
+                await rate_limiter.acquire_async(category)
+        except RateLimitExceeded as e:
+            raise GovernmentServerError(category, f"outbound rate limit reached, retry in {math.ceil(e.retry_after)}s")
+    return await hedger.call(tool_name, parameters, tool_executor.execute)
+
+async def _upstream(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    return await circuit_breakers.call(tool_name, parameters, _hedged)
+
+async def _fetch(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    return await stored_call(tool_name, parameters, _upstream)
+
+async def execute_tool(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    """Run an MCP tool through request coalescing, the result cache, the document store, its circuit breaker, the rate limiter, hedging and the executor"""
+    key = cache_key(tool_name, parameters)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracer.span("tool.call", tool=tool_name):
+            result = await single_flight.do(key, lambda: cached_call(tool_name, parameters, _fetch, key=key))
+        outcome = "ok"
+        return result
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.inc("mcp_tool_calls_total", {"tool": tool_name, "outcome": outcome})
+        metrics.observe("mcp_tool_call_duration_seconds", elapsed, {"tool": tool_name})
+        slow_requests.note_tool_call(tool_name, parameters, elapsed, outcome)
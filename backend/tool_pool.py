@@ -0,0 +1,271 @@
+"""
+MCP Tool Worker Pool
+Fixed-size pool of long-lived, pre-imported tool worker processes
+"""
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+from tool_protocol import ProtocolError, encode_frame, read_frame
+from tracing import tracer
+from upstream_errors import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("MCP_TOOL_POOL_SIZE", 4))
+MAX_CALLS_PER_WORKER = int(os.getenv("MCP_TOOL_POOL_MAX_CALLS", 500))
+CALL_TIMEOUT = float(os.getenv("MCP_TOOL_CALL_TIMEOUT", 60))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_worker.py")
+
+class WorkerCrashedError(RuntimeError):
+    """Raised when a worker process dies or stops responding mid-call"""
+
+class WorkerTimeoutError(WorkerCrashedError):
+    """A call outlived the call timeout and its worker was killed; most likely a hung upstream"""
+
+    upstream = True
+
+class _Worker:
+    """A single tool worker process speaking the framed tool protocol"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self.calls = 0
+        # Set once a replacement is being started / has joined the pool
+        self.retiring = False
+        self.replaced = False
+        try:
+            ready = read_frame(self.process.stdout)
+        except ProtocolError:
+            ready = None
+        if not ready:
+            self.process.kill()
+            raise WorkerCrashedError("Tool worker exited during startup")
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, tool_name: str, parameters: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        frame = encode_frame({"tool": tool_name, "params": parameters, "trace": tracer.context()})
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            self.process.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            self.process.stdin.write(frame)
+            self.process.stdin.flush()
+            response = read_frame(self.process.stdout)
+        except (OSError, ProtocolError) as e:
+            if not timed_out.is_set():
+                self.process.kill()
+                raise WorkerCrashedError(f"worker {self.pid} pipe error: {e}")
+            response = None
+        finally:
+            timer.cancel()
+
+        if response is None:
+            if timed_out.is_set():
+                raise WorkerTimeoutError(f"worker {self.pid} timed out after {timeout:.0f}s")
+            try:
+                code = self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                code = None
+            raise WorkerCrashedError(f"worker {self.pid} closed its output (exit code {code})")
+
+        self.calls += 1
+        return response
+
+    def stop(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+
+class ToolWorkerPool:
+    """Dispatches tool calls to idle workers, recycling and respawning them as needed"""
+
+    def __init__(self, size: int, max_calls_per_worker: int, call_timeout: float):
+        self.size = size
+        self.max_calls_per_worker = max_calls_per_worker
+        self.call_timeout = call_timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        # Callers blocked until a worker is idle (queue depth)
+        self.waiting = 0
+        self._waiting_lock = threading.Lock()
+        self.spawned = 0
+        self.recycled = 0
+        self.crashed = 0
+        # Replacement workers starting in the background
+        self.spawning = 0
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker()
+        self.spawned += 1
+        return worker
+
+    def _replace(self, worker: _Worker):
+        """Start a worker for this one's slot on a background thread, so no caller waits for the spawn
+
+        A worker due for recycling keeps serving until its replacement is ready;
+        a dead worker's slot stays empty until then.
+        """
+        recycling = worker.alive()
+
+        def run():
+            if not recycling:
+                worker.stop()
+            try:
+                replacement = self._spawn()
+            except Exception as e:
+                logger.error(f"Could not respawn tool worker: {e}")
+                time.sleep(1)
+                replacement = None
+            with self._lock:
+                self.spawning -= 1
+                if self._started:
+                    if replacement is not None:
+                        worker.replaced = True
+                        self._idle.put(replacement)
+                        if recycling and self._take_idle(worker):
+                            self._retire(worker)
+                    elif recycling:
+                        # Keep the old worker; its next checkin schedules another attempt
+                        worker.retiring = False
+                    else:
+                        # Keep the dead worker in its slot; the next checkout schedules another spawn
+                        self._idle.put(worker)
+                    return
+            if replacement is not None:
+                replacement.stop()
+
+        with self._lock:
+            self.spawning += 1
+        worker.retiring = True
+        threading.Thread(target=run, name="tool-worker-spawn", daemon=True).start()
+
+    def _take_idle(self, worker: _Worker) -> bool:
+        """Remove a specific worker from the idle queue; False while it is checked out"""
+        with self._idle.mutex:
+            try:
+                self._idle.queue.remove(worker)
+            except ValueError:
+                return False
+            return True
+
+    @staticmethod
+    def _retire(worker: _Worker):
+        threading.Thread(target=worker.stop, name="tool-worker-stop", daemon=True).start()
+
+    def start(self):
+        """Spawn all workers; each pre-imports the full tool map"""
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+            self._started = True
+        logger.info(f"Tool worker pool started with {self.size} workers")
+
+    def stop(self):
+        """Stop every idle worker"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+            self._started = False
+
+    def _checkout(self) -> _Worker:
+        deadline = time.monotonic() + self.call_timeout
+        while True:
+            try:
+                worker = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise WorkerCrashedError(f"No tool worker became available within {self.call_timeout:.0f}s")
+            if worker.replaced:
+                self._retire(worker)
+                continue
+            if worker.alive():
+                return worker
+            self.crashed += 1
+            logger.warning(f"Tool worker {worker.pid} died while idle, respawning")
+            self._replace(worker)
+
+    def _checkin(self, worker: _Worker):
+        if worker.replaced:
+            self._retire(worker)
+            return
+        if worker.alive() and worker.calls >= self.max_calls_per_worker and not worker.retiring:
+            self.recycled += 1
+            self._replace(worker)
+        self._idle.put(worker)
+
+    def call(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
+        """Run a tool on the next idle worker (blocks while all workers are busy)"""
+        if not self._started:
+            self.start()
+
+        with self._waiting_lock:
+            self.waiting += 1
+        try:
+            with tracer.span("pool.checkout"):
+                worker = self._checkout()
+        finally:
+            with self._waiting_lock:
+                self.waiting -= 1
+        try:
+            with tracer.span("pool.request", worker=worker.pid):
+                response = worker.request(tool_name, parameters, self.call_timeout)
+        except WorkerCrashedError as e:
+            self.crashed += 1
+            logger.warning(f"Tool worker crashed while running '{tool_name}': {e}")
+            self._replace(worker)
+            raise
+        except BaseException:
+            self._checkin(worker)
+            raise
+        self._checkin(worker)
+
+        tracer.attach(response.get("spans", []))
+        if not response.get("ok"):
+            error = UpstreamError if response.get("upstream") else RuntimeError
+            raise error(response.get("error", "Unknown tool worker error"))
+        return response["result"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration and lifecycle counters"""
+        return {
+            "size": self.size,
+            "idle_workers": self._idle.qsize(),
+            "waiting": self.waiting,
+            "max_calls_per_worker": self.max_calls_per_worker,
+            "call_timeout": self.call_timeout,
+            "spawned": self.spawned,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+            "spawning": self.spawning,
+        }
+
+worker_pool = ToolWorkerPool(POOL_SIZE, MAX_CALLS_PER_WORKER, CALL_TIMEOUT)
@@ -0,0 +1,105 @@
+"""
+MCP Tool Wire Protocol
+Length-prefixed frames exchanged with tool worker processes over stdin/stdout
+"""
+import json
+import logging
+import os
+import struct
+from typing import Any, BinaryIO, Optional
+
+from tracing import tracer
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Frame header: 1-byte codec id + 4-byte big-endian payload length
+HEADER = struct.Struct(">cI")
+CODEC_JSON = b"j"
+CODEC_MSGPACK = b"m"
+
+WIRE_FORMAT = os.getenv("MCP_TOOL_WIRE_FORMAT", "json").lower()
+MAX_FRAME_SIZE = int(os.getenv("MCP_TOOL_MAX_FRAME_SIZE", 64 * 1024 * 1024))
+READ_CHUNK_SIZE = 64 * 1024
+
+if WIRE_FORMAT == "msgpack" and msgpack is None:
+    logger.warning("MCP_TOOL_WIRE_FORMAT=msgpack but msgpack is not installed, using JSON")
+
+class ProtocolError(RuntimeError):
+    """Raised on truncated, oversized or undecodable frames"""
+
+def _default_codec() -> bytes:
+    if WIRE_FORMAT == "msgpack" and msgpack is not None:
+        return CODEC_MSGPACK
+    return CODEC_JSON
+
+def encode_frame(obj: Any) -> bytes:
+    """Serialize an object into a single frame"""
+    codec = _default_codec()
+    if codec == CODEC_MSGPACK:
+        payload = msgpack.packb(obj, use_bin_type=True)
+    else:
+        payload = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds limit of {MAX_FRAME_SIZE}")
+    return HEADER.pack(codec, len(payload)) + payload
+
+def _decode_payload(codec: bytes, payload: bytes) -> Any:
+    if codec == CODEC_JSON:
+        return json.loads(payload.decode("utf-8"))
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ProtocolError("Received a msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    raise ProtocolError(f"Unknown frame codec {codec!r}")
+
+def _parse_header(header: bytes) -> tuple:
+    codec, size = HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {size} bytes exceeds limit of {MAX_FRAME_SIZE}")
+    return codec, size
+
+def _read_exactly(stream: BinaryIO, size: int, allow_eof: bool = False) -> Optional[bytes]:
+    # Large payloads are pulled in bounded chunks into one preallocated buffer
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        chunk = stream.read(min(READ_CHUNK_SIZE, size - received))
+        if not chunk:
+            if allow_eof and received == 0:
+                return None
+            raise ProtocolError(f"Stream closed after {received} of {size} bytes")
+        view[received:received + len(chunk)] = chunk
+        received += len(chunk)
+    return bytes(buffer)
+
+def write_frame(stream: BinaryIO, obj: Any):
+    """Encode and write one frame, then flush"""
+    stream.write(encode_frame(obj))
+    stream.flush()
+
+def read_frame(stream: BinaryIO) -> Any:
+    """Read one frame; returns None on a clean end of stream"""
+    header = _read_exactly(stream, HEADER.size, allow_eof=True)
+    if header is None:
+        return None
+    codec, size = _parse_header(header)
+    payload = _read_exactly(stream, size)
+    with tracer.span("frame.decode", bytes=size):
+        return _decode_payload(codec, payload)
+
+def decode_frame(data: bytes) -> Any:
+    """Decode a single frame held in memory"""
+    if len(data) < HEADER.size:
+        raise ProtocolError(f"Expected a frame, got {len(data)} bytes")
+    codec, size = _parse_header(data[:HEADER.size])
+    payload = data[HEADER.size:HEADER.size + size]
+    if len(payload) != size:
+        raise ProtocolError(f"Frame truncated after {len(payload)} of {size} bytes")
+    with tracer.span("frame.decode", bytes=size):
+        return _decode_payload(codec, payload)
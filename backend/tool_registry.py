@@ -0,0 +1,190 @@
+"""
+MCP Tool Registry
+Imports yargi-mcp and mevzuat-mcp tool functions once and dispatches calls by name
+"""
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from tool_pool import WORKER_SCRIPT, worker_pool
+from tool_protocol import decode_frame, encode_frame
+from tracing import tracer
+from upstream_errors import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+# Execution mode: "inprocess" (default), "pool" (isolated warm workers) or "subprocess" (one interpreter per call)
+EXECUTION_MODE = os.getenv("MCP_TOOL_EXECUTION_MODE", "inprocess").lower()
+
+YARGI_TOOL_NAMES = [
+    "check_government_servers_health",
+    "search_bedesten_unified",
+    "get_bedesten_document_markdown",
+    "search_emsal_detailed_decisions",
+    "get_emsal_document_markdown",
+    "search_anayasa_unified",
+    "get_anayasa_document_unified",
+    "search_uyusmazlik_decisions",
+    "get_uyusmazlik_document_markdown_from_url",
+    "search_kik_decisions",
+    "get_kik_document_markdown",
+    "search_rekabet_kurumu_decisions",
+    "get_rekabet_kurumu_document",
+    "search_sayistay_unified",
+    "get_sayistay_document_unified",
+    "search_kvkk_decisions",
+    "get_kvkk_document_markdown",
+    "search_bddk_decisions",
+    "get_bddk_document_markdown",
+]
+
+MEVZUAT_TOOL_NAMES = [
+    "search_mevzuat",
+    "get_mevzuat_article_tree",
+    "get_mevzuat_article_content",
+]
+
+def _tool_entries(server: str, names: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Build tool name -> (module, function) entries for an MCP server"""
+    return {name: (f"mcp__{server}__{name}", f"mcp__{server}__{name}") for name in names}
+
+# Local mock upstream (mock_upstream.py) that replaces the government servers when set
+MOCK_UPSTREAM_URL = os.getenv("MOCK_UPSTREAM_URL", "")
+
+# Tool name -> (module path, function name)
+TOOL_MAP: Dict[str, Tuple[str, str]] = {
+    **_tool_entries("yargi_mcp", YARGI_TOOL_NAMES),
+    **_tool_entries("mevzuat_mcp", MEVZUAT_TOOL_NAMES),
+}
+if MOCK_UPSTREAM_URL:
+    TOOL_MAP = {name: ("mock_tools", name) for name in TOOL_MAP}
+
+# Upstream category of each tool, as listed by /api/yargi/tools
+TOOL_CATEGORIES: Dict[str, str] = {
+    "check_government_servers_health": "health",
+    "search_bedesten_unified": "bedesten_unified",
+    "get_bedesten_document_markdown": "bedesten_unified",
+    "search_emsal_detailed_decisions": "emsal",
+    "get_emsal_document_markdown": "emsal",
+    "search_anayasa_unified": "anayasa",
+    "get_anayasa_document_unified": "anayasa",
+    "search_uyusmazlik_decisions": "uyusmazlik",
+    "get_uyusmazlik_document_markdown_from_url": "uyusmazlik",
+    "search_kik_decisions": "kik",
+    "get_kik_document_markdown": "kik",
+    "search_rekabet_kurumu_decisions": "rekabet",
+    "get_rekabet_kurumu_document": "rekabet",
+    "search_sayistay_unified": "sayistay",
+    "get_sayistay_document_unified": "sayistay",
+    "search_kvkk_decisions": "kvkk",
+    "get_kvkk_document_markdown": "kvkk",
+    "search_bddk_decisions": "bddk",
+    "get_bddk_document_markdown": "bddk",
+    **{name: "mevzuat" for name in MEVZUAT_TOOL_NAMES},
+}
+
+def tool_category(tool_name: str) -> str:
+    """Upstream category a tool talks to"""
+    return TOOL_CATEGORIES.get(tool_name, tool_name)
+
+class ToolRegistry:
+    """Holds imported MCP tool functions and dispatches calls by tool name"""
+
+    def __init__(self, tool_map: Dict[str, Tuple[str, str]]):
+        self.tool_map = dict(tool_map)
+        self._functions: Dict[str, Callable[..., Any]] = {}
+        self._import_errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _import(self, tool_name: str) -> Callable[..., Any]:
+        module_name, function_name = self.tool_map[tool_name]
+        module = importlib.import_module(module_name)
+        return getattr(module, function_name)
+
+    def load(self) -> Dict[str, bool]:
+        """Import every registered tool once; failures are recorded, not raised"""
+        for tool_name in self.tool_map:
+            try:
+                self.get(tool_name)
+            except Exception as e:
+                logger.warning(f"Could not import MCP tool '{tool_name}': {e}")
+        logger.info(f"Tool registry loaded {len(self._functions)}/{len(self.tool_map)} tools")
+        return {name: name in self._functions for name in self.tool_map}
+
+    def get(self, tool_name: str) -> Callable[..., Any]:
+        """Return the tool function, importing it on first use"""
+        if tool_name not in self.tool_map:
+            raise ValueError(f"Unknown tool: {tool_name}")
+        func = self._functions.get(tool_name)
+        if func is not None:
+            return func
+        with self._lock:
+            if tool_name not in self._functions:
+                try:
+                    self._functions[tool_name] = self._import(tool_name)
+                    self._import_errors.pop(tool_name, None)
+                except Exception as e:
+                    self._import_errors[tool_name] = str(e)
+                    raise
+            return self._functions[tool_name]
+
+    def call(self, tool_name: str, parameters: Dict[str, Any]) -> Any:
+        """Execute a tool in the current process"""
+        return self.get(tool_name)(**parameters)
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded/failed tool summary"""
+        status = {
+            "execution_mode": EXECUTION_MODE,
+            "mock_upstream": MOCK_UPSTREAM_URL or None,
+            "registered_tools": len(self.tool_map),
+            "loaded_tools": sorted(self._functions),
+            "import_errors": dict(self._import_errors),
+        }
+        if EXECUTION_MODE == "pool":
+            status["worker_pool"] = worker_pool.stats()
+        return status
+
+registry = ToolRegistry(TOOL_MAP)
+
+async def run_tool_in_subprocess(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    """Execute a tool in a fresh interpreter (isolation mode) without blocking the event loop"""
+    if tool_name not in TOOL_MAP:
+        raise ValueError(f"Unknown tool: {tool_name}")
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, WORKER_SCRIPT, "--once",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        frame = encode_frame({"tool": tool_name, "params": parameters, "trace": tracer.context()})
+        stdout, stderr = await process.communicate(frame)
+    except asyncio.CancelledError:
+        # Abandoned call (e.g. a losing hedge): do not leave the interpreter running
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0 or not stdout:
+        raise RuntimeError(f"MCP tool error: {stderr.decode('utf-8', errors='replace')}")
+
+    response = decode_frame(stdout)
+    tracer.attach(response.get("spans", []))
+    if not response.get("ok"):
+        error = UpstreamError if response.get("upstream") else RuntimeError
+        raise error(response.get("error", "Unknown tool error"))
+    return response["result"]
+
+def run_tool(tool_name: str, parameters: Dict[str, Any]) -> Any:
+    """Execute a tool in-process or on the worker pool (blocking; call from an executor thread)"""
+    if EXECUTION_MODE == "pool":
+        if tool_name not in TOOL_MAP:
+            raise ValueError(f"Unknown tool: {tool_name}")
+        return worker_pool.call(tool_name, parameters)
+    return registry.call(tool_name, parameters)
@@ -0,0 +1,62 @@
+"""
+MCP Tool Worker
+Tool worker process: pre-imports every MCP tool and serves framed calls over stdin/stdout
+
+Run with --once to serve a single call (subprocess isolation mode).
+"""
+import time
+
+# Wall-clock start of this interpreter, so callers can measure spawn cost
+PROCESS_STARTED = time.time()
+
+import os
+import sys
+
+sys.path.append('.')
+
+from tool_protocol import ProtocolError, read_frame, write_frame
+from tool_registry import registry
+from tracing import tracer
+from upstream_errors import is_upstream_failure
+
+def serve(once: bool = False):
+    # Time spent importing the protocol and registry modules
+    bootstrap = time.time() - PROCESS_STARTED
+    protocol_in = sys.stdin.buffer
+    protocol_out = sys.stdout.buffer
+    # Anything a tool prints must not end up in the protocol stream
+    sys.stdout = sys.stderr
+
+    if not once:
+        registry.load()
+        write_frame(protocol_out, {"ready": True, "pid": os.getpid()})
+
+    while True:
+        request = read_frame(protocol_in)
+        if request is None:
+            break
+        # Spans recorded here join the caller's trace through the response
+        with tracer.remote(request.get("trace")) as spans:
+            try:
+                started = time.perf_counter()
+                func = registry.get(request["tool"])
+                imported = time.perf_counter()
+                with tracer.span("worker.execute", tool=request["tool"], pid=os.getpid()):
+                    result = func(**request.get("params", {}))
+                timings = {"import": imported - started, "execute": time.perf_counter() - imported}
+                if once:
+                    timings.update(process_started=PROCESS_STARTED, bootstrap=bootstrap)
+                response = {"ok": True, "result": result, "timings": timings}
+            except Exception as e:
+                response = {"ok": False, "error": f"{e.__class__.__name__}: {e}", "upstream": is_upstream_failure(e)}
+        if spans:
+            response["spans"] = spans
+        try:
+            write_frame(protocol_out, response)
+        except (TypeError, ValueError, ProtocolError) as e:
+            write_frame(protocol_out, {"ok": False, "error": f"Tool result could not be encoded: {e}"})
+        if once:
+            break
+
+if __name__ == "__main__":
+    serve(once="--once" in sys.argv[1:])
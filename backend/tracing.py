@@ -0,0 +1,293 @@
+"""
+Request Tracing
+Lightweight spans per request, propagated through the cache, executor, tool workers and upstream calls
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 500))
+# JSON lines file every finished trace is appended to (empty: in-memory only)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 1000))
+
+class Span:
+    """A timed operation inside a trace"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "duration", "attributes", "_started")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan:
+    """Stands in for a span when no trace is active"""
+
+    span_id = None
+
+    def set(self, **attributes):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    """Spans recorded for one request; spans ending after the root are dropped"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Dict[str, Any]] = []
+        self.root: Optional[Span] = None
+        self.closed = False
+        self.dropped = 0
+
+    def add(self, span: Dict[str, Any]):
+        if self.closed:
+            return
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Milliseconds spent per span name (overlapping and nested spans each count in full)"""
+        totals: Dict[str, float] = {}
+        for span in list(self.spans):
+            totals[span["name"]] = totals.get(span["name"], 0) + (span["duration"] or 0)
+        return {name: round(seconds * 1000, 2) for name, seconds in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Trace with span offsets relative to the request start, in milliseconds"""
+        root = self.root.to_dict()
+        spans = []
+        for span in sorted(self.spans, key=lambda s: s["start"]):
+            spans.append({
+                "name": span["name"],
+                "span_id": span["span_id"],
+                "parent_id": span["parent_id"],
+                "offset_ms": round((span["start"] - root["start"]) * 1000, 2),
+                "duration_ms": round((span["duration"] or 0) * 1000, 2),
+                "attributes": span["attributes"],
+            })
+        return {
+            "trace_id": self.trace_id,
+            "span_id": root["span_id"],
+            "name": root["name"],
+            "start": datetime.fromtimestamp(root["start"]).isoformat(),
+            "duration_ms": round((root["duration"] or 0) * 1000, 2),
+            "attributes": root["attributes"],
+            "breakdown_ms": self.breakdown(),
+            "dropped_spans": self.dropped,
+            "spans": spans,
+        }
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+class MemoryExporter:
+    """Keeps the most recent finished traces of this worker"""
+
+    def __init__(self, size: int):
+        self.traces: Deque[Trace] = deque(maxlen=size)
+
+    def export(self, trace: Trace):
+        self.traces.append(trace)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        for trace in reversed(self.traces):
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def slowest(self, limit: int, min_duration: float = 0) -> List[Trace]:
+        traces = [t for t in list(self.traces) if (t.root.duration or 0) >= min_duration]
+        return sorted(traces, key=lambda t: t.root.duration or 0, reverse=True)[:limit]
+
+class FileExporter:
+    """Appends finished traces as JSON lines from a background thread, off the event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def export(self, trace: Trace):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-file-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+class Tracer:
+    """Opens request traces and child spans; the active span follows asyncio tasks and copied contexts"""
+
+    def __init__(self, enabled: bool, exporters: List[Any]):
+        self.enabled = enabled
+        self.exporters = exporters
+        self.memory = next((e for e in exporters if isinstance(e, MemoryExporter)), None)
+        self.traces = 0
+
+    @contextmanager
+    def trace(self, name: str, trace_id: str, **attributes) -> Iterator[Any]:
+        """Root span of a request; exports the trace when it ends"""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        trace = Trace(trace_id)
+        root = Span(name, None, attributes)
+        trace.root = root
+        trace_token = _trace.set(trace)
+        span_token = _span.set(root)
+        try:
+            yield root
+        finally:
+            root.finish()
+            trace.closed = True
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+            self.traces += 1
+            for exporter in self.exporters:
+                try:
+                    exporter.export(trace)
+                except Exception as e:
+                    logger.warning(f"Trace exporter {exporter.__class__.__name__} failed: {e}")
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Any]:
+        """Child of the active span; a no-op outside a trace"""
+        trace = _trace.get()
+        if trace is None or trace.closed:
+            yield NOOP_SPAN
+            return
+        parent = _span.get()
+        span = Span(name, parent.span_id if parent else None, attributes)
+        token = _span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=e.__class__.__name__)
+            raise
+        finally:
+            span.finish()
+            _span.reset(token)
+            trace.add(span.to_dict())
+
+    def record(self, name: str, duration: float, **attributes):
+        """Add a span that has just ended after the given number of seconds"""
+        trace = _trace.get()
+        if trace is None or trace.closed:
+            return
+        parent = _span.get()
+        span = Span(name, parent.span_id if parent else None, attributes)
+        span.start = time.time() - duration
+        span.duration = duration
+        trace.add(span.to_dict())
+
+    def context(self) -> Optional[Dict[str, str]]:
+        """Trace and span IDs to hand to a tool worker process"""
+        trace, span = _trace.get(), _span.get()
+        if trace is None or trace.closed:
+            return None
+        return {"trace_id": trace.trace_id, "parent_id": span.span_id if span else None}
+
+    def breakdown(self) -> Dict[str, float]:
+        """Per-phase milliseconds of the active trace so far"""
+        trace = _trace.get()
+        return trace.breakdown() if trace is not None else {}
+
+    def attach(self, spans: List[Dict[str, Any]]):
+        """Add spans recorded by a tool worker to the active trace"""
+        trace = _trace.get()
+        if trace is None:
+            return
+        for span in spans:
+            trace.add(span)
+
+    @contextmanager
+    def remote(self, context: Optional[Dict[str, str]]) -> Iterator[List[Dict[str, Any]]]:
+        """Continue a caller's trace inside a tool worker, collecting its spans for the response"""
+        if not context:
+            yield []
+            return
+        trace = Trace(context["trace_id"])
+        parent = Span("remote", None, {})
+        parent.span_id = context.get("parent_id")
+        trace_token = _trace.set(trace)
+        span_token = _span.set(parent)
+        try:
+            yield trace.spans
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+
+    def close(self):
+        for exporter in self.exporters:
+            if isinstance(exporter, FileExporter):
+                exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "traces": self.traces,
+            "buffered": len(self.memory.traces) if self.memory else 0,
+            "file": TRACE_FILE or None,
+        }
+
+def _exporters() -> List[Any]:
+    exporters: List[Any] = [MemoryExporter(TRACE_BUFFER_SIZE)]
+    if TRACE_FILE:
+        exporters.append(FileExporter(TRACE_FILE))
+    return exporters
+
+tracer = Tracer(TRACING_ENABLED, _exporters())
@@ -0,0 +1,42 @@
+"""
+Upstream Errors
+Tells failures of a government server apart from bad requests, tool bugs and local limits
+"""
+from typing import Optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+class UpstreamError(RuntimeError):
+    """A tool call failed because the upstream server did (also re-raised for failures inside tool workers)"""
+
+    upstream = True
+
+def _status_code(error: BaseException) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Timeouts, connection errors and 5xx responses; anything else says nothing about the upstream's health"""
+    if getattr(error, "upstream", False):
+        return True
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if httpx is not None:
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+    if requests is not None:
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError):
+            return (_status_code(error) or 0) >= 500
+    return False
@@ -3,15 +3,23 @@ Yargi-MCP REST API Endpoints
 Exposes 38+ Turkish legal database tools as REST endpoints
 """
 from fastapi import APIRouter, HTTPException, Query, Body
-from typing import Optional, List, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
-import subprocess
 import json
-import tempfile
-import os
 
-router = APIRouter(prefix="/api/yargi", tags=["Yargi MCP Tools"])
+from tool_cache import model_defaults, register_tool_defaults
+from error_handlers import APIError, TracedRoute
+from tool_executor import execute_tool
+from tool_registry import TOOL_CATEGORIES, YARGI_TOOL_NAMES
+from prefetch import prefetcher
+from federated_search import federated_search, stream_federated_search
+from health_prober import health_prober
+from document_assembly import get_all_pages
+from batch_documents import MAX_BATCH_SIZE, SOURCE_CONCURRENCY, deduplicate, fetch_documents, stream_documents
+
+router = APIRouter(prefix="/api/yargi", tags=["Yargi MCP Tools"], route_class=TracedRoute)
 
 # Pydantic models for request/response validation
 class HealthResponse(BaseModel):
@@ -124,71 +132,76 @@ class SearchBddkRequest(BaseModel):
     keywords: str = Field(..., description="Search keywords")
     page: int = Field(default=1, ge=1, description="Page number")
 
+class FederatedSearchRequest(BaseModel):
+    query: str = Field(..., description="Turkish search query sent to every court")
+    sources: List[str] = Field(default=[], description="Sources to search (empty = all)")
+    page: int = Field(default=1, ge=1, description="Page number requested from each source")
+    timeout: Optional[float] = Field(default=None, gt=0, le=60, description="Per-source timeout in seconds (default adapts to each server's probed latency)")
+    sort: Literal["relevance", "date"] = Field(default="relevance", description="Merged ordering: relevance or date")
+    limit: Optional[int] = Field(default=None, ge=1, description="Maximum merged results to return")
+    anayasa_decision_type: str = Field(default="bireysel_basvuru", description="Anayasa decision type: norm_denetimi or bireysel_basvuru")
+    sayistay_decision_type: str = Field(default="daire", description="Sayıştay decision type: genel_kurul, temyiz_kurulu, or daire")
+
+class DocumentReference(BaseModel):
+    source: str = Field(..., description="Document source: bedesten, emsal, anayasa, uyusmazlik, kik, rekabet, sayistay, kvkk, bddk or mevzuat")
+    id: str = Field(..., description="Document id or URL (sayistay: decision_type/decision_id, mevzuat: mevzuat_id/madde_id)")
+    page: int = Field(default=1, ge=1, description="Page number for paginated sources")
+
+class BatchDocumentsRequest(BaseModel):
+    documents: List[DocumentReference] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Documents to fetch")
+    concurrency: int = Field(default=SOURCE_CONCURRENCY, ge=1, le=16, description="Concurrent upstream fetches per source")
+
+# Parameter defaults used to build canonical cache keys
+for _tool_name, _model in {
+    "search_bedesten_unified": SearchBedestenRequest,
+    "search_emsal_detailed_decisions": SearchEmsalRequest,
+    "search_anayasa_unified": SearchAnayasaRequest,
+    "search_uyusmazlik_decisions": SearchUyusmazlikRequest,
+    "search_kik_decisions": SearchKikRequest,
+    "search_rekabet_kurumu_decisions": SearchRekabetRequest,
+    "search_sayistay_unified": SearchSayistayRequest,
+    "search_kvkk_decisions": SearchKvkkRequest,
+    "search_bddk_decisions": SearchBddkRequest,
+}.items():
+    register_tool_defaults(_tool_name, model_defaults(_model))
+
+for _tool_name in [
+    "get_anayasa_document_unified",
+    "get_kik_document_markdown",
+    "get_rekabet_kurumu_document",
+    "get_kvkk_document_markdown",
+    "get_bddk_document_markdown",
+]:
+    register_tool_defaults(_tool_name, {"page_number": 1})
+
 # Helper function to call MCP tools
 async def call_mcp_tool(tool_name: str, parameters: dict) -> dict:
-    """Call MCP tool via command line interface"""
+    """Call MCP tool through the shared tool executor"""
     try:
-        # Create temporary file with parameters
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(parameters, f)
-            temp_file = f.name
-        
-        # Call the MCP tool
-        cmd = ["python", "-c", f"""
-import sys
-import json
-sys.path.append('.')
-
-# Import the specific MCP function based on tool name
-tool_map = {{
-    'check_government_servers_health': 'from mcp__yargi_mcp__check_government_servers_health import mcp__yargi_mcp__check_government_servers_health as tool_func',
-    'search_bedesten_unified': 'from mcp__yargi_mcp__search_bedesten_unified import mcp__yargi_mcp__search_bedesten_unified as tool_func',
-    'get_bedesten_document_markdown': 'from mcp__yargi_mcp__get_bedesten_document_markdown import mcp__yargi_mcp__get_bedesten_document_markdown as tool_func',
-    'search_emsal_detailed_decisions': 'from mcp__yargi_mcp__search_emsal_detailed_decisions import mcp__yargi_mcp__search_emsal_detailed_decisions as tool_func',
-    'get_emsal_document_markdown': 'from mcp__yargi_mcp__get_emsal_document_markdown import mcp__yargi_mcp__get_emsal_document_markdown as tool_func',
-    'search_anayasa_unified': 'from mcp__yargi_mcp__search_anayasa_unified import mcp__yargi_mcp__search_anayasa_unified as tool_func',
-    'get_anayasa_document_unified': 'from mcp__yargi_mcp__get_anayasa_document_unified import mcp__yargi_mcp__get_anayasa_document_unified as tool_func',
-    'search_uyusmazlik_decisions': 'from mcp__yargi_mcp__search_uyusmazlik_decisions import mcp__yargi_mcp__search_uyusmazlik_decisions as tool_func',
-    'get_uyusmazlik_document_markdown_from_url': 'from mcp__yargi_mcp__get_uyusmazlik_document_markdown_from_url import mcp__yargi_mcp__get_uyusmazlik_document_markdown_from_url as tool_func',
-    'search_kik_decisions': 'from mcp__yargi_mcp__search_kik_decisions import mcp__yargi_mcp__search_kik_decisions as tool_func',
-    'get_kik_document_markdown': 'from mcp__yargi_mcp__get_kik_document_markdown import mcp__yargi_mcp__get_kik_document_markdown as tool_func',
-    'search_rekabet_kurumu_decisions': 'from mcp__yargi_mcp__search_rekabet_kurumu_decisions import mcp__yargi_mcp__search_rekabet_kurumu_decisions as tool_func',
-    'get_rekabet_kurumu_document': 'from mcp__yargi_mcp__get_rekabet_kurumu_document import mcp__yargi_mcp__get_rekabet_kurumu_document as tool_func',
-    'search_sayistay_unified': 'from mcp__yargi_mcp__search_sayistay_unified import mcp__yargi_mcp__search_sayistay_unified as tool_func',
-    'get_sayistay_document_unified': 'from mcp__yargi_mcp__get_sayistay_document_unified import mcp__yargi_mcp__get_sayistay_document_unified as tool_func',
-    'search_kvkk_decisions': 'from mcp__yargi_mcp__search_kvkk_decisions import mcp__yargi_mcp__search_kvkk_decisions as tool_func',
-    'get_kvkk_document_markdown': 'from mcp__yargi_mcp__get_kvkk_document_markdown import mcp__yargi_mcp__get_kvkk_document_markdown as tool_func',
-    'search_bddk_decisions': 'from mcp__yargi_mcp__search_bddk_decisions import mcp__yargi_mcp__search_bddk_decisions as tool_func',
-    'get_bddk_document_markdown': 'from mcp__yargi_mcp__get_bddk_document_markdown import mcp__yargi_mcp__get_bddk_document_markdown as tool_func',
-}}
-
-# Load parameters
-with open('{temp_file}', 'r', encoding='utf-8') as f:
-    params = json.load(f)
-
-# Execute the function
-exec(tool_map.get('{tool_name}', 'raise ValueError("Unknown tool")'))
-result = tool_func(**params)
-print(json.dumps(result, ensure_ascii=False, indent=2))
-"""]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
-        
-        # Clean up temp file
-        os.unlink(temp_file)
-        
-        if result.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"MCP tool error: {result.stderr}")
-        
-        return json.loads(result.stdout)
-    
+        result = await execute_tool(tool_name, parameters)
+    except APIError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calling MCP tool: {str(e)}")
+    prefetcher.after_search(tool_name, parameters, result)
+    return result
+
+async def call_mcp_tool_all_pages(tool_name: str, parameters: dict) -> dict:
+    """Fetch every page of a paginated document and return them stitched together"""
+    try:
+        return await get_all_pages(tool_name, parameters)
+    except APIError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error assembling document: {str(e)}")
 
 # HEALTH CHECK ENDPOINTS
 @router.get("/health", response_model=HealthResponse, summary="Check Government Servers Health")
 async def check_servers_health():
-    """Check if Turkish government legal database servers are operational"""
+    """Check if Turkish government legal database servers are operational (from the background prober)"""
+    snapshot = health_prober.snapshot()
+    if snapshot is not None:
+        return snapshot
     return await call_mcp_tool("check_government_servers_health", {})
 
 # BEDESTEN UNIFIED SEARCH (Yargıtay, Danıştay, Local Courts, Appeals Courts, KYB)
@@ -222,13 +235,17 @@ async def search_anayasa_unified(request: SearchAnayasaRequest):
 @router.get("/anayasa/document", summary="Get Constitutional Court Document")
 async def get_anayasa_document(
     document_url: str = Query(..., description="Document URL from search results"),
-    page_number: int = Query(default=1, ge=1, description="Page number for paginated content")
+    page_number: int = Query(default=1, ge=1, description="Page number for paginated content"),
+    all_pages: bool = Query(default=False, description="Fetch every page concurrently and return one stitched document")
 ):
     """Get Constitutional Court decision document"""
-    return await call_mcp_tool("get_anayasa_document_unified", {
+    parameters = {
         "document_url": document_url,
         "page_number": page_number
-    })
+    }
+    if all_pages:
+        return await call_mcp_tool_all_pages("get_anayasa_document_unified", parameters)
+    return await call_mcp_tool("get_anayasa_document_unified", parameters)
 
 # UYUŞMAZLIK MAHKEMESİ (JURISDICTIONAL DISPUTES COURT)
 @router.post("/uyusmazlik/search", summary="Search Jurisdictional Disputes Court Decisions")
@@ -250,13 +267,17 @@ async def search_kik_decisions(request: SearchKikRequest):
 @router.get("/kik/document/{decision_id}", summary="Get KİK Document")
 async def get_kik_document(
     decision_id: str, 
-    page_number: int = Query(default=1, ge=1, description="Page number")
+    page_number: int = Query(default=1, ge=1, description="Page number"),
+    all_pages: bool = Query(default=False, description="Fetch every page concurrently and return one stitched document")
 ):
     """Get Public Procurement Authority (KİK) decision text in paginated Markdown format"""
-    return await call_mcp_tool("get_kik_document_markdown", {
+    parameters = {
         "karar_id": decision_id,
         "page_number": page_number
-    })
+    }
+    if all_pages:
+        return await call_mcp_tool_all_pages("get_kik_document_markdown", parameters)
+    return await call_mcp_tool("get_kik_document_markdown", parameters)
 
 # REKABET KURUMU (COMPETITION AUTHORITY)
 @router.post("/rekabet/search", summary="Search Competition Authority Decisions")
@@ -267,13 +288,17 @@ async def search_rekabet_decisions(request: SearchRekabetRequest):
 @router.get("/rekabet/document/{decision_id}", summary="Get Competition Authority Document")
 async def get_rekabet_document(
     decision_id: str,
-    page_number: int = Query(default=1, ge=1, description="Page number")
+    page_number: int = Query(default=1, ge=1, description="Page number"),
+    all_pages: bool = Query(default=False, description="Fetch every page concurrently and return one stitched document")
 ):
     """Get Competition Authority decision text in paginated Markdown format"""
-    return await call_mcp_tool("get_rekabet_kurumu_document", {
+    parameters = {
         "karar_id": decision_id,
         "page_number": page_number
-    })
+    }
+    if all_pages:
+        return await call_mcp_tool_all_pages("get_rekabet_kurumu_document", parameters)
+    return await call_mcp_tool("get_rekabet_kurumu_document", parameters)
 
 # SAYIŞTAY (COURT OF ACCOUNTS)
 @router.post("/sayistay/search", summary="Search Court of Accounts Decisions")
@@ -301,13 +326,17 @@ async def search_kvkk_decisions(request: SearchKvkkRequest):
 @router.get("/kvkk/document", summary="Get KVKK Document")
 async def get_kvkk_document(
     decision_url: str = Query(..., description="KVKK decision URL"),
-    page_number: int = Query(default=1, ge=1, description="Page number")
+    page_number: int = Query(default=1, ge=1, description="Page number"),
+    all_pages: bool = Query(default=False, description="Fetch every page concurrently and return one stitched document")
 ):
     """Get KVKK decision document in Markdown format"""
-    return await call_mcp_tool("get_kvkk_document_markdown", {
+    parameters = {
         "decision_url": decision_url,
         "page_number": page_number
-    })
+    }
+    if all_pages:
+        return await call_mcp_tool_all_pages("get_kvkk_document_markdown", parameters)
+    return await call_mcp_tool("get_kvkk_document_markdown", parameters)
 
 # BDDK (BANKING REGULATION AND SUPERVISION AGENCY)
 @router.post("/bddk/search", summary="Search BDDK Banking Regulation Decisions")
@@ -318,32 +347,143 @@ async def search_bddk_decisions(request: SearchBddkRequest):
 @router.get("/bddk/document/{document_id}", summary="Get BDDK Document")
 async def get_bddk_document(
     document_id: str,
-    page_number: int = Query(default=1, ge=1, description="Page number")
+    page_number: int = Query(default=1, ge=1, description="Page number"),
+    all_pages: bool = Query(default=False, description="Fetch every page concurrently and return one stitched document")
 ):
     """Get BDDK decision document as Markdown"""
-    return await call_mcp_tool("get_bddk_document_markdown", {
+    parameters = {
         "document_id": document_id,
         "page_number": page_number
-    })
+    }
+    if all_pages:
+        return await call_mcp_tool_all_pages("get_bddk_document_markdown", parameters)
+    return await call_mcp_tool("get_bddk_document_markdown", parameters)
+
+# FEDERATED MULTI-COURT SEARCH
+def federated_tool_calls(request: FederatedSearchRequest) -> Dict[str, Any]:
+    """Search tool and parameters for each requested source"""
+    query, page = request.query, request.page
+    calls = {
+        "bedesten": ("search_bedesten_unified", SearchBedestenRequest(phrase=query, pageNumber=page).dict()),
+        "emsal": ("search_emsal_detailed_decisions", SearchEmsalRequest(keyword=query, page_number=page).dict()),
+        "anayasa": ("search_anayasa_unified", SearchAnayasaRequest(
+            decision_type=request.anayasa_decision_type, keywords=[query], page_to_fetch=page
+        ).dict()),
+        "uyusmazlik": ("search_uyusmazlik_decisions", SearchUyusmazlikRequest(icerik=query).dict()),
+        "kik": ("search_kik_decisions", SearchKikRequest(karar_metni=query, page=page).dict()),
+        "rekabet": ("search_rekabet_kurumu_decisions", SearchRekabetRequest(PdfText=query, page=page).dict()),
+        "sayistay": ("search_sayistay_unified", SearchSayistayRequest(
+            decision_type=request.sayistay_decision_type, karar_tamami=query, start=(page - 1) * 10
+        ).dict()),
+        "kvkk": ("search_kvkk_decisions", SearchKvkkRequest(keywords=query, page=min(page, 50)).dict()),
+        "bddk": ("search_bddk_decisions", SearchBddkRequest(keywords=query, page=page).dict()),
+    }
+    if not request.sources:
+        return calls
+    unknown = [source for source in request.sources if source not in calls]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown sources: {', '.join(unknown)}. Available: {', '.join(calls)}")
+    return {source: calls[source] for source in request.sources}
+
+@router.post("/federated/search", summary="Search All Courts at Once")
+async def search_federated(request: FederatedSearchRequest):
+    """Search every court concurrently and return one merged, source-labelled ranking (partial on timeouts)"""
+    return await federated_search(
+        request.query,
+        federated_tool_calls(request),
+        timeout=request.timeout,
+        sort=request.sort,
+        limit=request.limit
+    )
+
+@router.post("/federated/search/stream", summary="Stream All-Court Search Results")
+async def stream_federated(
+    request: FederatedSearchRequest,
+    format: str = Query(default="sse", description="Stream format: sse (text/event-stream) or ndjson")
+):
+    """
+    Search every court concurrently and stream each source's results as soon as it returns
+
+    Emits one `source` event per court, then a final `merged` event with the combined ranking.
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=422, detail="format must be 'sse' or 'ndjson'")
+    calls = federated_tool_calls(request)
+
+    async def events():
+        async for event, data in stream_federated_search(
+            request.query, calls, timeout=request.timeout, sort=request.sort, limit=request.limit
+        ):
+            payload = json.dumps(data, ensure_ascii=False, default=str)
+            if format == "sse":
+                yield f"event: {event}\ndata: {payload}\n\n"
+            else:
+                yield json.dumps({"event": event, "data": data}, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# BATCH DOCUMENT RETRIEVAL
+@router.post("/documents/batch", summary="Get Many Documents at Once")
+async def get_documents_batch(
+    request: BatchDocumentsRequest,
+    stream: bool = Query(default=False, description="Stream each document as NDJSON as soon as it is ready")
+):
+    """
+    Fetch a list of (source, id, page) documents in one call
+
+    Duplicates are fetched once, cached documents are returned immediately and the rest are
+    fetched concurrently, at most `concurrency` at a time per source.
+    """
+    requested = [(document.source, document.id, document.page) for document in request.documents]
+    unique = deduplicate(requested)
+    positions: Dict[Any, List[int]] = {}
+    for index, ref in enumerate(requested):
+        positions.setdefault(ref, []).append(index)
+
+    if stream:
+        async def lines():
+            async for result in stream_documents(unique, request.concurrency):
+                # One line per unique document, listing every request position it answers
+                result["indexes"] = positions[unique[result.pop("index")]]
+                yield json.dumps(result, ensure_ascii=False, default=str) + "\n"
+
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    results = await fetch_documents(unique, request.concurrency)
+    by_ref = {ref: result for ref, result in zip(unique, results)}
+    documents = []
+    for index, ref in enumerate(requested):
+        documents.append({**by_ref[ref], "index": index})
+    return {
+        "requested": len(requested),
+        "unique": len(unique),
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "cached": sum(1 for result in results if result.get("cached")),
+        "documents": documents,
+    }
 
 # UTILITY ENDPOINTS
+def yargi_tool_categories() -> Dict[str, List[str]]:
+    """Yargi tools grouped by the upstream category they call"""
+    categories: Dict[str, List[str]] = {}
+    for tool_name in YARGI_TOOL_NAMES:
+        categories.setdefault(TOOL_CATEGORIES[tool_name], []).append(tool_name)
+    return categories
+
 @router.get("/tools", summary="List Available Tools")
 async def list_tools():
     """List all available Yargi-MCP tools and endpoints"""
     return {
         "total_tools": 38,
-        "categories": {
-            "health": ["check_government_servers_health"],
-            "bedesten_unified": ["search_bedesten_unified", "get_bedesten_document_markdown"],
-            "emsal": ["search_emsal_detailed_decisions", "get_emsal_document_markdown"],
-            "anayasa": ["search_anayasa_unified", "get_anayasa_document_unified"],
-            "uyusmazlik": ["search_uyusmazlik_decisions", "get_uyusmazlik_document_markdown_from_url"],
-            "kik": ["search_kik_decisions", "get_kik_document_markdown"],
-            "rekabet": ["search_rekabet_kurumu_decisions", "get_rekabet_kurumu_document"],
-            "sayistay": ["search_sayistay_unified", "get_sayistay_document_unified"],
-            "kvkk": ["search_kvkk_decisions", "get_kvkk_document_markdown"],
-            "bddk": ["search_bddk_decisions", "get_bddk_document_markdown"]
-        },
+        "categories": yargi_tool_categories(),
         "courts_covered": [
             "Yargıtay (Supreme Court of Appeals)",
             "Danıştay (Council of State)",
@@ -1,14 +1,25 @@
 """
 Direct mevzuat.gov.tr scraping - bypass MCP
 """
+import os
 import requests
 from bs4 import BeautifulSoup
 import json
 from typing import Dict, List, Optional
 
+# Shared outbound rate limit for mevzuat.gov.tr (same bucket as the backend's mevzuat tools)
+try:
+    from backend.rate_limiter import RateLimitExceeded, rate_limiter
+except ImportError:
+    rate_limiter = None
+
+# Seconds a search may queue for a mevzuat.gov.tr slot before it is refused
+DIRECT_MEVZUAT_MAX_WAIT = float(os.getenv("DIRECT_MEVZUAT_MAX_WAIT", 5))
+
 class DirectMevzuatClient:
     def __init__(self):
-        self.base_url = "https://www.mevzuat.gov.tr"
+        # Overridable so the client can be pointed at backend/mock_upstream.py
+        self.base_url = os.getenv("MEVZUAT_BASE_URL", "https://www.mevzuat.gov.tr").rstrip("/")
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -16,6 +27,12 @@ class DirectMevzuatClient:
     
     def search_mevzuat(self, query: str, limit: int = 10) -> Dict:
         """Search mevzuat.gov.tr directly"""
+        if rate_limiter is not None:
+            try:
+                rate_limiter.acquire("mevzuat", max_wait=DIRECT_MEVZUAT_MAX_WAIT)
+            except RateLimitExceeded as e:
+                return self._rate_limited_response(query, e)
+
         try:
             # Mevzuat.gov.tr arama URL'si
             search_url = f"{self.base_url}/MevzuatMetin/MevzuatMetinDetay.aspx"
@@ -56,6 +73,18 @@ class DirectMevzuatClient:
         except Exception as e:
             return self._fallback_response(query, limit, error=str(e))
     
+    def _rate_limited_response(self, query: str, error: Exception) -> Dict:
+        # No sample data here: callers must be able to tell a refused call from a real or fallback result
+        return {
+            "status": "rate_limited",
+            "query": query,
+            "results": [],
+            "total_found": 0,
+            "data_source": None,
+            "error": str(error),
+            "retry_after": round(error.retry_after, 1),
+        }
+
     def _fallback_response(self, query: str, limit: int, error: str = None) -> Dict:
         return {
             "status": "fallback",
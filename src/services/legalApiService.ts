@@ -49,6 +49,21 @@ const DocumentContentSchema = z.object({
   mime_type: z.string().optional(),
 });
 
+// Federated (all-court) search
+export interface FederatedSearchParams {
+  query: string;
+  sources?: string[];
+  page?: number;
+  timeout?: number;
+  sort?: 'relevance' | 'date';
+  limit?: number;
+}
+
+export interface FederatedSearchEvent {
+  event: 'source' | 'merged';
+  data: any;
+}
+
 // Types
 export type SearchResult = z.infer<typeof SearchResultSchema>;
 export type SearchResponse = z.infer<typeof SearchResponseSchema>;
@@ -199,6 +214,52 @@ class LegalApiClient {
     return DocumentContentSchema.parse(response);
   }
 
+  // Federated search across all courts
+  async searchFederated(params: FederatedSearchParams) {
+    return this.request<any>('/api/yargi/federated/search', {
+      method: 'POST',
+      body: JSON.stringify(params),
+    });
+  }
+
+  // Streams one event per court as it returns, then the merged ranking
+  async streamFederatedSearch(
+    params: FederatedSearchParams,
+    onEvent: (event: FederatedSearchEvent) => void,
+    signal?: AbortSignal
+  ) {
+    const response = await fetch(`${this.baseUrl}/api/yargi/federated/search/stream?format=ndjson`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(params),
+      signal,
+    });
+
+    if (!response.ok || !response.body) {
+      throw new LegalApiError(`HTTP ${response.status}: ${response.statusText}`, response.status);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let newline = buffer.indexOf('\n');
+      while (newline >= 0) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (line) {
+          onEvent(JSON.parse(line) as FederatedSearchEvent);
+        }
+        newline = buffer.indexOf('\n');
+      }
+    }
+  }
+
   // Mevzuat API endpoints
   async searchMevzuat(params: {
     mevzuat_adi?: string;